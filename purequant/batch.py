@@ -0,0 +1,106 @@
+# -*- coding:utf-8 -*-
+
+"""
+批量下单与批量撤单
+
+所有交易接口都提供place_orders与cancel_orders。交易所有批量接口时（OKEX交割合约与永续合约、BITMEX），按交易所的
+单次批量上限拆分之后合并请求；没有批量接口的交易所，在线程池中并发地逐个下单或撤单。两种方式都按交易所的
+请求频率预算限速，返回结果与传入的订单顺序相同。批量下单只下单，不经过交易助手追单，适合网格与做市策略。
+并发请求在批量操作专用的线程池中执行，不占用异步交易接口的线程池，因此可以在ASYNCTRADE中调用。
+
+使用方法：
+    okex.place_orders([{"side": "buy", "price": 9000, "size": 1}, {"side": "sellshort", "price": 9500, "size": 1}])
+    okex.cancel_orders(["6015264587212800", "6015264587212801"])
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from purequant.chaser import chaser
+from purequant.config import config
+from purequant.ratelimit import rate_limits
+
+BATCH_LIMITS = {"okex": 10, "bitmex": 20}   # 各交易所单次批量请求的最大订单数量
+OKEX_TYPES = {"buy": "1", "sellshort": "2", "sell": "3", "buytocover": "4"}     # OKEX合约下单的type参数
+THREAD_PREFIX = "purequant-batch"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """
+    批量操作专用的线程池，大小为config.async_workers
+    批量操作常在异步交易接口的线程池中被调用，若也在该线程池中并发，线程会等待排在自己之后的任务而死锁
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config.async_workers, thread_name_prefix=THREAD_PREFIX)
+    return _executor
+
+
+def chunks(items, size):
+    """将列表按size拆分为多个列表"""
+    items = list(items)
+    return [items[index:index + size] for index in range(0, len(items), size)]
+
+
+def parallel(platform, function, items):
+    """
+    在批量操作的线程池中并发调用function(item)，每次调用前按交易所的频率预算取得令牌；已在该线程池中时逐个调用
+    :return: 与items顺序相同的结果列表
+    """
+    def call(item):
+        rate_limits.acquire(platform)
+        return function(item)
+
+    if threading.current_thread().name.startswith(THREAD_PREFIX):
+        return [call(item) for item in items]
+    return list(executor().map(call, items))
+
+
+def split(platform, function, items, limit):
+    """
+    按批量上限拆分后并发请求，function接收一批订单并返回与之等长的结果列表
+    :return: 合并后的结果列表，与items顺序相同
+    """
+    results = []
+    for receipts in parallel(platform, function, chunks(items, limit)):
+        results.extend(receipts)
+    return results
+
+
+def place_orders(platform, orders):
+    """
+    没有批量下单接口时的通用实现，并发地逐个调用交易接口的下单方法
+    :param platform: 交易接口实例，如HUOBISWAP(...)
+    :param orders: 订单列表，如[{"side": "buy", "price": 9000, "size": 1}]，side为"buy"、"sell"、"sellshort"或
+                   "buytocover"，其余的键原样作为下单方法的参数，如"order_type"
+    :return: 与orders顺序相同的列表，每个元素为{"order_id": 订单号, "error": 错误信息}，下单成功时error为None
+    """
+    def place(order):
+        kwargs = {key: value for key, value in order.items() if key not in ("side", "price", "size")}
+        try:
+            order_id = chaser.place(platform, order["side"], order["price"], order["size"], kwargs)
+        except Exception as e:
+            return {"order_id": None, "error": str(e)}
+        return {"order_id": order_id, "error": None}
+
+    return parallel(platform, place, orders)
+
+
+def cancel_orders(platform, order_ids):
+    """
+    没有批量撤单接口时的通用实现，并发地逐个调用交易接口的revoke_order
+    :param platform: 交易接口实例
+    :param order_ids: 订单号列表
+    :return: 与order_ids顺序相同的列表，撤单请求被接受为True，否则为False
+    """
+    def cancel(order_id):
+        try:
+            return platform.revoke_order(order_id) is not False
+        except Exception:
+            return False
+
+    return parallel(platform, cancel, order_ids)
@@ -0,0 +1,206 @@
+# -*- coding:utf-8 -*-
+
+"""
+追单引擎
+
+交易助手的价格撤单、时间撤单与自动撤单由所有交易所共用的这一个状态机实现。下单之后等待订单推送或轮询订单状态，
+需要追价时，交易所支持改单（OKEX交割合约与永续合约、BITMEX）就直接修改委托价格，否则撤单后以剩余数量重新下单，
+不再递归调用buy、sell。
+
+直接调用trade.buy(...)等方法时，与原来的交易助手一样在订单结束后返回订单信息；使用submit时立即返回一个Future，
+追单在后台线程中进行，多个订单可以同时追单：
+    future = chaser.submit(okex, "buy", 9000, 1)
+    result = future.result()    # 或在协程中 result = await asyncio.wrap_future(future)
+"""
+
+import threading
+import time
+from purequant.config import config
+from purequant.ordermanager import order_manager, FINAL_STATES
+from purequant.ratelimit import exchange_name
+
+BUY_SIDES = ("buy", "buytocover")   # 追单时向上追价的下单方法，其余方法向下追价
+CANCELLED_STATES = tuple(state for state in FINAL_STATES if state not in ("完全成交", "失败"))
+CANCEL_RETRIES = 3  # 撤单后订单仍未结束时，最多重新撤单的次数
+
+
+def remaining_size(size, filled):
+    """委托数量减去已成交数量，张数等整数数量仍返回整数"""
+    remaining = size - (filled or 0)
+    if isinstance(size, int) and float(remaining).is_integer():
+        return int(remaining)
+    return remaining
+
+
+class OrderChase:
+    """一个订单的追单状态机"""
+
+    WAITING = "等待成交"
+    REPRICING = "追价"
+    CANCELLING = "撤单"
+    DONE = "结束"
+
+    def __init__(self, platform, side, order_id, price, size, kwargs):
+        """
+        :param platform: 交易接口实例，如OKEXFUTURES(...)
+        :param side: 下单方法的名称，"buy"、"sell"、"sellshort"或"buytocover"
+        :param order_id: 已发出的订单号
+        :param price: 委托价格
+        :param size: 委托数量
+        :param kwargs: 下单方法的其他参数，重新下单时原样传入
+        """
+        self.platform = platform
+        self.side = side
+        self.order_id = order_id
+        self.price = price
+        self.size = size
+        self.kwargs = kwargs
+        self.orders = [order_id]    # 追单过程中发出的所有订单号
+        self.state = OrderChase.WAITING
+        self.info = None
+        self.__exchange = exchange_name(platform)
+        self.__placed = time.monotonic()
+        self.__new_price = None
+        self.__last_price = None    # 价格撤单检查时取得的最新价，追价时直接使用
+        self.__reissue = True   # 为False时撤单之后不再重新下单，用于自动撤单
+        self.__cancel_retries = 0
+
+    def run(self):
+        """运行状态机直至订单结束，返回最后一个订单的订单信息"""
+        self.info = self.__wait(final=False)
+        while self.state != OrderChase.DONE:
+            if self.state == OrderChase.WAITING:
+                self.__waiting()
+            elif self.state == OrderChase.REPRICING:
+                self.__repricing()
+            else:
+                self.__cancelling()
+        return self.info
+
+    def __waiting(self):
+        status = self.__status()
+        if status is None or status in FINAL_STATES:
+            self.state = OrderChase.DONE
+        elif config.price_cancellation and self.__price_moved():
+            self.state = OrderChase.REPRICING
+        elif config.time_cancellation:
+            remaining = self.__placed + config.time_cancellation_seconds - time.monotonic()
+            if remaining <= 0:
+                self.state = OrderChase.REPRICING
+            else:
+                # 同时启用了价格撤单时，每隔order_poll_interval秒检查一次最新价
+                timeout = min(remaining, config.order_poll_interval) if config.price_cancellation else remaining
+                self.info = self.__wait(timeout)
+        elif config.automatic_cancellation:
+            self.__reissue = False
+            self.state = OrderChase.CANCELLING
+        else:
+            self.state = OrderChase.DONE
+
+    def __repricing(self):
+        last = self.__last_price if self.__last_price is not None else self.__last()
+        self.__last_price = None
+        if self.side in BUY_SIDES:
+            self.__new_price = last * (1 + config.reissue_order)
+        else:
+            self.__new_price = last * (1 - config.reissue_order)
+        amend_order = getattr(self.platform, "amend_order", None)
+        if amend_order is not None:
+            try:
+                amended = amend_order(self.order_id, self.__new_price)
+            except Exception:
+                amended = False
+            if amended:
+                self.price = self.__new_price
+                self.__placed = time.monotonic()
+                self.state = OrderChase.WAITING
+                return
+        self.state = OrderChase.CANCELLING
+
+    def __cancelling(self):
+        try:    # 撤单失败时，订单可能在此期间已经完全成交，以订单状态为准
+            self.platform.revoke_order(self.order_id)
+        except Exception:
+            pass
+        self.info = self.__wait()
+        status = self.__status()
+        if status not in FINAL_STATES:
+            self.__cancel_retries += 1
+            if self.__cancel_retries > CANCEL_RETRIES:
+                self.state = OrderChase.DONE
+            return
+        self.__cancel_retries = 0
+        remaining = remaining_size(self.size, self.info.get("已成交数量"))
+        if status not in CANCELLED_STATES or not self.__reissue or remaining <= 0:
+            self.state = OrderChase.DONE
+            return
+        # 部分成交时，重发委托数量为原委托数量减去已成交数量
+        self.order_id = chaser.place(self.platform, self.side, self.__new_price, remaining, self.kwargs)
+        self.orders.append(self.order_id)
+        self.price = self.__new_price
+        self.size = remaining
+        self.__placed = time.monotonic()
+        self.info = self.__wait(final=False)
+        self.state = OrderChase.WAITING
+
+    def __status(self):
+        return self.info["订单状态"] if self.info else None
+
+    def __last(self):
+        return float(self.platform.get_ticker()['last'])
+
+    def __price_moved(self):
+        """最新价相对委托价的变化是否超过了价格撤单的幅度"""
+        last = self.__last()
+        if self.side in BUY_SIDES:
+            moved = last >= self.price * (1 + config.price_cancellation_amplitude)
+        else:
+            moved = last <= self.price * (1 - config.price_cancellation_amplitude)
+        self.__last_price = last if moved else None
+        return moved
+
+    def __wait(self, timeout=None, final=True):
+        return order_manager.wait(self.__exchange, self.order_id, self.platform.get_order_info, timeout, final)
+
+
+class __Chaser:
+    """追单引擎"""
+
+    def __init__(self):
+        self.__local = threading.local()
+
+    def track(self, platform, side, order_id, price, size, **kwargs):
+        """
+        交易接口下单之后调用，按配置文件中的交易助手设置追单
+        :param platform: 交易接口实例
+        :param side: 下单方法的名称，如"buy"
+        :param order_id: 订单号
+        :param price: 委托价格
+        :param size: 委托数量
+        :param kwargs: 下单方法的其他参数
+        :return: 最后一个订单的订单信息；追单过程中重新下单时返回订单号
+        """
+        if getattr(self.__local, "placing", False):
+            return order_id
+        return OrderChase(platform, side, order_id, price, size, kwargs).run()
+
+    def place(self, platform, side, price, size, kwargs):
+        """调用交易接口的下单方法只下单，不追单，返回订单号"""
+        self.__local.placing = True
+        try:
+            return getattr(platform, side)(price, size, **kwargs)
+        finally:
+            self.__local.placing = False
+
+    def submit(self, platform, side, price, size, **kwargs):
+        """
+        在后台线程中下单并追单
+        :param platform: 交易接口实例，如OKEXFUTURES(...)
+        :param side: 下单方法的名称，"buy"、"sell"、"sellshort"或"buytocover"
+        :return: 返回concurrent.futures.Future，结果为最后一个订单的订单信息
+        """
+        from purequant.trade.asynctrade import executor
+        return executor().submit(getattr(platform, side), price, size, **kwargs)
+
+
+chaser = __Chaser()
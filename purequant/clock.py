@@ -0,0 +1,150 @@
+# -*- coding:utf-8 -*-
+
+"""
+交易所服务器时间同步
+
+签名请求需要带上交易所服务器的时间戳，此前每次签名前都要先请求一次服务器时间，使下单、查询的延迟翻倍。
+这里在后台定期测量本地时间与服务器时间的偏差（以往返时间的一半修正网络延迟），签名时直接用本地时间加上偏差
+计算时间戳，不再发送额外的请求。
+"""
+
+import threading
+import time
+from purequant.config import config
+
+RETRY_INTERVAL = 5  # 尚未同步成功时，后台线程重试的间隔秒数
+
+
+class ServerClock:
+
+    def __init__(self, name, fetch, interval=None, samples=3):
+        """
+        某个交易所的服务器时钟
+        :param name: 名称，如"binance"
+        :param fetch: 获取服务器时间的函数，返回毫秒时间戳
+        :param interval: 后台同步的间隔秒数，不传则使用config.clock_sync_interval
+        :param samples: 每次同步测量的次数，取往返时间最短的一次
+        """
+        self.name = name
+        self.__fetch = fetch
+        self.__interval = interval
+        self.__samples = samples
+        self.__lock = threading.Lock()
+        self.__offset = None    # 服务器时间减本地时间，毫秒
+        self.__rtt = None   # 最近一次同步的往返时间，毫秒
+        self.__drift = 0.0  # 偏差的变化速度，毫秒/小时
+        self.__last_sync = None
+        self.__syncs = 0
+        self.__errors = 0
+        self.__thread = None
+        self.__attempted = False    # 已在第一次取时间戳时同步过一次，无论成功与否
+
+    def sync(self):
+        """
+        立即测量一次时间偏差
+        :return: 测量成功返回偏差（毫秒），失败返回None
+        """
+        best = None
+        for _ in range(self.__samples):
+            try:
+                start = time.time()
+                server = float(self.__fetch())
+                end = time.time()
+            except Exception:
+                continue
+            rtt = (end - start) * 1000
+            offset = server - (start + end) / 2 * 1000  # 假设服务器在往返时间的中点返回
+            if best is None or rtt < best[0]:
+                best = (rtt, offset)
+        now = time.time()
+        with self.__lock:
+            if best is None:
+                self.__errors += 1
+                return None
+            if self.__offset is not None and now > self.__last_sync:
+                self.__drift = (best[1] - self.__offset) / (now - self.__last_sync) * 3600
+            self.__rtt, self.__offset = best
+            self.__last_sync = now
+            self.__syncs += 1
+            return self.__offset
+
+    def start(self):
+        """启动后台同步线程，可重复调用"""
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.__thread = threading.Thread(target=self.__run, name="purequant-clock-" + self.name, daemon=True)
+            self.__thread.start()
+
+    def __run(self):
+        while True:
+            interval = self.__interval or config.clock_sync_interval
+            time.sleep(interval if self.__offset is not None else min(interval, RETRY_INTERVAL))
+            self.sync()
+
+    def offset(self):
+        """当前的时间偏差（毫秒），尚未同步成功时为0"""
+        return self.__offset or 0.0
+
+    def timestamp(self):
+        """
+        服务器当前的毫秒时间戳，第一次调用时同步一次并启动后台同步，之后只做本地计算
+        :return: 整型毫秒时间戳
+        """
+        if not self.__attempted:
+            with self.__lock:
+                first, self.__attempted = not self.__attempted, True
+            if first:
+                self.sync()     # 同步失败时暂时使用本地时间，由后台线程重试，签名请求不再逐个等待同步
+                self.start()
+        return int(time.time() * 1000 + self.offset())
+
+    def metrics(self):
+        """
+        时钟同步情况
+        :return: 返回一个字典
+        """
+        with self.__lock:
+            return {
+                "offset": self.__offset,
+                "rtt": self.__rtt,
+                "drift": self.__drift,
+                "last_sync": self.__last_sync,
+                "syncs": self.__syncs,
+                "errors": self.__errors
+            }
+
+
+class __Clock:
+    """所有交易所的服务器时钟"""
+
+    def __init__(self):
+        self.__clocks = {}
+        self.__lock = threading.Lock()
+
+    def register(self, name, fetch, interval=None):
+        """
+        注册一个服务器时钟，同名的时钟只注册一次
+        :param name: 名称，如"binance"
+        :param fetch: 获取服务器时间的函数，返回毫秒时间戳
+        :param interval: 后台同步的间隔秒数
+        :return: 返回ServerClock
+        """
+        with self.__lock:
+            if name not in self.__clocks:
+                self.__clocks[name] = ServerClock(name, fetch, interval)
+            return self.__clocks[name]
+
+    def timestamp(self, name):
+        """某个已注册交易所的服务器毫秒时间戳"""
+        return self.__clocks[name].timestamp()
+
+    def metrics(self):
+        """
+        所有时钟的同步情况
+        :return: 返回一个字典，键为时钟名称
+        """
+        return {name: clock.metrics() for name, clock in list(self.__clocks.items())}
+
+
+clock = __Clock()
@@ -14,7 +14,35 @@ class __Config:
     """服务配置"""
 
     def __init__(self):
-        pass
+        # 以下为可选配置的默认值，配置文件中未设置时使用
+        self.mysql_pool_size = 5    # mysql连接池大小
+        self.mysql_pool_timeout = 30    # 等待mysql空闲连接的超时秒数
+        self.kline_cache_ttl = 1    # k线缓存有效期（秒），为0时不缓存
+        self.mongodb_console = "false"  # websocket是否在控制台打印收到的数据
+        self.mongodb_database = None    # websocket数据保存至mongodb的数据库，不设置则不保存
+        self.mongodb_collection = None  # websocket数据保存至mongodb的集合
+        self.mongodb_batch_size = 500   # mongodb缓冲写入每批的最大条数
+        self.mongodb_flush_interval = 1     # mongodb缓冲写入的最长等待秒数
+        self.mongodb_buffer_size = 100000   # mongodb缓冲写入的最大缓冲条数，缓冲已满时写入方阻塞等待
+        self.websocket_production = False   # websocket生产模式，不打印任何数据，只通过回调函数输出
+        self.websocket_decoder = None   # websocket解码流水线，"thread"或"process"时在线程池或进程池中解压与解析数据
+        self.websocket_decode_workers = 2   # 解码流水线的线程数或进程数
+        self.clock_sync_interval = 60   # 交易所服务器时间的后台同步间隔（秒）
+        self.http_pool_size = 10    # 每个域名的HTTP连接池大小，实际大小不小于async_workers
+        self.http_timeout = 10  # HTTP请求的默认超时秒数
+        self.http_retries = 2   # 连接失败或幂等请求失败时的重试次数
+        self.http_backoff = 0.3     # 重试的退避系数（秒）
+        self.async_workers = 32     # 异步交易接口执行同步请求的线程数，即最大并发请求数
+        self.rate_limits = {"default": 10, "okex": 10, "huobi": 10, "binance": 20, "bitmex": 1, "bybit": 10,
+                            "bitcoke": 5, "mxc": 5}     # 各交易所每秒的请求数预算
+        self.order_push_timeout = 0.5   # 下单、撤单后等待订单推送的秒数，超时未收到推送时查询一次订单
+        self.order_poll_interval = 1    # 订单推送不可用时，轮询订单状态的间隔秒数
+        self.log_format = "text"    # 日志格式，"text"或"json"
+        self.push_queue_size = 1000     # 每个推送渠道的最大排队消息数，已满时丢弃最早的消息
+        self.push_rate_limits = {"sendmail": 10, "dingtalk": 20, "twilio": 2}   # 各推送渠道每分钟的发送次数预算
+        self.push_retries = 3   # 推送失败时的重试次数
+        self.push_retry_interval = 1    # 推送重试的退避间隔（秒），每次重试加倍
+        self.live_data_max_age = 5  # websocket实时行情超过该秒数未更新时视为过期，MARKET回退到REST接口
 
 
     def loads(self, config_file=None):
@@ -39,9 +67,14 @@ class __Config:
         self.sendmail = configures['PUSH']['sendmail']
         self.dingtalk = configures['PUSH']['dingtalk']
         self.twilio = configures['PUSH']['twilio']
+        self.push_queue_size = configures['PUSH'].get('queue_size', self.push_queue_size)
+        self.push_rate_limits = dict(self.push_rate_limits, **configures['PUSH'].get('rate_limits', {}))
+        self.push_retries = configures['PUSH'].get('retries', self.push_retries)
+        self.push_retry_interval = configures['PUSH'].get('retry_interval', self.push_retry_interval)
         # logger
         self.level = configures['LOG']['level']
         self.handler = configures['LOG']['handler']
+        self.log_format = configures['LOG'].get('format', self.log_format)
         # first_run
         self.first_run = configures["STATUS"]["first_run"]
         # ASSISTANT
@@ -57,10 +90,40 @@ class __Config:
         self.mongodb_authorization = configures["MONGODB"]["authorization"]
         self.mongodb_user_name = configures["MONGODB"]["user_name"]
         self.mongodb_password = configures["MONGODB"]["password"]
+        self.mongodb_console = configures["MONGODB"].get("console", self.mongodb_console)
+        self.mongodb_database = configures["MONGODB"].get("database", self.mongodb_database)
+        self.mongodb_collection = configures["MONGODB"].get("collection", self.mongodb_collection)
+        self.mongodb_batch_size = configures["MONGODB"].get("batch_size", self.mongodb_batch_size)
+        self.mongodb_flush_interval = configures["MONGODB"].get("flush_interval", self.mongodb_flush_interval)
+        self.mongodb_buffer_size = configures["MONGODB"].get("buffer_size", self.mongodb_buffer_size)
+        # WEBSOCKET
+        self.websocket_production = configures.get("WEBSOCKET", {}).get("production", self.websocket_production)
+        self.websocket_decoder = configures.get("WEBSOCKET", {}).get("decoder", self.websocket_decoder)
+        self.websocket_decode_workers = configures.get("WEBSOCKET", {}).get("decode_workers",
+                                                                           self.websocket_decode_workers)
         # MYSQL AUTHORIZATION
         self.mysql_authorization = configures["MYSQL"]["authorization"]
         self.mysql_user_name = configures["MYSQL"]["user_name"]
         self.mysql_password = configures["MYSQL"]["password"]
+        self.mysql_pool_size = configures["MYSQL"].get("pool_size", self.mysql_pool_size)
+        self.mysql_pool_timeout = configures["MYSQL"].get("pool_timeout", self.mysql_pool_timeout)
+        # KLINE CACHE
+        self.kline_cache_ttl = configures.get("KLINE_CACHE", {}).get("ttl", self.kline_cache_ttl)
+        # CLOCK
+        self.clock_sync_interval = configures.get("CLOCK", {}).get("sync_interval", self.clock_sync_interval)
+        # HTTP
+        self.http_pool_size = configures.get("HTTP", {}).get("pool_size", self.http_pool_size)
+        self.http_timeout = configures.get("HTTP", {}).get("timeout", self.http_timeout)
+        self.http_retries = configures.get("HTTP", {}).get("retries", self.http_retries)
+        self.http_backoff = configures.get("HTTP", {}).get("backoff", self.http_backoff)
+        self.async_workers = configures.get("HTTP", {}).get("async_workers", self.async_workers)
+        # RATE LIMIT
+        self.rate_limits = dict(self.rate_limits, **configures.get("RATE_LIMIT", {}))
+        # ORDER
+        self.order_push_timeout = configures.get("ORDER", {}).get("push_timeout", self.order_push_timeout)
+        self.order_poll_interval = configures.get("ORDER", {}).get("poll_interval", self.order_poll_interval)
+        # LIVE DATA
+        self.live_data_max_age = configures.get("LIVE_DATA", {}).get("max_age", self.live_data_max_age)
         # PROXY
         self.proxy_host = configures["PROXY"].split(":")[0]
         self.proxy_port = configures["PROXY"].split(":")[1]
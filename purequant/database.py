@@ -0,0 +1,312 @@
+# -*- coding:utf-8 -*-
+
+"""
+mysql与mongodb存储引擎
+
+所有mysql的写入与读取共用一个连接池，已创建过的数据库与数据表会被缓存，
+避免每次写入都重新建立连接并执行"SHOW DATABASES"、"SHOW TABLES"。
+mongodb在整个进程中只创建一个客户端并只验证一次，高频写入通过后台线程批量insert_many。
+"""
+
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+import mysql.connector
+import pymongo
+from mysql.connector import pooling
+from purequant.config import config
+from purequant.logger import logger
+from purequant.sink import BatchSink
+
+EXIT_FLUSH_TIMEOUT = 5  # 程序退出时等待缓冲中的数据写入完毕的最长秒数
+
+
+class __MysqlEngine:
+    """mysql连接池存储引擎"""
+
+    def __init__(self):
+        self.__pool = None
+        self.__semaphore = None
+        self.__lock = threading.Lock()
+        self.__databases = set()    # 已确认存在的数据库
+        self.__tables = set()   # 已确认存在的数据表，元素为(database, data_sheet)
+        self.__unique_keys = set()  # 已确认存在的唯一索引，元素为(database, data_sheet, field)
+        self.__duplicate_keys = set()   # 因已有重复数据而无法创建唯一索引的字段，元素同上
+        self.__columns = {}     # (database, data_sheet) -> 数据表已有的字段名称列表
+        self.__in_use = 0
+        self.__acquired = 0
+        self.__waits = 0
+        self.__wait_time = 0.0
+        self.__max_wait_time = 0.0
+
+    def __get_pool(self):
+        """首次使用时按配置创建连接池"""
+        if self.__pool is None:
+            with self.__lock:
+                if self.__pool is None:
+                    user = config.mysql_user_name if config.mysql_authorization else 'root'
+                    password = config.mysql_password if config.mysql_authorization else 'root'
+                    pool_size = min(max(int(config.mysql_pool_size), 1), pooling.CNX_POOL_MAXSIZE)
+                    self.__pool = pooling.MySQLConnectionPool(pool_name="purequant",
+                                                              pool_size=pool_size,
+                                                              pool_reset_session=False,
+                                                              user=user,
+                                                              password=password)
+                    self.__semaphore = threading.BoundedSemaphore(pool_size)
+        return self.__pool
+
+    @contextmanager
+    def connection(self):
+        """
+        从连接池中取出一个连接，连接池已满时阻塞等待，使用完毕后自动归还。
+        :return: 上下文管理器，返回一个mysql连接
+        """
+        pool = self.__get_pool()
+        start = time.perf_counter()
+        if not self.__semaphore.acquire(blocking=False):  # 连接已全部被占用，记录等待时间
+            if not self.__semaphore.acquire(timeout=config.mysql_pool_timeout):
+                raise mysql.connector.errors.PoolError("等待mysql连接池超时！")
+            waited = time.perf_counter() - start
+            with self.__lock:
+                self.__waits += 1
+                self.__wait_time += waited
+                self.__max_wait_time = max(self.__max_wait_time, waited)
+        try:
+            conn = pool.get_connection()
+        except Exception:
+            self.__semaphore.release()
+            raise
+        with self.__lock:
+            self.__in_use += 1
+            self.__acquired += 1
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()    # 归还连接至连接池
+            with self.__lock:
+                self.__in_use -= 1
+            self.__semaphore.release()
+
+    def ensure_table(self, database, data_sheet, columns, cursor=None):
+        """
+        确保数据库与数据表存在，只在第一次使用时才向服务器发送建库建表语句
+        :param database: 数据库名称
+        :param data_sheet: 数据表名称
+        :param columns: 建表时的字段定义，如"timestamp TEXT, profit FLOAT"
+        :param cursor: 可传入已打开的游标，否则自动从连接池取出连接
+        :return:
+        """
+        if (database, data_sheet) in self.__tables:
+            return
+        if cursor is None:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                self.ensure_table(database, data_sheet, columns, cursor)
+                conn.commit()
+                cursor.close()
+            return
+        if database not in self.__databases:
+            cursor.execute("CREATE DATABASE IF NOT EXISTS `{}`".format(database))
+            self.__databases.add(database)
+        cursor.execute("CREATE TABLE IF NOT EXISTS `{}`.`{}` ({})".format(database, data_sheet, columns))
+        self.__tables.add((database, data_sheet))
+
+    def insert(self, database, data_sheet, columns, fields, values):
+        """
+        插入一行数据，数据表不存在时按columns自动创建
+        :param database: 数据库名称
+        :param data_sheet: 数据表名称
+        :param columns: 建表时的字段定义
+        :param fields: 要插入的字段名称列表
+        :param values: 与fields对应的值列表
+        :return:
+        """
+        sql = 'insert into `{}`.`{}` ({}) values ({})'.format(database, data_sheet, ", ".join(fields),
+                                                              ", ".join(["%s"] * len(fields)))
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self.ensure_table(database, data_sheet, columns, cursor)
+            cursor.execute(sql, values)
+            conn.commit()
+            cursor.close()
+
+    def ensure_unique_key(self, database, data_sheet, field, cursor):
+        """
+        确保数据表在field字段上有唯一索引，用于按该字段去重写入
+        :return: 唯一索引存在或创建成功返回True，表中已有重复数据无法创建时返回False
+        """
+        if (database, data_sheet, field) in self.__unique_keys:
+            return True
+        if (database, data_sheet, field) in self.__duplicate_keys:
+            return False
+        cursor.execute("SHOW INDEX FROM `{}`.`{}` WHERE Column_name = %s AND Non_unique = 0".format(database, data_sheet),
+                       (field,))
+        if not cursor.fetchall():
+            try:    # TEXT类型的字段只能建立前缀索引
+                cursor.execute("ALTER TABLE `{}`.`{}` ADD UNIQUE KEY `uk_{}` (`{}`(64))".format(database, data_sheet,
+                                                                                               field, field))
+            except mysql.connector.errors.IntegrityError:   # 表中已存在重复数据，只提示一次
+                self.__duplicate_keys.add((database, data_sheet, field))
+                logger.warning("数据表{}中{}字段存在重复数据，无法去重，将直接插入！".format(data_sheet, field))
+                return False
+        self.__unique_keys.add((database, data_sheet, field))
+        return True
+
+    def table_columns(self, database, data_sheet, cursor):
+        """数据表已有的字段名称列表，第一次使用时查询，之后使用缓存"""
+        key = (database, data_sheet)
+        if key not in self.__columns:
+            cursor.execute("SHOW COLUMNS FROM `{}`.`{}`".format(database, data_sheet))
+            self.__columns[key] = [row[0] for row in cursor.fetchall()]
+        return self.__columns[key]
+
+    def insert_many(self, database, data_sheet, columns, fields, rows, chunk_size=1000, unique_key=None,
+                    existing_only=False):
+        """
+        批量插入多行数据，按chunk_size分块写入，所有分块在同一个事务中提交
+        :param database: 数据库名称
+        :param data_sheet: 数据表名称
+        :param columns: 建表时的字段定义
+        :param fields: 要插入的字段名称列表
+        :param rows: 行数据列表，每行的值与fields一一对应
+        :param chunk_size: 每次发送给服务器的行数
+        :param unique_key: 去重字段，传入时已存在的行会被更新而不是重复插入
+        :param existing_only: 为True时只写入数据表中已有的字段，如向旧的6列k线表写入7列k线
+        :return: 写入的行数
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self.ensure_table(database, data_sheet, columns, cursor)
+            if existing_only:
+                existing = self.table_columns(database, data_sheet, cursor)
+                indexes = [index for index, field in enumerate(fields) if field in existing]
+                if len(indexes) < len(fields):
+                    fields = [fields[index] for index in indexes]
+                    rows = [[row[index] for index in indexes] for row in rows]
+            sql = 'insert into `{}`.`{}` ({}) values ({})'.format(database, data_sheet, ", ".join(fields),
+                                                                  ", ".join(["%s"] * len(fields)))
+            if unique_key is not None and self.ensure_unique_key(database, data_sheet, unique_key, cursor):
+                sql += " ON DUPLICATE KEY UPDATE {}".format(
+                    ", ".join("{0}=VALUES({0})".format(field) for field in fields if field != unique_key))
+            for start in range(0, len(rows), chunk_size):
+                cursor.executemany(sql, rows[start:start + chunk_size])  # 多行数据合并为一条insert语句
+            conn.commit()
+            cursor.close()
+        return len(rows)
+
+    def forget_database(self, database):
+        """数据库被删除后清除其缓存"""
+        self.__databases.discard(database)
+        self.__tables = set(item for item in self.__tables if item[0] != database)
+        self.__unique_keys = set(item for item in self.__unique_keys if item[0] != database)
+        self.__duplicate_keys = set(item for item in self.__duplicate_keys if item[0] != database)
+        self.__columns = {key: value for key, value in self.__columns.items() if key[0] != database}
+
+    def metrics(self):
+        """
+        连接池的运行指标
+        :return: 返回一个字典
+        """
+        with self.__lock:
+            return {
+                "pool_size": self.__pool.pool_size if self.__pool is not None else 0,
+                "in_use": self.__in_use,
+                "acquired": self.__acquired,
+                "waits": self.__waits,
+                "wait_time": self.__wait_time,
+                "max_wait_time": self.__max_wait_time,
+                "avg_wait_time": self.__wait_time / self.__waits if self.__waits else 0.0,
+                "cached_databases": len(self.__databases),
+                "cached_tables": len(self.__tables)
+            }
+
+
+mysql_engine = __MysqlEngine()
+
+
+class __MongoEngine:
+    """mongodb存储引擎"""
+
+    def __init__(self):
+        self.__client = None
+        self.__writers = {}     # (database, collection) -> BatchSink
+        self.__lock = threading.Lock()
+        atexit.register(self.close, EXIT_FLUSH_TIMEOUT)     # 进程退出前写入缓冲中剩余的数据，数据库不可用时不无限等待
+
+    def client(self):
+        """首次使用时创建客户端，之后所有读写共用，pymongo的客户端自带连接池且线程安全"""
+        if self.__client is None:
+            with self.__lock:
+                if self.__client is None:
+                    if config.mongodb_authorization:    # 如果启用了授权验证
+                        self.__client = pymongo.MongoClient(host='localhost', port=27017,
+                                                            username=config.mongodb_user_name,
+                                                            password=config.mongodb_password,
+                                                            authSource='admin',
+                                                            authMechanism='SCRAM-SHA-1')
+                    else:
+                        self.__client = pymongo.MongoClient(host='localhost', port=27017)
+        return self.__client
+
+    def collection(self, database, collection):
+        """获取集合"""
+        return self.client()[database][collection]
+
+    def writer(self, database, collection):
+        """
+        获取某个集合的缓冲写入器，数据攒够config.mongodb_batch_size条或等待config.mongodb_flush_interval秒后
+        由后台线程通过insert_many一次性写入，缓冲已满时写入方阻塞等待
+        :param database: 数据库名称
+        :param collection: 集合名称
+        :return: 返回BatchSink
+        """
+        key = (database, collection)
+        with self.__lock:
+            if key not in self.__writers:
+                self.__writers[key] = BatchSink(lambda datas: self.collection(database, collection).insert_many(datas, ordered=False),
+                                                batch_size=config.mongodb_batch_size,
+                                                flush_interval=config.mongodb_flush_interval,
+                                                maxsize=config.mongodb_buffer_size,
+                                                block=True)
+            return self.__writers[key]
+
+    def flush(self, timeout=None):
+        """
+        等待所有缓冲中的数据写入完毕
+        :param timeout: 最长等待秒数，为None时一直等待
+        :return: 全部写入返回True，超时返回False
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for writer in list(self.__writers.values()):
+            if not writer.flush(None if deadline is None else max(0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def close(self, timeout=None):
+        """
+        写入缓冲中剩余的数据并关闭客户端
+        :param timeout: 最长等待秒数，为None时一直等待，超时后未写入的数据被丢弃
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__lock:
+            writers = list(self.__writers.values())
+            self.__writers.clear()
+        for writer in writers:
+            writer.close(None if deadline is None else max(0, deadline - time.monotonic()))
+        if self.__client is not None:
+            self.__client.close()
+            self.__client = None
+
+    def metrics(self):
+        """
+        各个缓冲写入器的运行指标
+        :return: 返回一个字典，键为"数据库.集合"
+        """
+        return {"{}.{}".format(*key): writer.metrics() for key, writer in list(self.__writers.items())}
+
+
+mongo_engine = __MongoEngine()
@@ -0,0 +1,154 @@
+# -*- coding:utf-8 -*-
+
+"""
+websocket数据的解压与解析
+
+OKEX推送的是raw deflate压缩数据，火币推送的是gzip压缩数据，解压后再解析json。通常用一次zlib.decompress完成解压，
+不再为每条消息创建decompressobj，没有结束块的数据一次性解压失败时才退回decompressobj；安装了orjson或ujson时自动
+使用更快的json解析。
+
+推送频率很高时，可以启用解码流水线（配置文件WEBSOCKET中的decoder设为"thread"或"process"），解压与解析在线程池或
+进程池中进行，解析结果按收到的顺序交给回调函数：
+    pipeline = DecodePipeline(decode_okex, on_message)
+    await pipeline.put(frame)   # 在接收循环中调用
+回调函数仍在事件循环中按顺序执行，耗时的处理应自行交给其他线程。火币的ping也要解码之后才能识别，因此在排在它
+前面的消息（最多PIPELINE_SIZE条）处理完之后才会回复；OKEX由客户端发送ping，不受影响。
+"""
+
+import asyncio
+import json
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from purequant.config import config
+from purequant.logger import logger
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import ujson
+        json_loads = ujson.loads
+        JSON_BACKEND = "ujson"
+    except ImportError:
+        json_loads = json.loads
+        JSON_BACKEND = "json"
+
+PIPELINE_SIZE = 1000    # 流水线中最多等待解码的消息数，超出时接收循环等待
+
+
+def inflate(data):
+    """解压OKEX推送的raw deflate数据"""
+    try:
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+    except zlib.error:  # 没有结束块的数据（sync flush）只能用decompressobj解压
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+def gunzip(data):
+    """解压火币推送的gzip数据"""
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+
+def decode_okex(frame):
+    """
+    解压并解析一条OKEX推送
+    :return: 解析后的字典，心跳回复返回字符串"pong"
+    """
+    text = inflate(frame) if isinstance(frame, bytes) else frame.encode('utf-8')
+    if text == b"pong":
+        return "pong"
+    return json_loads(text)
+
+
+def decode_huobi(frame):
+    """解压并解析一条火币推送，返回解析后的字典"""
+    return json_loads(gunzip(frame) if isinstance(frame, bytes) else frame)
+
+
+class __Executors:
+    """解码流水线共用的线程池或进程池"""
+
+    def __init__(self):
+        self.__executor = None
+
+    def get(self):
+        """按配置创建线程池或进程池，未启用流水线时返回None"""
+        if config.websocket_decoder not in ("thread", "process"):
+            return None
+        if self.__executor is None:
+            if config.websocket_decoder == "process":
+                self.__executor = ProcessPoolExecutor(max_workers=config.websocket_decode_workers)
+            else:
+                self.__executor = ThreadPoolExecutor(max_workers=config.websocket_decode_workers,
+                                                     thread_name_prefix="purequant-decode")
+        return self.__executor
+
+
+executors = __Executors()
+
+
+class DecodePipeline:
+    """在线程池或进程池中解码，按收到的顺序把结果交给回调函数"""
+
+    def __init__(self, decode, callback, executor=None, size=PIPELINE_SIZE):
+        """
+        :param decode: 解码函数，如decode_okex，使用进程池时必须是模块级函数
+        :param callback: 回调函数，callback(result)，可以是协程函数
+        :param executor: 线程池或进程池，默认按配置文件创建，未启用时在事件循环中直接解码
+        :param size: 最多等待解码的消息数
+        """
+        self.__decode = decode
+        self.__callback = callback
+        self.__executor = executor if executor is not None else executors.get()
+        self.__queue = asyncio.Queue(size)
+        self.__consumer = None
+        self.decoded = 0
+        self.errors = 0
+
+    async def put(self, frame):
+        """放入一条收到的原始数据，等待解码的消息过多时等待"""
+        if self.__consumer is None:
+            self.__consumer = asyncio.ensure_future(self.__consume())
+        loop = asyncio.get_event_loop()
+        if self.__executor is None:
+            future = loop.create_future()
+            try:
+                future.set_result(self.__decode(frame))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = loop.run_in_executor(self.__executor, self.__decode, frame)
+        await self.__queue.put(future)
+
+    def close(self):
+        """停止回调，连接断开时调用，尚未处理的消息被丢弃"""
+        if self.__consumer is not None:
+            self.__consumer.cancel()
+            self.__consumer = None
+        while not self.__queue.empty():
+            self.__queue.get_nowait().cancel()
+
+    def pending(self):
+        return self.__queue.qsize()
+
+    async def __consume(self):
+        while True:
+            future = await self.__queue.get()
+            try:
+                result = await future
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error("websocket数据解码失败：{}".format(str(e)))
+                continue
+            self.decoded += 1
+            try:
+                result = self.__callback(result)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error("websocket回调函数错误：{}".format(str(e)))
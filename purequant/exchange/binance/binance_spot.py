@@ -1,8 +1,9 @@
 import hmac
 import hashlib
 import logging
-import requests
+from purequant.transport import transport
 import time
+from purequant.clock import clock
 from purequant.time import ts_to_utc_str, get_cur_timestamp_ms
 try:
     from urllib import urlencode
@@ -25,6 +26,9 @@ IOC = "IOC"
 
 options = {}
 
+# 所有币安模块共用一个服务器时钟
+server_clock = clock.register("binance", lambda: transport.get("https://api.binance.com/api/v3/time", timeout=5).json()['serverTime'])
+
 
 def set(apiKey, secret):
     """Set API key and secret.
@@ -215,7 +219,7 @@ def myTrades(symbol, **kwargs):
 
 
 def request(method, path, params=None):
-    resp = requests.request(method, ENDPOINT + path, params=params)
+    resp = transport.request(method, ENDPOINT + path, params=params)
     data = resp.json()
     if "msg" in data:
         logging.error(data['msg'])
@@ -225,14 +229,14 @@ def request(method, path, params=None):
 def signedRequest(method, path, params):
     if "apiKey" not in options or "secret" not in options:
         raise ValueError("Api key and secret must be set")
-    timestamp = requests.get("https://api.binance.com/api/v3/time").json()['serverTime']
+    timestamp = server_clock.timestamp()  # 本地时间加上后台同步的服务器时间偏差，不再每次请求服务器时间
     query = urlencode(sorted(params.items()))
     query += "&timestamp={}".format(timestamp)
     secret = bytes(options["secret"].encode("utf-8"))
     signature = hmac.new(secret, query.encode("utf-8"),
                          hashlib.sha256).hexdigest()
     query += "&signature={}".format(signature)
-    resp = requests.request(method,
+    resp = transport.request(method,
                             ENDPOINT + path + "?" + query,
                             headers={"X-MBX-APIKEY": options["apiKey"]})
     data = resp.json()
@@ -4,7 +4,7 @@ Official documentation can be found at 'https://www.bitmex.com/api/explorer/'
 """
 import hmac
 import hashlib
-import requests
+from purequant.transport import transport
 import time
 import sys
 from urllib.parse import urlencode
@@ -897,7 +897,7 @@ class Bitmex(object):
 
         fullURL = "{0}{1}{2}".format(self.BASE_URL, path, query)
 
-        apiResponse = requests.request(method, fullURL)
+        apiResponse = transport.request(method, fullURL)
 
         data = apiResponse.json()
 
@@ -928,7 +928,7 @@ class Bitmex(object):
             "api-signature": signature
         }
 
-        apiResponse = requests.request(method, fullURL, headers=headers)
+        apiResponse = transport.request(method, fullURL, headers=headers)
         data = apiResponse.json()
 
         return (data)
\ No newline at end of file
@@ -9,6 +9,7 @@ import time
 import urllib
 import hmac
 import hashlib
+from bisect import bisect_left
 
 
 def generate_nonce():
@@ -54,8 +55,10 @@ class BitMEXWebsocket:
     # Don't grow a table larger than this amount. Helps cap memory usage.
     MAX_TABLE_LEN = 200
 
-    def __init__(self, endpoint, symbol, api_key=None, api_secret=None):
-        '''Connect to the websocket and initialize data stores.'''
+    def __init__(self, endpoint, symbol, api_key=None, api_secret=None, on_order=None, on_update=None):
+        '''Connect to the websocket and initialize data stores.
+        on_order, if given, is called with the full row every time an order is inserted or updated.
+        on_update, if given, is called as on_update(table, self) after every data message has been applied.'''
         self.logger = logging.getLogger(__name__)
         self.logger.debug("Initializing WebSocket.")
 
@@ -72,6 +75,11 @@ class BitMEXWebsocket:
 
         self.data = {}
         self.keys = {}
+        # Per-table hash index: tuple of key values -> row, so updates and deletes don't scan the table.
+        self.index = {}
+        self.book = OrderBookL2()
+        self.on_order = on_order
+        self.on_update = on_update
         self.exited = False
 
         # We can subscribe right in the connection querystring, so let's build that.
@@ -121,7 +129,11 @@ class BitMEXWebsocket:
 
     def market_depth(self):
         '''Get market depth (orderbook). Returns all levels.'''
-        return self.data['orderBookL2']
+        return self.book.levels()
+
+    def order_book(self):
+        '''Get the maintained L2 order book, sorted by price on both sides.'''
+        return self.book
 
     def open_orders(self, clOrdIDPrefix):
         '''Get all your open orders.'''
@@ -236,40 +248,90 @@ class BitMEXWebsocket:
                 # 'delete'  - delete row
                 if action == 'partial':
                     self.logger.debug("%s: partial" % table)
-                    self.data[table] = message['data']
                     # Keys are communicated on partials to let you know how to uniquely identify
                     # an item. We use it for updates.
                     self.keys[table] = message['keys']
+                    if table == 'orderBookL2':
+                        self.book.partial(message['data'])
+                        self.data[table] = self.book
+                    else:
+                        self.data[table] = message['data']
+                        self.__reindex(table)
+                    if table == 'order':
+                        self.__notify_orders(message['data'])
                 elif action == 'insert':
                     self.logger.debug('%s: inserting %s' % (table, message['data']))
+                    if table == 'orderBookL2':
+                        self.book.insert(message['data'])
+                        return
                     self.data[table] += message['data']
+                    if self.keys.get(table):
+                        index = self.index[table]
+                        for item in message['data']:
+                            index[self.__key(table, item)] = item
+                    if table == 'order':
+                        self.__notify_orders(message['data'])
 
                     # Limit the max length of the table to avoid excessive memory usage.
                     # Don't trim orders because we'll lose valuable state if we do.
                     if table not in ['order', 'orderBookL2'] and len(self.data[table]) > BitMEXWebsocket.MAX_TABLE_LEN:
                         self.data[table] = self.data[table][BitMEXWebsocket.MAX_TABLE_LEN // 2:]
+                        self.__reindex(table)
 
                 elif action == 'update':
                     self.logger.debug('%s: updating %s' % (table, message['data']))
+                    if table == 'orderBookL2':
+                        self.book.update(message['data'])
+                        return
                     # Locate the item in the collection and update it.
+                    index = self.index.get(table, {})
                     for updateData in message['data']:
-                        item = find_by_keys(self.keys[table], self.data[table], updateData)
+                        item = index.get(self.__key(table, updateData))
                         if not item:
                             return  # No item found to update. Could happen before push
                         item.update(updateData)
+                        if table == 'order':
+                            self.__notify_orders([item])
                         # Remove cancelled / filled orders
                         if table == 'order' and not order_leaves_quantity(item):
+                            del index[self.__key(table, item)]
                             self.data[table].remove(item)
                 elif action == 'delete':
                     self.logger.debug('%s: deleting %s' % (table, message['data']))
+                    if table == 'orderBookL2':
+                        self.book.delete(message['data'])
+                        return
                     # Locate the item in the collection and remove it.
+                    index = self.index.get(table, {})
                     for deleteData in message['data']:
-                        item = find_by_keys(self.keys[table], self.data[table], deleteData)
-                        self.data[table].remove(item)
+                        item = index.pop(self.__key(table, deleteData), None)
+                        if item is not None:
+                            self.data[table].remove(item)
                 else:
                     raise Exception("Unknown action: %s" % action)
         except:
             self.logger.error(traceback.format_exc())
+        finally:
+            if action and self.on_update is not None:
+                try:
+                    self.on_update(table, self)
+                except:
+                    self.logger.error(traceback.format_exc())
+
+    def __notify_orders(self, rows):
+        '''Hand order rows to the on_order callback.'''
+        if self.on_order is not None:
+            for row in rows:
+                self.on_order(row)
+
+    def __key(self, table, item):
+        '''Build the index key of a row from the table's keys.'''
+        return tuple(item[k] for k in self.keys[table])
+
+    def __reindex(self, table):
+        '''Rebuild the hash index of a table after it has been replaced or trimmed.'''
+        if self.keys.get(table):
+            self.index[table] = {self.__key(table, item): item for item in self.data[table]}
 
     def __on_error(self, error):
         '''Called on fatal websocket errors. We exit on these.'''
@@ -298,6 +360,105 @@ def find_by_keys(keys, table, matchData):
         if all(item[k] == matchData[k] for k in keys):
             return item
 
+class OrderBookL2:
+    '''
+    orderBookL2 maintained as a hash map from level id to row, plus one sorted price index per side.
+
+    Inserts and deletes locate their position with a binary search; updates only carry id and size,
+    so they are a single dict lookup. Reading the book or the best prices never re-sorts it.
+    '''
+
+    def __init__(self):
+        self.rows = {}  # id -> row
+        self.sides = {'Sell': {}, 'Buy': {}}    # sort key -> row
+        self.prices = {'Sell': [], 'Buy': []}   # sorted keys: price for asks, -price for bids
+
+    @staticmethod
+    def sort_key(row):
+        return row['price'] if row['side'] == 'Sell' else -row['price']
+
+    def partial(self, data):
+        self.rows = {}
+        self.sides = {'Sell': {}, 'Buy': {}}
+        for row in data:
+            self.rows[row['id']] = row
+            self.sides[row['side']][self.sort_key(row)] = row
+        self.prices = {side: sorted(levels) for side, levels in self.sides.items()}
+
+    def insert(self, data):
+        for row in data:
+            if row['id'] in self.rows:
+                self.__remove(self.rows[row['id']])
+            self.__add(row)
+
+    def update(self, data):
+        for row in data:
+            item = self.rows.get(row['id'])
+            if item is None:
+                continue    # No level found to update. Could happen before partial
+            if 'price' in row and row['price'] != item['price']:
+                self.__remove(item)
+                item.update(row)
+                self.__add(item)
+            else:
+                item.update(row)
+
+    def delete(self, data):
+        for row in data:
+            item = self.rows.get(row['id'])
+            if item is not None:
+                self.__remove(item)
+
+    def __add(self, row):
+        key = self.sort_key(row)
+        levels = self.sides[row['side']]
+        if key not in levels:
+            prices = self.prices[row['side']]
+            prices.insert(bisect_left(prices, key), key)
+        levels[key] = row
+        self.rows[row['id']] = row
+
+    def __remove(self, row):
+        key = self.sort_key(row)
+        del self.rows[row['id']]
+        levels = self.sides[row['side']]
+        if levels.get(key) is row:
+            del levels[key]
+            prices = self.prices[row['side']]
+            del prices[bisect_left(prices, key)]
+
+    def levels(self):
+        '''All levels, unordered.'''
+        return list(self.rows.values())
+
+    def asks(self, count=None):
+        '''Ask levels from the lowest price.'''
+        levels = self.sides['Sell']
+        return [levels[key] for key in self.prices['Sell'][:count]]
+
+    def bids(self, count=None):
+        '''Bid levels from the highest price.'''
+        levels = self.sides['Buy']
+        return [levels[key] for key in self.prices['Buy'][:count]]
+
+    def ask_prices(self):
+        '''Ask prices from the lowest.'''
+        return list(self.prices['Sell'])
+
+    def bid_prices(self):
+        '''Bid prices from the highest.'''
+        return [-key for key in self.prices['Buy']]
+
+    def best_ask(self):
+        return self.prices['Sell'][0] if self.prices['Sell'] else None
+
+    def best_bid(self):
+        return -self.prices['Buy'][0] if self.prices['Buy'] else None
+
+    def __len__(self):
+        return len(self.rows)
+
+
 def order_leaves_quantity(o):
     if o['leavesQty'] is None:
         return True
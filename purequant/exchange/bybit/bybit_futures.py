@@ -1,9 +1,10 @@
-import requests
+from purequant.transport import transport
 import urllib.parse
 import hmac
 import urllib
 import time
 from purequant.time import get_cur_timestamp, get_cur_timestamp_ms
+from purequant.clock import clock
 
 TIMEOUT = 5
 
@@ -15,6 +16,7 @@ class BybitFutures:
         self.__url = "https://api-testnet.bybit.com" if testing else "https://api.bybit.com"
         self.__access_key = access_key
         self.__secret_key = secret_key
+        self.__clock = clock.register("bybit-testnet" if testing else "bybit", self.__fetch_server_time_ms)
 
     def http_get_request(self, url, params):
         headers = {
@@ -23,32 +25,32 @@ class BybitFutures:
         }
         postdata = urllib.parse.urlencode(params)   # 将字典里面所有的键值转化为query-string格式（key=value&key=value），并且将中文转码
         try:
-            response = requests.get(url+"?"+postdata, headers=headers, timeout=TIMEOUT)
+            response = transport.get(url+"?"+postdata, headers=headers, timeout=TIMEOUT)
             return response.json()
         except Exception as e:
             return {"status": "fail", "error_message": "%s" % e}
 
     def apikey_post(self, url, params):
-        timestamp = self.get_server_time() * 1000
+        timestamp = self.__clock.timestamp()
         params.update({"timestamp": timestamp, "api_key": self.__access_key})
         val = '&'.join([str(k) + "=" + str(v) for k, v in sorted(params.items()) if (k != 'sign') and (v is not None)])
         signature = str(hmac.new(bytes(self.__secret_key, "utf-8"), bytes(val, "utf-8"), digestmod="sha256").hexdigest())
         post_data = val + "&sign=" + signature
         try:
-            response = requests.post(url + "?" + post_data, timeout=TIMEOUT)
+            response = transport.post(url + "?" + post_data, timeout=TIMEOUT)
             return response.json()
         except Exception as e:
             return {"status": "fail", "error_message": "%s" % e}
 
     def apikey_get(self, url, params):
-        timestamp = self.get_server_time() * 1000
+        timestamp = self.__clock.timestamp()
         params.update({"timestamp": timestamp, "api_key": self.__access_key})
         val = '&'.join([str(k) + "=" + str(v) for k, v in sorted(params.items()) if (k != 'sign') and (v is not None)])
         signature = str(
             hmac.new(bytes(self.__secret_key, "utf-8"), bytes(val, "utf-8"), digestmod="sha256").hexdigest())
         post_data = val + "&sign=" + signature
         try:
-            response = requests.get(url + "?" + post_data, timeout=TIMEOUT)
+            response = transport.get(url + "?" + post_data, timeout=TIMEOUT)
             return response.json()
         except Exception as e:
             return {"status": "fail", "error_message": "%s" % e}
@@ -563,6 +565,11 @@ class BybitFutures:
         data = round(float(self.http_get_request(url, params)['time_now']))
         return data
 
+    def __fetch_server_time_ms(self):
+        """获取交易所服务器的毫秒时间戳，供时钟同步使用"""
+        url = self.__url + "/v2/public/time"
+        return float(self.http_get_request(url, {})['time_now']) * 1000
+
     def get_announcement(self):
         """获取Bybit最近30天OpenAPI公告（时间倒叙排列）"""
         url = self.__url + "/v2/public/announcement"
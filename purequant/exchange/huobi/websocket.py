@@ -1,17 +1,18 @@
 import datetime
 import uuid
-import urllib
+import urllib.parse
 import asyncio
 import websockets
 import json
 import hmac
 import base64
 import hashlib
-import gzip
-import traceback
+import time
 from purequant.storage import storage
 from purequant.config import config
+from purequant.decoder import DecodePipeline, decode_huobi, executors
 from purequant.push import push
+from purequant.wsmanager import ws_manager
 
 
 def generate_signature(host, method, params, request_path, secret_key):
@@ -48,6 +49,8 @@ async def subscribe(url, access_key, secret_key, subs, callback=None, auth=False
         subs: the data list to subscribe.
         callback: the callback function to handle the ws data received.
         auth: True: Need to be signatured. False: No need to be signatured.
+    Returns when the connection is closed, use ws_manager.huobi() for a supervised connection that reconnects
+    with exponential backoff and resubscribes all topics.
     """
     async with websockets.connect(url) as websocket:
         if auth:
@@ -58,7 +61,7 @@ async def subscribe(url, access_key, secret_key, subs, callback=None, auth=False
                 "SignatureVersion": "2",
                 "Timestamp": timestamp
             }
-            sign = generate_signature(url, "GET", data, "/notification", secret_key)
+            sign = generate_signature(url, "GET", data, urllib.parse.urlparse(url).path, secret_key)
             data["op"] = "auth"
             data["type"] = "api"
             data["Signature"] = sign
@@ -69,96 +72,39 @@ async def subscribe(url, access_key, secret_key, subs, callback=None, auth=False
             sub_str = json.dumps(sub)
             await websocket.send(sub_str)
             print(f"send: {sub_str}")
-        while True:
-            rsp = await websocket.recv()
-            data = json.loads(gzip.decompress(rsp).decode())
-            # print(f"recevie<--: {data}")
-            if "op" in data and data.get("op") == "ping":
-                pong_msg = {"op": "pong", "ts": data.get("ts")}
-                await websocket.send(json.dumps(pong_msg))
-                # print(f"send: {pong_msg}")
-                continue
-            if "ping" in data:
-                pong_msg = {"pong": data.get("ping")}
-                await websocket.send(json.dumps(pong_msg))
-                # print(f"send: {pong_msg}")
-                continue
-            rsp = await callback(data)
 
-async def huobi_swap_position_subscribe(url, access_key, secret_key, subs, callback=None, auth=False):
-    async with websockets.connect(url) as websocket:
-        if auth:
-            timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
-            data = {
-                "AccessKeyId": access_key,
-                "SignatureMethod": "HmacSHA256",
-                "SignatureVersion": "2",
-                "Timestamp": timestamp
-            }
-            sign = generate_signature(url, "GET", data, "/swap-notification", secret_key)
-            data["op"] = "auth"
-            data["type"] = "api"
-            data["Signature"] = sign
-            msg_str = json.dumps(data)
-            await websocket.send(msg_str)
-            print(f"send: {msg_str}")
-        for sub in subs:
-            sub_str = json.dumps(sub)
-            await websocket.send(sub_str)
-            print(f"send: {sub_str}")
-        while True:
-            rsp = await websocket.recv()
-            data = json.loads(gzip.decompress(rsp).decode())
+        async def handle(data):
             # print(f"recevie<--: {data}")
             if "op" in data and data.get("op") == "ping":
                 pong_msg = {"op": "pong", "ts": data.get("ts")}
                 await websocket.send(json.dumps(pong_msg))
                 # print(f"send: {pong_msg}")
-                continue
+                return
             if "ping" in data:
                 pong_msg = {"pong": data.get("ping")}
                 await websocket.send(json.dumps(pong_msg))
                 # print(f"send: {pong_msg}")
-                continue
-            rsp = await callback(data)
+                return
+            await callback(data)
 
-async def huobi_swap_position_subscribe(url, access_key, secret_key, subs, callback=None, auth=False):
-    async with websockets.connect(url) as websocket:
-        if auth:
-            timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
-            data = {
-                "AccessKeyId": access_key,
-                "SignatureMethod": "HmacSHA256",
-                "SignatureVersion": "2",
-                "Timestamp": timestamp
-            }
-            sign = generate_signature(url, "GET", data, "/swap-notification", secret_key)
-            data["op"] = "auth"
-            data["type"] = "api"
-            data["Signature"] = sign
-            msg_str = json.dumps(data)
-            await websocket.send(msg_str)
-            print(f"send: {msg_str}")
-        for sub in subs:
-            sub_str = json.dumps(sub)
-            await websocket.send(sub_str)
-            print(f"send: {sub_str}")
-        while True:
-            rsp = await websocket.recv()
-            data = json.loads(gzip.decompress(rsp).decode())
-            # print(f"recevie<--: {data}")
-            if "op" in data and data.get("op") == "ping":
-                pong_msg = {"op": "pong", "ts": data.get("ts")}
-                await websocket.send(json.dumps(pong_msg))
-                # print(f"send: {pong_msg}")
-                continue
-            if "ping" in data:
-                pong_msg = {"pong": data.get("ping")}
-                await websocket.send(json.dumps(pong_msg))
-                # print(f"send: {pong_msg}")
-                continue
-            rsp = await callback(data)
+        # 启用解码流水线时，解压与解析在线程池或进程池中进行，按收到的顺序交给handle
+        pipeline = DecodePipeline(decode_huobi, handle) if executors.get() else None
+        try:
+            while True:
+                rsp = await websocket.recv()
+                if pipeline is not None:
+                    await pipeline.put(rsp)
+                else:
+                    await handle(decode_huobi(rsp))
+        finally:
+            if pipeline is not None:
+                pipeline.close()
 
+async def huobi_swap_position_subscribe(url, access_key, secret_key, subs, callback=None, auth=False):
+    """ Huobi Swap subscribe websockets, same as subscribe, the signature path is taken from the url.
+    For automatic reconnection and resubscription, use ws_manager.huobi(url, access_key, secret_key) instead.
+    """
+    await subscribe(url, access_key, secret_key, subs, callback, auth)
 
 
 async def handle_ws_data(*args, **kwargs):
@@ -190,7 +136,8 @@ async def handle_ws_data(*args, **kwargs):
             if config.mongodb_console == "true":
                 print("callback param", *args, **kwargs)
             dict = {"data":("callback param", *args)}
-            storage.mongodb_save(dict, config.mongodb_database, config.mongodb_collection)
+            if config.mongodb_database:
+                storage.mongodb_save_buffered(config.mongodb_database, config.mongodb_collection, dict, block=False)
     except:
         pass
 
@@ -225,12 +172,13 @@ if __name__ == "__main__":
         }
     ]
 
+    # 断线后按指数退避重连，重新鉴权并订阅全部主题
+    connection = ws_manager.huobi(order_url, access_key, secret_key)
+    for sub in order_subs:
+        connection.subscribe(sub["topic"], handle_ws_data)
+    # connection = ws_manager.huobi(market_url)
+    # for sub in market_subs:
+    #     connection.subscribe(sub["sub"], handle_ws_data)
     while True:
-        try:
-            # asyncio.get_event_loop().run_until_complete(
-            #     subscribe(market_url, access_key, secret_key, market_subs, handle_ws_data, auth=False))
-            asyncio.get_event_loop().run_until_complete(subscribe(order_url, access_key,  secret_key, order_subs, handle_ws_data, auth=True))
-        # except (websockets.exceptions.ConnectionClosed):
-        except Exception as e:
-            traceback.print_exc()
-            print('websocket connection error. reconnect rightnow')
\ No newline at end of file
+        time.sleep(60)
+        print(ws_manager.metrics())
@@ -1,4 +1,4 @@
-import requests
+from purequant.transport import transport
 import time
 import hashlib
 from purequant.time import get_cur_timestamp
@@ -24,13 +24,13 @@ class Mxc:
     def get_markets(self):
         """获取市场列表信息"""
         url = ROOT_URL + '/open/api/v1/data/markets'
-        response = requests.request('GET', url, headers=headers)
+        response = transport.request('GET', url, headers=headers)
         return response.json()
 
     def get_markets_info(self):
         """获取交易对信息"""
         url = ROOT_URL + '/open/api/v1/data/markets_info'
-        response = requests.request('GET', url, headers=headers)
+        response = transport.request('GET', url, headers=headers)
         return response.json()
 
     def get_depth(self, symbol, depth):
@@ -40,7 +40,7 @@ class Mxc:
         params = {'market': symbol,
                   'depth': depth}
         url = ROOT_URL + '/open/api/v1/data/depth'
-        response = requests.request('GET', url, params=params, headers=headers)
+        response = transport.request('GET', url, params=params, headers=headers)
         return response.json()
 
     def get_trade_history(self, symbol):
@@ -48,7 +48,7 @@ class Mxc:
         symbol = symbol
         params = {'market': symbol}
         url = ROOT_URL + '/open/api/v1/data/history'
-        response = requests.request('GET', url, params=params, headers=headers)
+        response = transport.request('GET', url, params=params, headers=headers)
         return response.json()
 
     def get_ticker(self, symbol):
@@ -56,7 +56,7 @@ class Mxc:
         symbol = symbol
         params = {'market': symbol}
         url = ROOT_URL + '/open/api/v1/data/ticker'
-        response = requests.request('GET', url, params=params, headers=headers)
+        response = transport.request('GET', url, params=params, headers=headers)
         return response.json()
 
     def get_kline(self, symbol, timeframe):
@@ -77,7 +77,7 @@ class Mxc:
                   'startTime': interval,
                   'limit': 1000}
         url = ROOT_URL + '/open/api/v1/data/kline'
-        response = requests.request('GET', url, params=params, headers=headers)
+        response = transport.request('GET', url, params=params, headers=headers)
         return response.json()
 
 
@@ -98,7 +98,7 @@ class Mxc:
         params = {'api_key': self.__access_key,
                   'req_time': time.time()}
         params.update({'sign': self.sign(params)})
-        response = requests.request('GET', url, params=params, headers=headers)
+        response = transport.request('GET', url, params=params, headers=headers)
         return response.json()
 
     def get_current_orders(self, symbol):
@@ -113,7 +113,7 @@ class Mxc:
                   'page_size': 50}
         params.update({'sign': self.sign(params)})
         url = ROOT_URL + '/open/api/v1/private/current/orders'
-        response = requests.request('GET', url, params=params, headers=headers)
+        response = transport.request('GET', url, params=params, headers=headers)
         return response.json()
 
     def create_order(self, symbol, price, quantity, trade_type):
@@ -132,7 +132,7 @@ class Mxc:
                   'trade_type': trade_type}
         params.update({'sign': self.sign(params)})
         url = ROOT_URL + '/open/api/v1/private/order'
-        response = requests.request('POST', url, params=params, headers=headers)
+        response = transport.request('POST', url, params=params, headers=headers)
         return response.json()
 
     def create_multi_orders(self):
@@ -157,7 +157,7 @@ class Mxc:
             },
         ]
         url = ROOT_URL + '/open/api/v1/private/order_batch'
-        response = requests.request('POST', url, params=params, json=data, headers=headers)
+        response = transport.request('POST', url, params=params, json=data, headers=headers)
         return response.json()
 
     def cancel_order(self, symbol, order_id):
@@ -170,7 +170,7 @@ class Mxc:
                   'trade_no': order_id}
         params.update({'sign': self.sign(params)})
         url = ROOT_URL + '/open/api/v1/private/order'
-        response = requests.request('DELETE', url, params=params, headers=headers)
+        response = transport.request('DELETE', url, params=params, headers=headers)
         return response.json()
 
     def cancel_multi_orders(self):
@@ -183,7 +183,7 @@ class Mxc:
                   'trade_no': ','.join(order_id)}
         params.update({'sign': self.sign(params)})
         url = ROOT_URL + '/open/api/v1/private/order_cancel'
-        response = requests.request('POST', url, params=params, headers=headers)
+        response = transport.request('POST', url, params=params, headers=headers)
         return response.json()
 
     def get_private_order_history(self, symbol, deal_type):
@@ -200,7 +200,7 @@ class Mxc:
                   'page_size': 70}
         params.update({'sign': self.sign(params)})
         url = ROOT_URL + '/open/api/v1/private/orders'
-        response = requests.request('GET', url, params=params)
+        response = transport.request('GET', url, params=params)
         return response.json()
 
     def get_order_info(self, symbol, order_id):
@@ -213,7 +213,7 @@ class Mxc:
                   'trade_no': trade_no}
         params.update({'sign': self.sign(params)})
         url = ROOT_URL + '/open/api/v1/private/order'
-        response = requests.request('GET', url, params=params)
+        response = transport.request('GET', url, params=params)
         return response.json()
 
 
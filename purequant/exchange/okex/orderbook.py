@@ -0,0 +1,139 @@
+# -*- coding:utf-8 -*-
+
+"""
+OKEX深度频道的本地订单簿
+
+每一边的档位以价格（解析为数字）为键保存在字典中，另有一个按价格升序排列的有序列表作为索引，买盘在索引中
+以负价格保存，因此两边的索引都是从最优价开始。增量数据中的每一档通过二分查找定位，价格只在第一次出现时
+解析一次。前25档的校验字符串只在前25档发生变化时重新拼接。
+"""
+
+import zlib
+from bisect import bisect_left
+
+CHECKSUM_DEPTH = 25     # 校验前25档
+
+
+class _Side:
+    """订单簿的一边"""
+
+    def __init__(self, reverse):
+        self.reverse = reverse   # 买盘为True，价格从高到低排列
+        self.levels = {}    # 数字价格 -> 交易所推送的档位，如["9000.1", "2", "0", "1"]
+        self.index = []     # 排序键，卖盘为价格，买盘为负价格
+
+    def key(self, price):
+        return -float(price) if self.reverse else float(price)
+
+    def clear(self):
+        self.levels.clear()
+        del self.index[:]
+
+    def load(self, levels):
+        self.clear()
+        for level in levels:
+            if level[1] != "0":
+                self.levels[self.key(level[0])] = list(level)
+        self.index = sorted(self.levels)
+
+    def update(self, levels, depth):
+        """
+        合并增量数据
+        :return: 前depth档是否发生了变化
+        """
+        changed = False
+        for level in levels:
+            key = self.key(level[0])
+            if level[1] == "0":
+                if key in self.levels:
+                    del self.levels[key]
+                    position = bisect_left(self.index, key)
+                    del self.index[position]
+                    changed = changed or position < depth
+            elif key in self.levels:
+                self.levels[key] = list(level)
+                changed = changed or bisect_left(self.index, key) < depth
+            else:
+                self.levels[key] = list(level)
+                position = bisect_left(self.index, key)
+                self.index.insert(position, key)
+                changed = changed or position < depth
+        return changed
+
+    def top(self, count=None):
+        """从最优价开始的前count档"""
+        keys = self.index if count is None else self.index[:count]
+        return [self.levels[key] for key in keys]
+
+
+class OrderBook:
+
+    def __init__(self, instrument_id=None):
+        """
+        本地订单簿
+        :param instrument_id: 交易对或合约ID
+        """
+        self.instrument_id = instrument_id
+        self.__bids = _Side(reverse=True)
+        self.__asks = _Side(reverse=False)
+        self.__checksum = None
+
+    def partial(self, bids, asks):
+        """
+        以全量数据重建订单簿
+        :param bids: 买盘档位列表，每一档为[价格, 数量, ...]，价格与数量均为字符串
+        :param asks: 卖盘档位列表
+        :return:
+        """
+        self.__bids.load(bids)
+        self.__asks.load(asks)
+        self.__checksum = None
+
+    def update(self, bids, asks):
+        """
+        合并增量数据，数量为"0"的档位被删除
+        :param bids: 买盘增量档位列表
+        :param asks: 卖盘增量档位列表
+        :return:
+        """
+        changed = self.__bids.update(bids, CHECKSUM_DEPTH)
+        changed = self.__asks.update(asks, CHECKSUM_DEPTH) or changed
+        if changed:
+            self.__checksum = None
+
+    def bids(self, count=None):
+        """买盘档位，价格从高到低，不传count则返回全部档位"""
+        return self.__bids.top(count)
+
+    def asks(self, count=None):
+        """卖盘档位，价格从低到高，不传count则返回全部档位"""
+        return self.__asks.top(count)
+
+    def best_bid(self):
+        """买一档，无数据时返回None"""
+        return self.__bids.levels[self.__bids.index[0]] if self.__bids.index else None
+
+    def best_ask(self):
+        """卖一档，无数据时返回None"""
+        return self.__asks.levels[self.__asks.index[0]] if self.__asks.index else None
+
+    def checksum(self):
+        """
+        按OKEX的规则计算前25档的校验值，前25档未变化时直接返回上一次的结果
+        :return: 有符号32位整数，与推送数据中的checksum比较
+        """
+        if self.__checksum is None:
+            bids = self.__bids.top(CHECKSUM_DEPTH)
+            asks = self.__asks.top(CHECKSUM_DEPTH)
+            parts = []
+            for i in range(max(len(bids), len(asks))):
+                if i < len(bids):
+                    parts.append(bids[i][0] + ":" + bids[i][1])
+                if i < len(asks):
+                    parts.append(asks[i][0] + ":" + asks[i][1])
+            value = zlib.crc32(":".join(parts).encode())
+            self.__checksum = value - (1 << 32) if value >= (1 << 31) else value
+        return self.__checksum
+
+    def __len__(self):
+        return len(self.__bids.index) + len(self.__asks.index)
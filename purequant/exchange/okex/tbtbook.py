@@ -0,0 +1,364 @@
+# -*- coding:utf-8 -*-
+
+"""
+OKEX逐笔深度频道（depth_l2_tbt）的本地订单簿
+
+每一边的价格与数量保存在按价格排序的numpy数组中（买盘以负价格保存，两边都从最优价开始），增量数据中的每一档
+通过二分查找定位。前25档的checksum只在前25档变化时重新计算。发现缺口（checksum校验失败、序号不连续或时间
+倒退）时订单簿停止使用，通过REST接口获取快照重建，重建期间收到的增量数据暂存，快照之后按顺序重新合并。
+
+最优价、前N档为O(1)，按数量计算成交均价为O(log n)：
+    book = TbtBook("BTC-USD-201225", snapshot=rest_snapshot("BTC-USD-201225"))
+    book.apply(res['action'], res['data'][0])
+    book.vwap("buy", 100)   # 买入100张的成交均价
+    book.imbalance(5)   # 前5档的买卖盘不平衡度
+"""
+
+import threading
+import zlib
+import numpy as np
+
+CHECKSUM_DEPTH = 25     # 校验前25档
+INITIAL_CAPACITY = 512  # 每一边数组的初始容量，不够时加倍
+SNAPSHOT_SIZE = 200     # REST快照的档位数量
+MAX_PENDING = 10000     # 重建期间最多暂存的增量数据条数
+
+
+def rest_snapshot(instrument_id, size=SNAPSHOT_SIZE):
+    """
+    返回一个通过REST接口获取深度快照的函数，传给TbtBook(snapshot=...)
+    :param instrument_id: 合约ID，根据格式自动选择交割合约、永续合约或币币的接口
+    :param size: 快照的档位数量
+    """
+    from purequant.livedata import okex_kind
+    kind = okex_kind(instrument_id)
+    if kind == "swap":
+        from purequant.exchange.okex.swap_api import SwapAPI as API
+    elif kind == "futures":
+        from purequant.exchange.okex.futures_api import FutureAPI as API
+    else:
+        from purequant.exchange.okex.spot_api import SpotAPI as API
+    api = API("", "", "")
+    return lambda: api.get_depth(instrument_id, size=size)
+
+
+class _Ladder:
+    """订单簿的一边"""
+
+    def __init__(self, reverse):
+        self.reverse = reverse  # 买盘为True，价格从高到低排列
+        self.keys = np.empty(INITIAL_CAPACITY)  # 排序键，卖盘为价格，买盘为负价格
+        self.sizes = np.empty(INITIAL_CAPACITY)
+        self.count = 0
+        self.strings = {}   # 排序键 -> [价格字符串, 数量字符串]，用于计算checksum
+        self.__cumulative = None    # 累计数量与累计金额，合并增量数据后失效
+
+    def key(self, price):
+        return -float(price) if self.reverse else float(price)
+
+    def load(self, levels):
+        self.strings = {}
+        for level in levels:
+            if float(level[1]) != 0:
+                self.strings[self.key(level[0])] = [level[0], level[1]]
+        keys = sorted(self.strings)
+        self.count = len(keys)
+        capacity = max(INITIAL_CAPACITY, 2 * self.count)
+        self.keys = np.empty(capacity)
+        self.sizes = np.empty(capacity)
+        self.keys[:self.count] = keys
+        self.sizes[:self.count] = [float(self.strings[key][1]) for key in keys]
+        self.__cumulative = None
+
+    def update(self, levels):
+        """
+        合并增量数据
+        :return: 发生变化的最靠前的档位序号，没有变化时返回self.count
+        """
+        first = self.count
+        for level in levels:
+            key = self.key(level[0])
+            size = float(level[1])
+            n = self.count
+            position = int(np.searchsorted(self.keys[:n], key))
+            exists = position < n and self.keys[position] == key
+            if size == 0:
+                if not exists:
+                    continue
+                self.keys[position:n - 1] = self.keys[position + 1:n]
+                self.sizes[position:n - 1] = self.sizes[position + 1:n]
+                self.count -= 1
+                del self.strings[key]
+            elif exists:
+                self.sizes[position] = size
+                self.strings[key][1] = level[1]
+            else:
+                if n == len(self.keys):
+                    self.keys = np.concatenate([self.keys, np.empty(n)])
+                    self.sizes = np.concatenate([self.sizes, np.empty(n)])
+                self.keys[position + 1:n + 1] = self.keys[position:n]
+                self.sizes[position + 1:n + 1] = self.sizes[position:n]
+                self.keys[position] = key
+                self.sizes[position] = size
+                self.count += 1
+                self.strings[key] = [level[0], level[1]]
+            first = min(first, position)
+        if first < self.count or levels:
+            self.__cumulative = None
+        return first
+
+    def prices(self, count=None):
+        keys = self.keys[:self.count if count is None else min(count, self.count)]
+        return -keys if self.reverse else keys.copy()
+
+    def quantities(self, count=None):
+        return self.sizes[:self.count if count is None else min(count, self.count)].copy()
+
+    def top(self, count=None):
+        """从最优价开始的前count档，每一档为[价格字符串, 数量字符串]"""
+        keys = self.keys[:self.count if count is None else min(count, self.count)]
+        return [self.strings[key] for key in keys.tolist()]
+
+    def best(self):
+        if not self.count:
+            return None
+        return -self.keys[0] if self.reverse else self.keys[0]
+
+    def cumulative(self):
+        """累计数量与累计金额"""
+        if self.__cumulative is None:
+            sizes = self.sizes[:self.count]
+            self.__cumulative = (np.cumsum(sizes), np.cumsum(sizes * np.abs(self.keys[:self.count])))
+        return self.__cumulative
+
+    def volume(self, count):
+        """前count档的数量之和"""
+        count = min(count, self.count)
+        return float(self.cumulative()[0][count - 1]) if count > 0 else 0.0
+
+    def vwap(self, size):
+        """
+        按最优价开始吃掉size数量的成交均价
+        :return: (成交均价, 可成交数量)，深度不足时可成交数量小于size，没有档位时返回(None, 0)
+        """
+        if not self.count or size <= 0:
+            return None, 0.0
+        sizes, notional = self.cumulative()
+        position = int(np.searchsorted(sizes, size))
+        if position >= self.count:
+            return float(notional[-1] / sizes[-1]), float(sizes[-1])
+        filled_before = sizes[position - 1] if position else 0.0
+        notional_before = notional[position - 1] if position else 0.0
+        price = abs(self.keys[position])
+        return float((notional_before + (size - filled_before) * price) / size), float(size)
+
+
+class TbtBook:
+
+    def __init__(self, instrument_id=None, snapshot=None):
+        """
+        逐笔深度订单簿
+        :param instrument_id: 交易对或合约ID
+        :param snapshot: 获取深度快照的函数，返回与REST深度接口相同的字典，如rest_snapshot(instrument_id)；
+                         不传时发现缺口只能重新订阅
+        """
+        self.instrument_id = instrument_id
+        self.ready = False  # 订单簿已与交易所同步
+        self.stale = False  # 发现了缺口，尚未开始重建
+        self.resyncing = False
+        self.timestamp = None
+        self.seq = None
+        self.updates = 0
+        self.gaps = 0
+        self.resyncs = 0
+        self.__bids = _Ladder(reverse=True)
+        self.__asks = _Ladder(reverse=False)
+        self.__snapshot = snapshot
+        self.__checksum = None
+        self.__pending = []     # 重建期间收到的增量数据
+        self.__generation = 0   # 每次收到全量数据加1，重建期间收到全量数据时丢弃快照
+        self.__lock = threading.RLock()
+
+    def apply(self, action, data):
+        """
+        合并一条推送
+        :param action: "partial"或"update"
+        :param data: 推送数据中data列表里的一条
+        :return: 订单簿可用时返回True；发现缺口、尚未收到全量数据或正在重建时返回False，发现缺口时stale为True
+        """
+        if action == "partial":
+            return self.partial(data)
+        return self.update(data)
+
+    def partial(self, data):
+        """以全量数据重建订单簿"""
+        with self.__lock:
+            self.__load(data)
+            self.__generation += 1
+            self.__pending = []
+            self.resyncing = False
+            self.ready = self.__verify(data)
+            self.stale = not self.ready
+            return self.ready
+
+    def update(self, data):
+        """合并增量数据，发现缺口时返回False"""
+        with self.__lock:
+            if self.resyncing:
+                if len(self.__pending) < MAX_PENDING:
+                    self.__pending.append(data)
+                return False
+            if not self.ready:
+                return False
+            if self.__gap(data):
+                return self.__lost()
+            changed = self.__bids.update(data.get('bids', [])) < CHECKSUM_DEPTH
+            changed = self.__asks.update(data.get('asks', [])) < CHECKSUM_DEPTH or changed
+            if changed:
+                self.__checksum = None
+            self.timestamp = data.get('timestamp', self.timestamp)
+            self.seq = data.get('seqId', self.seq)
+            self.updates += 1
+            return self.__verify(data) or self.__lost()
+
+    def suspend(self):
+        """
+        开始重建，此后收到的增量数据暂存到resync完成
+        :return: 已在重建中时返回False
+        """
+        with self.__lock:
+            if self.resyncing:
+                return False
+            self.resyncing = True
+            self.stale = False
+            self.ready = False
+            self.__pending = []
+            return True
+
+    def resync(self):
+        """
+        通过REST快照重建订单簿，并按顺序重新合并重建期间收到的增量数据，请求快照会阻塞，应在后台线程中调用
+        :return: 重建成功返回True；没有快照函数、请求失败或之后的增量数据校验失败时返回False，此时需要重新订阅
+        """
+        self.suspend()
+        with self.__lock:
+            generation = self.__generation
+        try:
+            snapshot = self.__snapshot() if self.__snapshot is not None else None
+        except Exception:
+            snapshot = None
+        with self.__lock:
+            if generation != self.__generation:     # 重建期间已收到全量数据
+                return self.ready
+            self.resyncing = False
+            pending, self.__pending = self.__pending, []
+            if not snapshot or 'asks' not in snapshot:
+                return False
+            self.resyncs += 1
+            self.__load(snapshot)
+            self.seq = None     # 快照没有序号，之后的增量数据只按checksum校验
+            self.ready = True
+            for data in pending:
+                if snapshot.get('timestamp') and data.get('timestamp') and data['timestamp'] <= snapshot['timestamp']:
+                    continue    # 快照已包含的增量数据
+                if not self.update(data):
+                    self.stale = False  # 由调用方重新订阅
+                    return False
+            return True
+
+    def checksum(self):
+        """
+        按OKEX的规则计算前25档的校验值，前25档未变化时直接返回上一次的结果
+        :return: 有符号32位整数
+        """
+        with self.__lock:
+            if self.__checksum is None:
+                bids = self.__bids.top(CHECKSUM_DEPTH)
+                asks = self.__asks.top(CHECKSUM_DEPTH)
+                parts = []
+                for i in range(max(len(bids), len(asks))):
+                    if i < len(bids):
+                        parts.append(bids[i][0] + ":" + bids[i][1])
+                    if i < len(asks):
+                        parts.append(asks[i][0] + ":" + asks[i][1])
+                value = zlib.crc32(":".join(parts).encode())
+                self.__checksum = value - (1 << 32) if value >= (1 << 31) else value
+            return self.__checksum
+
+    def bids(self, count=None):
+        """买盘档位，价格从高到低，每一档为[价格字符串, 数量字符串]，与OrderBook相同"""
+        with self.__lock:
+            return self.__bids.top(count)
+
+    def asks(self, count=None):
+        """卖盘档位，价格从低到高"""
+        with self.__lock:
+            return self.__asks.top(count)
+
+    def top(self, count=5):
+        """
+        前count档的数值
+        :return: (买盘价格, 买盘数量, 卖盘价格, 卖盘数量)，均为numpy数组
+        """
+        with self.__lock:
+            return (self.__bids.prices(count), self.__bids.quantities(count),
+                    self.__asks.prices(count), self.__asks.quantities(count))
+
+    def best_bid(self):
+        """买一价，无数据时返回None"""
+        with self.__lock:
+            return self.__bids.best()
+
+    def best_ask(self):
+        """卖一价，无数据时返回None"""
+        with self.__lock:
+            return self.__asks.best()
+
+    def vwap(self, side, size):
+        """
+        按当前深度成交size数量的成交均价
+        :param side: "buy"吃卖盘，"sell"吃买盘
+        :param size: 数量
+        :return: (成交均价, 可成交数量)，深度不足时可成交数量小于size
+        """
+        with self.__lock:
+            return (self.__asks if side == "buy" else self.__bids).vwap(size)
+
+    def imbalance(self, count=5):
+        """
+        前count档的买卖盘不平衡度，(买盘数量 - 卖盘数量) / (买盘数量 + 卖盘数量)
+        :return: -1到1之间的浮点数，买盘越强越接近1，无数据时返回0
+        """
+        with self.__lock:
+            bid = self.__bids.volume(count)
+            ask = self.__asks.volume(count)
+        return (bid - ask) / (bid + ask) if bid + ask else 0.0
+
+    def metrics(self):
+        return {"ready": self.ready, "updates": self.updates, "gaps": self.gaps, "resyncs": self.resyncs,
+                "bids": self.__bids.count, "asks": self.__asks.count}
+
+    def __load(self, data):
+        self.__bids.load(data.get('bids', []))
+        self.__asks.load(data.get('asks', []))
+        self.__checksum = None
+        self.timestamp = data.get('timestamp')
+        self.seq = data.get('seqId')
+
+    def __gap(self, data):
+        """序号不连续或时间倒退"""
+        if self.seq is not None and data.get('prevSeqId') is not None and data['prevSeqId'] != self.seq:
+            return True
+        return bool(self.timestamp and data.get('timestamp') and data['timestamp'] < self.timestamp)
+
+    def __lost(self):
+        self.gaps += 1
+        self.ready = False
+        self.stale = True
+        return False
+
+    def __verify(self, data):
+        return 'checksum' not in data or self.checksum() == data['checksum']
+
+    def __len__(self):
+        return self.__bids.count + self.__asks.count
@@ -1,7 +1,7 @@
 import asyncio
 import websockets
 import json
-import requests
+from purequant.transport import transport
 import dateutil.parser as dp
 import hmac
 import base64
@@ -10,7 +10,9 @@ import datetime
 from purequant.push import push
 from purequant.storage import storage
 from purequant.config import config
+from purequant.decoder import inflate
 from purequant.time import get_localtime
+from purequant.exchange.okex.orderbook import OrderBook
 
 def get_timestamp():
     now = datetime.datetime.now()
@@ -20,7 +22,7 @@ def get_timestamp():
 
 def get_server_time():
     url = "https://www.okex.com/api/general/v3/time"
-    response = requests.get(url)
+    response = transport.get(url)
     if response.status_code == 200:
         return response.json()['iso']
     else:
@@ -46,15 +48,6 @@ def login_params(timestamp, api_key, passphrase, secret_key):
     return login_str
 
 
-def inflate(data):
-    decompress = zlib.decompressobj(
-            -zlib.MAX_WBITS  # see above
-    )
-    inflated = decompress.decompress(data)
-    inflated += decompress.flush()
-    return inflated
-
-
 def partial(res, timestamp):
     data_obj = res['data'][0]
     bids = data_obj['bids']
@@ -185,8 +178,18 @@ def change(num_old):
 
 
 # subscribe channels un_need login
-async def subscribe_without_login(url, channels):
-    l = []
+async def subscribe_without_login(url, channels, on_message=None, on_book=None, production=None):
+    """
+    订阅公共频道
+    :param url: websocket地址
+    :param channels: 频道列表
+    :param on_message: 回调函数，每收到一条数据调用on_message(res)，res为解析后的字典
+    :param on_book: 回调函数，深度频道的订单簿校验通过后调用on_book(instrument_id, book)，book为OrderBook
+    :param production: 生产模式，不打印任何数据，不传则使用配置文件中的设置
+    :return:
+    """
+    production = config.websocket_production if production is None else production
+    books = {}  # 合约ID -> 本地订单簿
     while True:
         try:
             async with websockets.connect(url) as ws:
@@ -201,9 +204,10 @@ async def subscribe_without_login(url, channels):
                         try:
                             await ws.send('ping')
                             res_b = await ws.recv()
-                            timestamp = get_timestamp()
-                            res = inflate(res_b).decode('utf-8')
-                            print(timestamp + res)
+                            if not production:
+                                timestamp = get_timestamp()
+                                res = inflate(res_b).decode('utf-8')
+                                print(timestamp + res)
                             continue
                         except Exception as e:
                             timestamp = get_timestamp()
@@ -213,78 +217,57 @@ async def subscribe_without_login(url, channels):
 
                     timestamp = get_timestamp()
                     res = inflate(res_b).decode('utf-8')
-                    if config.mongodb_console == "true":
+                    if not production and config.mongodb_console == "true":
                         print(timestamp + res)
-                    data = {'data':res}
-                    storage.mongodb_save(data, config.mongodb_database, config.mongodb_collection)
+                    if config.mongodb_database:   # 放入缓冲由后台线程批量写入，缓冲已满时丢弃而不阻塞接收
+                        storage.mongodb_save_buffered(config.mongodb_database, config.mongodb_collection, {'data': res}, block=False)
 
-                    res = eval(res)
+                    res = json.loads(res)
                     if 'event' in res:
                         continue
-                    for i in res:
-                        if 'depth' in res[i] and 'depth5' not in res[i]:
-                            # 订阅频道是深度频道
-                            if res['action'] == 'partial':
-                                for m in l:
-                                    if res['data'][0]['instrument_id'] == m['instrument_id']:
-                                        l.remove(m)
-                                # 获取首次全量深度数据
-                                bids_p, asks_p, instrument_id = partial(res, timestamp)
-                                d = {}
-                                d['instrument_id'] = instrument_id
-                                d['bids_p'] = bids_p
-                                d['asks_p'] = asks_p
-                                l.append(d)
-
-                                # 校验checksum
-                                checksum = res['data'][0]['checksum']
-                                print(timestamp + '推送数据的checksum为：' + str(checksum))
-                                check_num = check(bids_p, asks_p)
-                                print(timestamp + '校验后的checksum为：' + str(check_num))
-                                if check_num == checksum:
-                                    print("校验结果为：True")
-                                else:
-                                    print("校验结果为：False，正在重新订阅……")
-
-                                    # 取消订阅
-                                    await unsubscribe_without_login(url, channels, timestamp)
-                                    # 发送订阅
-                                    async with websockets.connect(url) as ws:
-                                        sub_param = {"op": "subscribe", "args": channels}
-                                        sub_str = json.dumps(sub_param)
-                                        await ws.send(sub_str)
-                                        timestamp = get_timestamp()
-                                        print(timestamp + f"send: {sub_str}")
-
-                            elif res['action'] == 'update':
-                                for j in l:
-                                    if res['data'][0]['instrument_id'] == j['instrument_id']:
-                                        # 获取全量数据
-                                        bids_p = j['bids_p']
-                                        asks_p = j['asks_p']
-                                        # 获取合并后数据
-                                        bids_p = update_bids(res, bids_p, timestamp)
-                                        asks_p = update_asks(res, asks_p, timestamp)
-
-                                        # 校验checksum
-                                        checksum = res['data'][0]['checksum']
-                                        print(timestamp + '推送数据的checksum为：' + str(checksum))
-                                        check_num = check(bids_p, asks_p)
-                                        print(timestamp + '校验后的checksum为：' + str(check_num))
-                                        if check_num == checksum:
-                                            print("校验结果为：True")
-                                        else:
-                                            print("校验结果为：False，正在重新订阅……")
-
-                                            # 取消订阅
-                                            await unsubscribe_without_login(url, channels, timestamp)
-                                            # 发送订阅
-                                            async with websockets.connect(url) as ws:
-                                                sub_param = {"op": "subscribe", "args": channels}
-                                                sub_str = json.dumps(sub_param)
-                                                await ws.send(sub_str)
-                                                timestamp = get_timestamp()
-                                                print(timestamp + f"send: {sub_str}")
+                    if on_message is not None:
+                        on_message(res)
+                    table = res.get('table', '')
+                    if 'depth' in table and 'depth5' not in table:
+                        # 订阅频道是深度频道
+                        data = res['data'][0]
+                        instrument_id = data['instrument_id']
+                        if res['action'] == 'partial':
+                            # 获取首次全量深度数据
+                            if not production:
+                                partial(res, timestamp)
+                            book = OrderBook(instrument_id)
+                            book.partial(data['bids'], data['asks'])
+                            books[instrument_id] = book
+                        elif res['action'] == 'update' and instrument_id in books:
+                            # 合并增量数据
+                            book = books[instrument_id]
+                            book.update(data['bids'], data['asks'])
+                        else:
+                            continue
+
+                        # 校验checksum
+                        checksum = data['checksum']
+                        check_num = book.checksum()
+                        if not production:
+                            print(timestamp + '推送数据的checksum为：' + str(checksum))
+                            print(timestamp + '校验后的checksum为：' + str(check_num))
+                        if check_num == checksum:
+                            if not production:
+                                print("校验结果为：True")
+                            if on_book is not None:
+                                on_book(instrument_id, book)
+                        else:
+                            print(timestamp + "校验结果为：False，正在重新订阅……")
+                            del books[instrument_id]
+
+                            # 在当前连接上只重新订阅校验失败的频道
+                            channel = "{}:{}".format(table, instrument_id)
+                            await ws.send(json.dumps({"op": "unsubscribe", "args": [channel]}))
+                            sub_str = json.dumps({"op": "subscribe", "args": [channel]})
+                            await ws.send(sub_str)
+                            timestamp = get_timestamp()
+                            print(timestamp + f"send: {sub_str}")
         except Exception as e:
             timestamp = get_timestamp()
             print(timestamp + "连接断开，正在重连……")
@@ -293,7 +276,12 @@ async def subscribe_without_login(url, channels):
 
 
 # subscribe channels need login
-async def subscribe(url, api_key, passphrase, secret_key, channels):
+async def subscribe(url, api_key, passphrase, secret_key, channels, on_message=None, on_status=None):
+    """
+    订阅需要登录的私有频道，持仓与账户更新时推送提醒
+    :param on_message: 回调函数，每收到一条数据调用on_message(res)，res为解析后的字典
+    :param on_status: 回调函数，登录成功时调用on_status(True)，连接断开时调用on_status(False)
+    """
     while True:
         try:
             async with websockets.connect(url) as ws:
@@ -307,6 +295,8 @@ async def subscribe(url, api_key, passphrase, secret_key, channels):
                 res = inflate(res_b).decode('utf-8')
                 time = get_timestamp()
                 # print(time + res)
+                if on_status is not None:
+                    on_status(bool(json.loads(res).get("success")))
 
                 # subscribe
                 sub_param = {"op": "subscribe", "args": channels}
@@ -331,6 +321,8 @@ async def subscribe(url, api_key, passphrase, secret_key, channels):
                             time = get_timestamp()
                             print(time + "连接关闭，正在重连……")
                             print(e)
+                            if on_status is not None:
+                                on_status(False)
                             break
 
                     time = get_timestamp()
@@ -338,7 +330,9 @@ async def subscribe(url, api_key, passphrase, secret_key, channels):
                     # print(time + res)
                     # 持仓更新
                     length = len(res)
-                    result = eval(res)
+                    result = json.loads(res)
+                    if on_message is not None and 'event' not in result:
+                        on_message(result)
                     if length > 99:
                         if channels[0][0:16] == "futures/position":
                             data = result['data'][0]
@@ -426,6 +420,8 @@ async def subscribe(url, api_key, passphrase, secret_key, channels):
             time = get_timestamp()
             print(time + "连接断开，正在重连……")
             print(e)
+            if on_status is not None:
+                on_status(False)
             continue
 
 
@@ -0,0 +1,371 @@
+# -*- coding:utf-8 -*-
+
+"""
+增量指标计算
+
+每个指标保存自身的计算状态（均线的累计值、EMA的上一个值、滚动窗口、Wilder平滑值等），每收到一根新的k线只做O(1)的
+计算，不再对整段历史k线重新调用talib。计算步骤与talib完全一致，对同样的输入，最新值与talib对整段数据计算的
+最后一个值逐位相同。
+
+使用方法：
+    ma = MA(20)
+    ma.warmup(kline)     # 先用历史k线（按时间升序）预热
+    if indicators.BarUpdate():
+        ma.update(last_bar)     # 每根k线走完后传入这根k线，last_bar为[时间戳, 开, 高, 低, 收, 成交量]
+    ma.value    # 最新的值，数据不足时为nan
+"""
+
+import abc
+import math
+from collections import deque
+
+NAN = float("nan")
+
+
+def _is_zero(value):
+    return -0.00000001 < value < 0.00000001
+
+
+class _SMA:
+    """简单移动平均，与talib.SMA的累加顺序相同"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+
+    def push(self, value):
+        self.window.append(value)
+        self.total += value
+        if len(self.window) < self.period:
+            return NAN
+        result = self.total / self.period
+        self.total -= self.window.popleft()
+        return result
+
+
+class _EMA:
+    """指数移动平均，以前period个值的简单平均作为初始值，与talib.EMA相同"""
+
+    def __init__(self, period, skip=0):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.skip = skip    # 忽略最开始的skip个值，用于MACD中快线与慢线的对齐
+        self.count = 0
+        self.total = 0.0
+        self.prev = NAN
+
+    def push(self, value):
+        if self.skip:
+            self.skip -= 1
+            return NAN
+        self.count += 1
+        if self.count < self.period:
+            self.total += value
+            return NAN
+        if self.count == self.period:
+            self.total += value
+            self.prev = self.total / self.period
+        else:
+            self.prev = ((value - self.prev) * self.k) + self.prev
+        return self.prev
+
+
+class _Extreme:
+    """滚动窗口的最大值或最小值，使用单调队列，每次更新均摊O(1)"""
+
+    def __init__(self, period, highest):
+        self.period = period
+        self.highest = highest
+        self.queue = deque()    # (序号, 值)
+        self.count = 0
+
+    def push(self, value):
+        queue = self.queue
+        if self.highest:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+        queue.append((self.count, value))
+        if queue[0][0] <= self.count - self.period:
+            queue.popleft()
+        self.count += 1
+        if self.count < self.period:
+            return NAN
+        return queue[0][1]
+
+
+class _Incremental(abc.ABC):
+
+    value = NAN
+
+    @abc.abstractmethod
+    def update(self, bar):
+        """合并一根k线，返回最新的指标值"""
+
+    def warmup(self, kline):
+        """
+        用历史k线预热指标
+        :param kline: 按时间升序排列的k线列表或OHLCV
+        :return: 返回最新的指标值
+        """
+        for bar in kline:
+            self.update(bar)
+        return self.value
+
+
+class MA(_Incremental):
+
+    def __init__(self, length):
+        """
+        移动平均线(简单移动平均)
+        :param length: 长度参数，如20获取的是20周期的移动平均
+        """
+        self.__sma = _SMA(length)
+
+    def update(self, bar):
+        """
+        :param bar: 一根k线，[时间戳, 开, 高, 低, 收, 成交量]
+        :return: 返回最新的均线值
+        """
+        self.value = self.__sma.push(float(bar[4]))
+        return self.value
+
+
+class EMA(_Incremental):
+
+    def __init__(self, length):
+        """
+        指数移动平均线
+        :param length: 长度参数
+        """
+        self.__ema = _EMA(length)
+
+    def update(self, bar):
+        self.value = self.__ema.push(float(bar[4]))
+        return self.value
+
+
+class HIGHEST(_Incremental):
+
+    def __init__(self, length):
+        """
+        周期最高价
+        :param length: 长度参数
+        """
+        self.__extreme = _Extreme(length, highest=True)
+
+    def update(self, bar):
+        self.value = self.__extreme.push(float(bar[2]))
+        return self.value
+
+
+class LOWEST(_Incremental):
+
+    def __init__(self, length):
+        """
+        周期最低价
+        :param length: 长度参数
+        """
+        self.__extreme = _Extreme(length, highest=False)
+
+    def update(self, bar):
+        self.value = self.__extreme.push(float(bar[3]))
+        return self.value
+
+
+class ATR(_Incremental):
+
+    def __init__(self, length):
+        """
+        平均真实波幅，前length个真实波幅的简单平均作为初始值，之后使用Wilder平滑
+        :param length: 长度参数，如14获取的是14周期上的ATR值
+        """
+        self.__length = length
+        self.__prev_close = None
+        self.__count = 0
+        self.__total = 0.0
+
+    def update(self, bar):
+        high = float(bar[2])
+        low = float(bar[3])
+        close = float(bar[4])
+        prev_close = self.__prev_close
+        self.__prev_close = close
+        if prev_close is None:  # 第一根k线没有真实波幅
+            return self.value
+        greatest = high - low
+        value = abs(prev_close - high)
+        if value > greatest:
+            greatest = value
+        value = abs(low - prev_close)
+        if value > greatest:
+            greatest = value
+        self.__count += 1
+        if self.__length == 1:
+            self.value = greatest
+        elif self.__count < self.__length:
+            self.__total += greatest
+        elif self.__count == self.__length:
+            self.__total += greatest
+            self.value = self.__total / self.__length
+        else:
+            prev = self.value
+            prev *= self.__length - 1
+            prev += greatest
+            prev /= self.__length
+            self.value = prev
+        return self.value
+
+
+class BOLL(_Incremental):
+
+    def __init__(self, length, nbdev=2):
+        """
+        布林指标
+        :param length: 长度参数
+        :param nbdev: 标准差倍数，默认为2
+        """
+        self.__length = length
+        self.__nbdev = nbdev
+        self.__sma = _SMA(length)
+        self.__window = deque()
+        self.__total2 = 0.0
+        self.value = {"upperband": NAN, "middleband": NAN, "lowerband": NAN}
+
+    def update(self, bar):
+        """
+        :return: 返回一个字典 {"upperband": 上轨， "middleband": 中轨， "lowerband": 下轨}
+        """
+        close = float(bar[4])
+        middle = self.__sma.push(close)
+        self.__window.append(close)
+        self.__total2 += close * close
+        if len(self.__window) < self.__length:
+            return self.value
+        mean2 = self.__total2 / self.__length
+        oldest = self.__window.popleft()
+        self.__total2 -= oldest * oldest
+        mean2 -= middle * middle
+        stddev = math.sqrt(mean2) if mean2 >= 0.00000001 else 0.0
+        if self.__nbdev == 1.0:
+            band = stddev
+        else:
+            band = stddev * self.__nbdev
+        self.value = {"upperband": middle + band, "middleband": middle, "lowerband": middle - band}
+        return self.value
+
+
+class MACD(_Incremental):
+
+    def __init__(self, fastperiod, slowperiod, signalperiod):
+        """
+        MACD，返回值与INDICATORS.MACD相同，MACD柱为(DIF - DEA) * 2
+        :param fastperiod: 参数1
+        :param slowperiod: 参数2
+        :param signalperiod: 参数3
+        """
+        if slowperiod < fastperiod:
+            fastperiod, slowperiod = slowperiod, fastperiod
+        self.__slow = _EMA(slowperiod)
+        self.__fast = _EMA(fastperiod, skip=slowperiod - fastperiod)   # 快线与慢线在同一根k线上开始输出
+        self.__signal = _EMA(signalperiod)
+        self.value = {'DIF': NAN, 'DEA': NAN, 'MACD': NAN}
+
+    def update(self, bar):
+        """
+        :return: 返回一个字典 {'DIF': DIF, 'DEA': DEA, 'MACD': MACD}
+        """
+        close = float(bar[4])
+        slow = self.__slow.push(close)
+        fast = self.__fast.push(close)
+        if slow != slow:    # 慢线尚未开始输出
+            return self.value
+        dif = fast - slow
+        dea = self.__signal.push(dif)
+        if dea == dea:
+            self.value = {'DIF': dif, 'DEA': dea, 'MACD': (dif - dea) * 2}
+        return self.value
+
+
+class RSI(_Incremental):
+
+    def __init__(self, length):
+        """
+        RSI，使用Wilder平滑
+        :param length: 长度参数
+        """
+        self.__length = length
+        self.__prev_close = None
+        self.__count = 0
+        self.__gain = 0.0
+        self.__loss = 0.0
+
+    def __output(self):
+        total = self.__gain + self.__loss
+        return 100.0 * (self.__gain / total) if not _is_zero(total) else 0.0
+
+    def update(self, bar):
+        close = float(bar[4])
+        prev_close = self.__prev_close
+        self.__prev_close = close
+        if prev_close is None:
+            return self.value
+        change = close - prev_close
+        self.__count += 1
+        if self.__count <= self.__length:   # 前length个涨跌幅直接累加
+            if change < 0:
+                self.__loss -= change
+            else:
+                self.__gain += change
+            if self.__count == self.__length:
+                self.__loss /= self.__length
+                self.__gain /= self.__length
+                self.value = self.__output()
+            return self.value
+        self.__loss *= (self.__length - 1)
+        self.__gain *= (self.__length - 1)
+        if change < 0:
+            self.__loss -= change
+        else:
+            self.__gain += change
+        self.__loss /= self.__length
+        self.__gain /= self.__length
+        self.value = self.__output()
+        return self.value
+
+
+class KDJ(_Incremental):
+
+    def __init__(self, fastk_period, slowk_period, slowd_period):
+        """
+        计算k值和d值，与INDICATORS.KDJ相同
+        :param fastk_period: 参数1
+        :param slowk_period: 参数2
+        :param slowd_period: 参数3
+        """
+        self.__highest = _Extreme(fastk_period, highest=True)
+        self.__lowest = _Extreme(fastk_period, highest=False)
+        self.__slowk = _SMA(slowk_period)
+        self.__slowd = _SMA(slowd_period)
+        self.value = {'k': NAN, 'd': NAN}
+
+    def update(self, bar):
+        """
+        :return: 返回一个字典，{'k': k值， 'd': d值}
+        """
+        highest = self.__highest.push(float(bar[2]))
+        lowest = self.__lowest.push(float(bar[3]))
+        if highest != highest:
+            return self.value
+        diff = (highest - lowest) / 100.0
+        fastk = (float(bar[4]) - lowest) / diff if diff != 0.0 else 0.0
+        slowk = self.__slowk.push(fastk)
+        if slowk != slowk:
+            return self.value
+        slowd = self.__slowd.push(slowk)
+        if slowd == slowd:
+            self.value = {'k': slowk, 'd': slowd}
+        return self.value
@@ -2,6 +2,8 @@ import numpy as np
 import talib
 from purequant.time import *
 from purequant.config import config
+from purequant.ohlcv import OHLCV, from_kline
+from purequant.klinecache import kline_cache
 
 
 class INDICATORS:
@@ -11,6 +13,31 @@ class INDICATORS:
         self.__instrument_id = instrument_id
         self.__time_frame = time_frame
         self.__last_time_stamp = 0
+        self.__converted = None  # (k线数量与最后一根k线的时间戳, k线列表, OHLCV)
+
+    def __records(self, kline):
+        """
+        将k线数据转换为按时间升序排列的OHLCV，每份k线数据只转换一次
+        回测时使用传入的k线数据，同一份k线列表在多个指标之间重复传入时复用上一次的转换结果；
+        实盘时使用k线缓存中的OHLCV
+        """
+        if not kline:
+            return kline_cache.get_ohlcv(self.__platform, self.__instrument_id, self.__time_frame)
+        if isinstance(kline, OHLCV):
+            return kline
+        key = (len(kline), kline[-1][0])
+        if self.__converted is None or self.__converted[0] != key or self.__converted[1] is not kline:
+            self.__converted = (key, kline, from_kline(kline))
+        return self.__converted[2]
+
+    def __column(self, records, index):
+        """
+        取出k线数据中的一列
+        :param records: OHLCV
+        :param index: 列序号，如4为收盘价
+        :return: 返回一个float64的一维数组，直接引用OHLCV中的数组，不复制数据
+        """
+        return np.ascontiguousarray(records.column(index), dtype=np.float64)
 
     def ATR(self, length, kline=None):
         """
@@ -19,21 +46,10 @@ class INDICATORS:
         :param kline:回测时传入指定k线数据
         :return:返回一个一维数组
         """
-        if kline:    # 如果是回测模式传入了指定的k线数据
-            records = kline
-        else:   # 实盘模式下从交易所获取k线数据
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()   # 将k线数据倒序排列
-        kline_length = len(records)     # 计算k线数据的长度
-        high_array = np.zeros(kline_length)     # 创建为零的数组
-        low_array = np.zeros(kline_length)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            high_array[t] = item[2]
-            low_array[t] = item[3]
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        high_array = self.__column(records, 2)
+        low_array = self.__column(records, 3)
+        close_array = self.__column(records, 4)
         result = talib.ATR(high_array, low_array, close_array, timeperiod=length)
         return result
 
@@ -45,17 +61,8 @@ class INDICATORS:
         :param kline:回测时传入指定k线数据
         :return: 返回一个字典 {"upperband": 上轨数组， "middleband": 中轨数组， "lowerband": 下轨数组}
         """
-        if kline:    # 如果是回测模式传入了指定的k线数据
-            records = kline
-        else:  # 实盘模式下从交易所获取k线数据
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         result = (talib.BBANDS(close_array, timeperiod=length, nbdevup=2, nbdevdn=2, matype=0))
         upperband = result[0]
         middleband = result[1]
@@ -78,7 +85,7 @@ class INDICATORS:
             else:
                 return False
         else:
-            records = self.__platform.get_kline(self.__time_frame)
+            records = kline_cache.get(self.__platform, self.__instrument_id, self.__time_frame)
             if type(records[0][0]) == str:
                 current_timestamp = utctime_str_to_ts(records[0][0])
             else:
@@ -101,7 +108,7 @@ class INDICATORS:
         if kline:
             records = kline
         else:
-            records = self.__platform.get_kline(self.__time_frame)
+            records = kline_cache.get(self.__platform, self.__instrument_id, self.__time_frame)
         kline_length = len(records)
         return kline_length
 
@@ -112,17 +119,8 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return:返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        high_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            high_array[t] = item[2]
-            t += 1
+        records = self.__records(kline)
+        high_array = self.__column(records, 2)
         result = (talib.MAX(high_array, length))
         return result
 
@@ -134,17 +132,8 @@ class INDICATORS:
         :param kline:回测时传入指定k线数据
         :return:返回一个一维数组
         """
-        if kline:    # 如果是回测模式传入了指定的k线数据
-            records = kline
-        else:   # 实盘模式下从交易所获取k线数据
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         if len(args) < 1:  # 如果无别的参数
             result = talib.SMA(close_array, length)
         else:   # 如果传入多个参数
@@ -162,17 +151,8 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return: 返回一个字典 {'DIF': DIF数组, 'DEA': DEA数组, 'MACD': MACD数组}
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         result = (talib.MACD(close_array, fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod))
         DIF = result[0]
         DEA = result[1]
@@ -188,17 +168,8 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return: 返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         if len(args) < 1:  # 如果无别的参数
             result = talib.EMA(close_array, length)
         else:
@@ -215,17 +186,8 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return: 返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         if len(args) < 1:  # 如果无别的参数
             result = talib.KAMA(close_array, length)
         else:
@@ -243,21 +205,10 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return: 返回一个字典，{'k': k值数组， 'd': d值数组}
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        high_array = np.zeros(kline_length)
-        low_array = np.zeros(kline_length)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            high_array[t1] = item[2]
-            low_array[t2] = item[3]
-            close_array[t3] = item[4]
-            t += 1
+        records = self.__records(kline)
+        high_array = self.__column(records, 2)
+        low_array = self.__column(records, 3)
+        close_array = self.__column(records, 4)
         result = (talib.STOCH(high_array, low_array, close_array, fastk_period=fastk_period,
                                                                 slowk_period=slowk_period,
                                                                 slowk_matype=0,
@@ -275,17 +226,8 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return: 返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        low_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            low_array[t] = item[3]
-            t += 1
+        records = self.__records(kline)
+        low_array = self.__column(records, 3)
         result = (talib.MIN(low_array, length))
         return result
 
@@ -295,18 +237,10 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return: 返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
-        result = (talib.OBV(close_array, self.VOLUME()))
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
+        volume_array = self.__column(records, 5)
+        result = (talib.OBV(close_array, volume_array))
         return result
 
     def RSI(self, length, kline=None):
@@ -316,17 +250,8 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return:返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         result = (talib.RSI(close_array, timeperiod=length))
         return result
 
@@ -337,17 +262,8 @@ class INDICATORS:
         :param kline:回测时传入指定k线数据
         :return:返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         result = (talib.ROC(close_array, timeperiod=length))
         return result
 
@@ -360,17 +276,8 @@ class INDICATORS:
         :param kline:回测时传入指定k线数据
         :return: 返回一个字典  {'STOCHRSI': STOCHRSI数组, 'fastk': fastk数组}
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         result = (talib.STOCHRSI(close_array, timeperiod=timeperiod, fastk_period=fastk_period, fastd_period=fastd_period, fastd_matype=0))
         STOCHRSI = result[1]
         fastk = talib.MA(STOCHRSI, 3)
@@ -383,19 +290,9 @@ class INDICATORS:
         :param kline:回测时传入指定k线数据
         :return:返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        high_array = np.zeros(kline_length)
-        low_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            high_array[t1] = item[2]
-            low_array[t2] = item[3]
-            t += 1
+        records = self.__records(kline)
+        high_array = self.__column(records, 2)
+        low_array = self.__column(records, 3)
         result = (talib.SAR(high_array, low_array, acceleration=0.02, maximum=0.2))
         return result
 
@@ -408,17 +305,8 @@ class INDICATORS:
         :return:返回一个一维数组
         """
         nbdev= 1 or nbdev
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         result = (talib.STDDEV(close_array, timeperiod=length, nbdev=nbdev))
         return result
 
@@ -430,17 +318,8 @@ class INDICATORS:
         :param kline:回测时传入指定k线数据
         :return:返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        kline_length = len(records)
-        close_array = np.zeros(kline_length)
-        t = 0
-        for item in records:
-            close_array[t] = item[4]
-            t += 1
+        records = self.__records(kline)
+        close_array = self.__column(records, 4)
         result = (talib.TRIX(close_array, timeperiod=length))
         return result
 
@@ -450,15 +329,6 @@ class INDICATORS:
         :param kline: 回测时传入指定k线数据
         :return: 返回一个一维数组
         """
-        if kline:
-            records = kline
-        else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-        length = len(records)
-        t = 0
-        volume_array = np.zeros(length)
-        for item in records:
-            volume_array[t] = item[5]
-            t += 1
+        records = self.__records(kline)
+        volume_array = self.__column(records, 5)
         return volume_array
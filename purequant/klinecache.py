@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+
+"""
+k线数据缓存
+
+同一个交易所实例、同一个交易对、同一个k线周期的k线数据在有效期内只向交易所请求一次，指标模块、行情模块与
+数据存储模块均从此缓存中读取。缓存在超过有效期或进入新的k线周期时失效。每份k线数据只转换一次为OHLCV。
+"""
+
+import threading
+import time
+from purequant.config import config
+from purequant.ohlcv import from_kline
+from purequant.time import time_frame_to_seconds
+
+
+class __KlineCache:
+    """k线数据缓存"""
+
+    def __init__(self):
+        self.__entries = {}
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, platform, instrument_id, time_frame):
+        """
+        获取k线数据，缓存有效时直接返回缓存的数据，否则调用platform.get_kline(time_frame)
+        :param platform: 交易所
+        :param instrument_id: 交易对或合约ID
+        :param time_frame: k线周期，如'1m'，'1d'
+        :return: 与platform.get_kline返回的顺序相同的k线列表，每次返回一个新的列表，调用方可以自行倒序
+        """
+        return list(self.__entry(platform, instrument_id, time_frame)[0])
+
+    def get_ohlcv(self, platform, instrument_id, time_frame):
+        """
+        获取按时间升序排列的OHLCV，同一份k线数据只转换一次，所有调用方共享同一个只读的OHLCV
+        :param platform: 交易所
+        :param instrument_id: 交易对或合约ID
+        :param time_frame: k线周期，如'1m'，'1d'
+        :return: 返回OHLCV
+        """
+        entry = self.__entry(platform, instrument_id, time_frame)
+        if entry[3] is None:
+            entry[3] = from_kline(entry[0][::-1]).freeze()
+        return entry[3]
+
+    def __entry(self, platform, instrument_id, time_frame):
+        """返回有效的缓存条目[k线列表, 获取时间, k线序号, OHLCV]，失效时重新获取"""
+        key = (platform, instrument_id, time_frame)
+        now = time.time()
+        period = time_frame_to_seconds(time_frame)
+        bar = int(now // period) if period else None   # 当前所处的k线序号
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and now - entry[1] < config.kline_cache_ttl and entry[2] == bar:
+                self.__hits += 1
+                return entry
+            self.__misses += 1
+        entry = [list(platform.get_kline(time_frame)), now, bar, None]
+        with self.__lock:
+            self.__entries[key] = entry
+        return entry
+
+    def invalidate(self, platform=None):
+        """
+        清除缓存
+        :param platform: 只清除某个交易所实例的缓存，不传则清除全部缓存
+        :return:
+        """
+        with self.__lock:
+            if platform is None:
+                self.__entries.clear()
+            else:
+                for key in [key for key in self.__entries if key[0] is platform]:
+                    del self.__entries[key]
+
+    def metrics(self):
+        """
+        缓存命中情况
+        :return: 返回一个字典
+        """
+        with self.__lock:
+            total = self.__hits + self.__misses
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "hit_rate": self.__hits / total if total else 0.0,
+                "entries": len(self.__entries)
+            }
+
+
+kline_cache = __KlineCache()
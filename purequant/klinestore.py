@@ -0,0 +1,115 @@
+# -*- coding:utf-8 -*-
+
+"""
+本地列式k线存储
+
+每个交易对、每个k线周期保存在一个单独的文件夹中，时间戳为int64毫秒时间戳，开、高、低、收、成交量、成交额
+均为float64，每一列是一个定长的二进制文件。读取时使用内存映射，按时间戳二分查找切片，返回的数组直接引用
+映射的内存而不复制数据，可直接传入指标模块与行情模块，用于回测百万根以上的k线。
+"""
+
+import os
+import numpy as np
+from purequant.ohlcv import OHLCV, FIELDS, to_timestamp_ms, from_kline
+
+
+class KlineStore:
+
+    def __init__(self, instrument_id, time_frame, path="./klines"):
+        """
+        本地列式k线存储
+        :param instrument_id: 交易对或合约ID
+        :param time_frame: k线周期，如'1m'，'1d'
+        :param path: 存储的根目录，默认为当前目录下的klines文件夹
+        """
+        self.__directory = os.path.join(path, instrument_id, time_frame)
+        if not os.path.exists(self.__directory):
+            os.makedirs(self.__directory)
+        self.__files = {field: os.path.join(self.__directory, field + ".bin") for field in FIELDS}
+        self.__length = self.__recover()
+        self.__maps = None
+
+    def __recover(self):
+        """以最短的列为准，截去写入中途中断时多出的数据"""
+        lengths = []
+        for field, file in self.__files.items():
+            if not os.path.exists(file):
+                open(file, "wb").close()
+            lengths.append(os.path.getsize(file) // 8)
+        length = min(lengths)
+        for file in self.__files.values():
+            if os.path.getsize(file) != length * 8:
+                with open(file, "r+b") as f:
+                    f.truncate(length * 8)
+        return length
+
+    def __map(self):
+        """打开或重新打开内存映射"""
+        if self.__maps is None:
+            self.__maps = {}
+            for field, file in self.__files.items():
+                dtype = np.int64 if field == "timestamp" else np.float64
+                if self.__length:
+                    self.__maps[field] = np.memmap(file, dtype=dtype, mode="r", shape=(self.__length,))
+                else:
+                    self.__maps[field] = np.zeros(0, dtype=dtype)
+        return self.__maps
+
+    def __len__(self):
+        return self.__length
+
+    def last_timestamp(self):
+        """最后一根k线的毫秒时间戳，无数据时返回None"""
+        if not self.__length:
+            return None
+        return int(self.__map()["timestamp"][-1])
+
+    def append(self, kline):
+        """
+        追加k线数据，自动按时间升序排列，早于或等于已存储的最后一根k线的数据会被忽略
+        :param kline: k线列表（如交易所返回的k线数据）或OHLCV
+        :return: 实际追加的k线数量
+        """
+        columns = from_kline(kline).columns()
+        timestamp = columns[0]
+        order = np.argsort(timestamp, kind="stable")
+        timestamp = timestamp[order]
+        keep = np.ones(len(timestamp), dtype=bool)
+        keep[1:] = timestamp[1:] != timestamp[:-1]  # 去除重复的时间戳
+        last = self.last_timestamp()
+        if last is not None:
+            keep &= timestamp > last
+        if not keep.any():
+            return 0
+        data = {"timestamp": timestamp[keep]}
+        for index, field in enumerate(FIELDS[1:], start=1):
+            if index < len(columns):
+                data[field] = columns[index][order][keep]
+            else:   # 数据中不包含成交额时以nan填充
+                data[field] = np.full(len(data["timestamp"]), np.nan)
+        # 时间戳一列最后写入，中途中断时以最短的列为准恢复
+        for field in FIELDS[1:] + FIELDS[:1]:
+            with open(self.__files[field], "ab") as f:
+                data[field].tofile(f)
+        self.__length += len(data["timestamp"])
+        self.__maps = None
+        return len(data["timestamp"])
+
+    def range(self, start=None, end=None):
+        """
+        按时间戳读取k线数据，包含start，不包含end
+        :param start: 开始时间，毫秒时间戳或UTC时间字符串，不传则从第一根k线开始
+        :param end: 结束时间，毫秒时间戳或UTC时间字符串，不传则到最后一根k线为止
+        :return: 返回OHLCV，其中的数组均直接引用内存映射，不复制数据
+        """
+        maps = self.__map()
+        timestamp = maps["timestamp"]
+        left = 0 if start is None else int(np.searchsorted(timestamp, to_timestamp_ms([start])[0], side="left"))
+        right = len(timestamp) if end is None else int(np.searchsorted(timestamp, to_timestamp_ms([end])[0], side="left"))
+        return OHLCV(*[maps[field][left:right] for field in FIELDS])
+
+    def tail(self, count):
+        """读取最近的count根k线"""
+        maps = self.__map()
+        start = max(self.__length - count, 0)
+        return OHLCV(*[maps[field][start:] for field in FIELDS])
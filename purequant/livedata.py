@@ -0,0 +1,233 @@
+# -*- coding:utf-8 -*-
+
+"""
+websocket实时行情缓存
+
+OKEX的ticker、depth5、candle频道，火币的market.*.kline、depth、detail频道，以及BITMEX的instrument表与orderBookL2
+推送的行情保存在内存中，MARKET的last、asks、bids以及当根k线的open、high、low、close优先从此缓存读取，只有一次
+字典查找，不再每次都请求REST接口。某个行情超过config.live_data_max_age秒没有收到推送时视为过期，MARKET自动回退到
+REST接口。
+
+使用方法：
+    live_data.start_okex(["BTC-USD-201225"], ["1m"])
+    live_data.start_huobi("wss://api.hbdm.com/ws", {"BTC_CQ": "BTC-USD-201225"}, ["1m"])
+    live_data.start_bitmex("XBTUSD")
+启动之后，同一个交易所、同一个合约ID的MARKET会自动使用推送的行情。也可以把on_okex、on_huobi作为回调函数传给
+自己启动的websocket订阅。
+"""
+
+import re
+import time
+from purequant.config import config
+from purequant.time import time_frame_to_seconds
+
+OKEX_CANDLE = re.compile(r"/candle(\d+)s$")
+
+
+def okex_kind(instrument_id):
+    """根据OKEX的合约ID判断频道前缀：永续合约为swap，交割合约为futures，币币为spot"""
+    parts = instrument_id.split("-")
+    if parts[-1] == "SWAP":
+        return "swap"
+    if len(parts) == 3:
+        return "futures"
+    return "spot"
+
+
+def levels(value, count=None):
+    """返回档位价格列表，value为价格列表，或返回价格列表的函数"""
+    prices = value() if callable(value) else value
+    return list(prices[:count] if count is not None else prices)
+
+
+class __LiveData:
+    """websocket推送的实时行情"""
+
+    def __init__(self):
+        self.__tickers = {}     # (交易所, 合约ID) -> [最新成交价, 接收时间]
+        self.__depths = {}      # (交易所, 合约ID) -> [卖盘价格, 买盘价格, 接收时间]
+        self.__candles = {}     # (交易所, 合约ID, k线周期秒数) -> [k线, 接收时间]，k线为[时间戳, 开, 高, 低, 收, 成交量]
+        self.__aliases = {}     # (交易所, 推送中的合约名称) -> 合约ID，如("huobi", "BTC_CQ") -> "BTC-USD-201225"
+        self.__hits = 0
+        self.__misses = 0
+
+    def __fresh(self, entry, max_age):
+        """行情存在且未过期时返回True，并记录命中情况"""
+        max_age = config.live_data_max_age if max_age is None else max_age
+        if entry is not None and time.monotonic() - entry[-1] <= max_age:
+            self.__hits += 1
+            return True
+        self.__misses += 1
+        return False
+
+    def last(self, exchange, instrument_id, max_age=None):
+        """
+        最新成交价
+        :param exchange: 交易所名称，如"okex"
+        :param instrument_id: 合约ID
+        :param max_age: 最长有效秒数，默认为config.live_data_max_age
+        :return: 浮点数，没有推送或已过期时返回None
+        """
+        entry = self.__tickers.get((exchange, instrument_id))
+        return entry[0] if self.__fresh(entry, max_age) else None
+
+    def asks(self, exchange, instrument_id, count=None, max_age=None):
+        """卖盘价格列表，价格从低到高，没有推送或已过期时返回None"""
+        entry = self.__depths.get((exchange, instrument_id))
+        return levels(entry[0], count) if self.__fresh(entry, max_age) else None
+
+    def bids(self, exchange, instrument_id, count=None, max_age=None):
+        """买盘价格列表，价格从高到低，没有推送或已过期时返回None"""
+        entry = self.__depths.get((exchange, instrument_id))
+        return levels(entry[1], count) if self.__fresh(entry, max_age) else None
+
+    def candle(self, exchange, instrument_id, time_frame, max_age=None):
+        """
+        当根k线
+        :param time_frame: k线周期，如"1m"
+        :return: [时间戳, 开, 高, 低, 收, 成交量]，价格均为浮点数，没有推送或已过期时返回None
+        """
+        entry = self.__candles.get((exchange, instrument_id, time_frame_to_seconds(time_frame)))
+        return entry[0] if self.__fresh(entry, max_age) else None
+
+    def update_ticker(self, exchange, instrument_id, last):
+        self.__tickers[(exchange, self.__resolve(exchange, instrument_id))] = [float(last), time.monotonic()]
+
+    def update_depth(self, exchange, instrument_id, asks, bids):
+        """
+        :param asks: 卖盘价格列表，或调用时返回卖盘价格列表的函数（适用于本地维护的完整订单簿，读取时才生成列表）
+        :param bids: 买盘价格列表，或返回买盘价格列表的函数
+        """
+        self.__depths[(exchange, self.__resolve(exchange, instrument_id))] = [asks, bids, time.monotonic()]
+
+    def update_candle(self, exchange, instrument_id, seconds, candle):
+        self.__candles[(exchange, self.__resolve(exchange, instrument_id), seconds)] = [candle, time.monotonic()]
+
+    def alias(self, exchange, name, instrument_id):
+        """推送中的合约名称与MARKET使用的合约ID不同时，登记二者的对应关系"""
+        self.__aliases[(exchange, name)] = instrument_id
+
+    def __resolve(self, exchange, name):
+        return self.__aliases.get((exchange, name), name)
+
+    def on_okex(self, result):
+        """OKEX公共频道的回调函数，传给okex websocket的subscribe_without_login(on_message=...)"""
+        table = result.get('table', '')
+        for data in result.get('data', []):
+            instrument_id = data.get('instrument_id')
+            if table.endswith("/ticker"):
+                self.update_ticker("okex", instrument_id, data['last'])
+            elif table.endswith("/depth5"):
+                self.update_depth("okex", instrument_id, [float(level[0]) for level in data['asks']],
+                                  [float(level[0]) for level in data['bids']])
+            else:
+                match = OKEX_CANDLE.search(table)
+                if match:
+                    candle = data['candle']
+                    self.update_candle("okex", instrument_id, int(match.group(1)),
+                                       [candle[0]] + [float(value) for value in candle[1:6]])
+
+    def on_okex_book(self, instrument_id, book):
+        """OKEX 400档深度频道的回调函数，传给subscribe_without_login(on_book=...)，读取时才从订单簿生成价格列表"""
+        self.update_depth("okex", instrument_id, lambda: [float(level[0]) for level in book.asks()],
+                          lambda: [float(level[0]) for level in book.bids()])
+
+    def on_huobi(self, data):
+        """火币行情推送的回调函数"""
+        channel = data.get('ch')
+        tick = data.get('tick')
+        if not channel or not tick:
+            return
+        parts = channel.split(".")     # 如market.BTC_CQ.kline.1min
+        if len(parts) < 3:
+            return
+        name, topic = parts[1], parts[2]
+        if topic == "kline" and len(parts) == 4:
+            self.update_candle("huobi", name, time_frame_to_seconds(parts[3]),
+                               [tick['id'], float(tick['open']), float(tick['high']), float(tick['low']),
+                                float(tick['close']), float(tick['vol'])])
+        elif topic == "depth":
+            self.update_depth("huobi", name, [float(level[0]) for level in tick.get('asks') or []],
+                              [float(level[0]) for level in tick.get('bids') or []])
+        elif topic == "detail" and len(parts) == 3:
+            self.update_ticker("huobi", name, tick['close'])
+        elif topic == "trade" and tick.get('data'):
+            self.update_ticker("huobi", name, tick['data'][-1]['price'])
+
+    def on_bitmex(self, table, ws):
+        """BITMEX的instrument表与orderBookL2的回调函数，传给BitMEXWebsocket(on_update=...)"""
+        if table == "instrument":
+            instrument = ws.data['instrument'][0]
+            if instrument.get('lastPrice') is not None:
+                self.update_ticker("bitmex", ws.symbol, instrument['lastPrice'])
+        elif table == "orderBookL2":
+            book = ws.order_book()
+            self.update_depth("bitmex", ws.symbol, book.ask_prices, book.bid_prices)
+
+    def start_okex(self, instrument_ids, time_frames=("1m",), url=None):
+        """
+        在共用的websocket连接上订阅OKEX的ticker、depth5与candle频道，断线自动重连
+        :param instrument_ids: 合约ID列表，如["BTC-USD-201225", "BTC-USD-SWAP", "BTC-USDT"]
+        :param time_frames: k线周期列表，如["1m", "1h"]
+        :param url: 默认为"wss://real.okex.com:8443/ws/v3"
+        :return: 返回OkexConnection
+        """
+        from purequant.wsmanager import ws_manager
+        channels = []
+        for instrument_id in instrument_ids:
+            kind = okex_kind(instrument_id)
+            channels.append("{}/ticker:{}".format(kind, instrument_id))
+            channels.append("{}/depth5:{}".format(kind, instrument_id))
+            for time_frame in time_frames:
+                channels.append("{}/candle{}s:{}".format(kind, time_frame_to_seconds(time_frame), instrument_id))
+        connection = ws_manager.okex(url)
+        for channel in channels:
+            connection.subscribe(channel, self.on_okex)
+        return connection
+
+    def start_huobi(self, url, symbols, time_frames=("1m",)):
+        """
+        在共用的websocket连接上订阅火币的kline、depth与detail频道，断线按指数退避重连并重新订阅
+        :param url: 交割合约为"wss://api.hbdm.com/ws"，永续合约为"wss://api.hbdm.com/swap-ws"，现货为"wss://api.huobi.pro/ws"
+        :param symbols: 字典，推送中的合约名称 -> MARKET使用的合约ID，如{"BTC_CQ": "BTC-USD-201225"}，二者相同时可传列表
+        :param time_frames: k线周期列表，如["1m", "1h"]
+        :return: 返回HuobiConnection
+        """
+        from purequant.wsmanager import ws_manager
+        if not isinstance(symbols, dict):
+            symbols = {symbol: symbol for symbol in symbols}
+        periods = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "1h": "60min", "4h": "4hour",
+                   "1d": "1day"}
+        connection = ws_manager.huobi(url)
+        for name, instrument_id in symbols.items():
+            self.alias("huobi", name, instrument_id)
+            topics = ["depth.step0", "detail"] + ["kline." + periods[time_frame.lower()] for time_frame in time_frames]
+            for topic in topics:
+                connection.subscribe("market.{}.{}".format(name, topic), self.on_huobi)
+        return connection
+
+    def start_bitmex(self, symbol, instrument_id=None, testing=False):
+        """
+        订阅BITMEX的行情
+        :param symbol: 合约id，例如："XBTUSD"
+        :param instrument_id: MARKET使用的合约ID，默认与symbol相同
+        :param testing: 是否是测试账户
+        :return: 返回BitMEXWebsocket
+        """
+        from purequant.exchange.bitmex.bitmex_websocket import BitMEXWebsocket
+        if instrument_id is not None:
+            self.alias("bitmex", symbol, instrument_id)
+        endpoint = "https://testnet.bitmex.com/api/v1" if testing else "https://www.bitmex.com/api/v1"
+        return BitMEXWebsocket(endpoint, symbol, on_update=self.on_bitmex)
+
+    def metrics(self):
+        """
+        缓存命中情况
+        :return: 返回一个字典，hits为使用推送行情的次数，misses为没有推送或已过期而回退到REST的次数
+        """
+        total = self.__hits + self.__misses
+        return {"hits": self.__hits, "misses": self.__misses, "hit_rate": self.__hits / total if total else 0.0,
+                "tickers": len(self.__tickers), "depths": len(self.__depths), "candles": len(self.__candles)}
+
+
+live_data = __LiveData()
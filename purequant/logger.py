@@ -3,12 +3,20 @@
 """
 日志输出
 
+日志处理器只在config.loads之后第一次输出日志时创建一次。调用logger.info等方法时日志记录放入队列后立即返回，
+由后台线程写入文件或控制台。配置文件LOG中的format设为"json"时每条日志输出为一行json，关键字参数作为附加字段：
+    logger.info("下单成功", order_id="6015264587212800", price=9000)
+
 Author: Gary-Hertel
 Date:   2020/07/09
 email: interstella.ranger2020@gmail.com
 """
 
+import atexit
+import json
 import logging
+import queue
+import threading
 from logging import handlers
 from purequant.config import config
 from concurrent_log_handler import ConcurrentRotatingFileHandler
@@ -24,6 +32,20 @@ log_colors_config = {
     'CRITICAL': 'bold_red',
 }
 
+LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR,
+          "critical": logging.CRITICAL}
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行json，便于日志收集系统解析"""
+
+    def format(self, record):
+        data = {"time": self.formatTime(record, "%Y-%m-%d %H:%M:%S"), "level": record.levelname,
+                "thread": record.threadName, "message": record.getMessage()}
+        data.update(getattr(record, "fields", None) or {})
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
 class __LOGGER:
 
     def __init__(self):
@@ -31,71 +53,97 @@ class __LOGGER:
             os.makedirs("./logs")
         self.__path = './logs/error.log'
         self.__logger = logging.getLogger("purequant")
-
-    def __initialize(self):
-        if config.level == "debug":
-            level = logging.DEBUG
-        elif config.level == "info":
-            level = logging.INFO
-        elif config.level == "warning":
-            level = logging.WARNING
-        elif config.level == "error":
-            level = logging.ERROR
-        elif config.level == "critical":
-            level = logging.CRITICAL
+        self.__logger.propagate = False
+        self.__listener = None
+        self.__initialized = False
+        self.__lock = threading.Lock()
+
+    def __handler(self):
+        """按配置文件创建实际写入日志的handler，只在初始化时调用一次"""
+        if config.log_format == "json":
+            formatter = JsonFormatter()
         else:
-            level = logging.DEBUG
-        self.__logger.setLevel(level=level)
-        formatter = logging.Formatter(fmt='[%(asctime)s] -> [%(levelname)s] : %(message)s')
-        # 文件输出按照时间分割
-        time_rotating_file_handler = handlers.TimedRotatingFileHandler(filename=self.__path, when='MIDNIGHT',
-                                                                       interval=1, backupCount=10)
-        time_rotating_file_handler.setFormatter(formatter)
-        time_rotating_file_handler.suffix = "%Y%m%d-%H%M%S.log"
-
-        # 控制台输出
-        console_formatter = colorlog.ColoredFormatter(
-            fmt='%(log_color)s[%(asctime)s] -> [%(levelname)s] : %(message)s',
-            datefmt='%Y-%m-%d  %H:%M:%S',
-            log_colors=log_colors_config
-        )
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(console_formatter)
-
-        # 文件输出按照大小分割
-        rotatingHandler = ConcurrentRotatingFileHandler(self.__path, "a", 1024 * 1024, 10) # a为追加模式，按1M大小分割,保留最近10个文件
-        rotatingHandler.setFormatter(formatter)
-
+            formatter = logging.Formatter(fmt='[%(asctime)s] -> [%(levelname)s] : %(message)s')
         if config.handler == "time":
-            if not self.__logger.handlers:
-                self.__logger.addHandler(time_rotating_file_handler)
+            # 文件输出按照时间分割
+            handler = handlers.TimedRotatingFileHandler(filename=self.__path, when='MIDNIGHT', interval=1,
+                                                        backupCount=10)
+            handler.suffix = "%Y%m%d-%H%M%S.log"
         elif config.handler == "file":
-            if not self.__logger.handlers:
-                self.__logger.addHandler(rotatingHandler)
+            # 文件输出按照大小分割
+            handler = ConcurrentRotatingFileHandler(self.__path, "a", 1024 * 1024, 10)  # a为追加模式，按1M大小分割,保留最近10个文件
         else:
-            if not self.__logger.handlers:
-                self.__logger.addHandler(stream_handler)
-
-    def debug(self, msg=None):
-        self.__initialize()
-        self.__logger.debug(msg) if msg is not None else self.__logger.debug(traceback.format_exc(limit=1))
-
-    def info(self, msg=None):
-        self.__initialize()
-        self.__logger.info(msg) if msg is not None else self.__logger.info(traceback.format_exc(limit=1))
-
-    def warning(self, msg=None):
-        self.__initialize()
-        self.__logger.warning(msg) if msg is not None else self.__logger.warning(traceback.format_exc(limit=1))
-
-    def error(self, msg=None):
-        self.__initialize()
-        self.__logger.error(msg) if msg is not None else self.__logger.error(traceback.format_exc(limit=1))
-
-    def critical(self, msg=None):
-        self.__initialize()
-        self.__logger.critical(msg) if msg is not None else self.__logger.critical(traceback.format_exc(limit=1))
+            # 控制台输出
+            handler = logging.StreamHandler()
+            if config.log_format != "json":
+                formatter = colorlog.ColoredFormatter(
+                    fmt='%(log_color)s[%(asctime)s] -> [%(levelname)s] : %(message)s',
+                    datefmt='%Y-%m-%d  %H:%M:%S',
+                    log_colors=log_colors_config
+                )
+        handler.setFormatter(formatter)
+        return handler
+
+    def initialize(self):
+        """
+        按配置文件初始化日志，config.loads之后第一次输出日志时自动调用，已初始化时不做任何事。
+        日志记录放入队列后立即返回，由后台线程写入文件或控制台。
+        """
+        with self.__lock:
+            if self.__initialized:  # 多个线程同时第一次输出日志时只初始化一次
+                return
+            self.__start()
+
+    def reinitialize(self):
+        """修改日志配置后调用，停止原来的后台写入线程并按新的配置重新初始化"""
+        with self.__lock:
+            self.__start()
+
+    def __start(self):
+        """调用时需持有锁"""
+        self.shutdown()
+        self.__logger.setLevel(level=LEVELS.get(config.level, logging.DEBUG))
+        log_queue = queue.SimpleQueue()
+        self.__listener = handlers.QueueListener(log_queue, self.__handler(), respect_handler_level=True)
+        self.__listener.start()
+        for handler in list(self.__logger.handlers):
+            self.__logger.removeHandler(handler)
+        self.__logger.addHandler(handlers.QueueHandler(log_queue))
+        self.__initialized = True
+
+    def shutdown(self):
+        """停止后台写入线程，写完队列中剩余的日志，程序退出时自动调用"""
+        if self.__listener is not None:
+            self.__listener.stop()
+            for handler in self.__listener.handlers:
+                handler.close()
+            self.__listener = None
+        self.__initialized = False
+
+    def __log(self, level, msg, fields):
+        if not self.__initialized:
+            self.initialize()
+        if not self.__logger.isEnabledFor(level):
+            return
+        if msg is None:
+            msg = traceback.format_exc(limit=1)
+        self.__logger.log(level, msg, extra={"fields": fields} if fields else None)
+
+    def debug(self, msg=None, **fields):
+        self.__log(logging.DEBUG, msg, fields)
+
+    def info(self, msg=None, **fields):
+        self.__log(logging.INFO, msg, fields)
+
+    def warning(self, msg=None, **fields):
+        self.__log(logging.WARNING, msg, fields)
+
+    def error(self, msg=None, **fields):
+        self.__log(logging.ERROR, msg, fields)
+
+    def critical(self, msg=None, **fields):
+        self.__log(logging.CRITICAL, msg, fields)
 
 
 logger = __LOGGER()
-
+atexit.register(logger.shutdown)
@@ -8,7 +8,12 @@ Date:   2020/07/11
 email: interstella.ranger2020@gmail.com
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from purequant.config import config
+from purequant.klinecache import kline_cache
+from purequant.livedata import live_data
+from purequant.ratelimit import rate_limits, exchange_name
 
 class MARKET:
 
@@ -16,10 +21,20 @@ class MARKET:
         self.__platform = platform
         self.__instrument_id = instrument_id
         self.__time_frame = time_frame
+        self.__exchange = exchange_name(platform)
+
+    def __live_candle(self, param, index):
+        """当根k线的推送行情可用时返回其中的价格，否则返回None"""
+        if param != -1:
+            return None
+        candle = live_data.candle(self.__exchange, self.__instrument_id, self.__time_frame)
+        return candle[index] if candle is not None else None
 
     def last(self):
-        """获取交易对的最新成交价"""
-        result = float(self.__platform.get_ticker()['last'])
+        """获取交易对的最新成交价，有实时行情推送时直接读取推送的数据"""
+        result = live_data.last(self.__exchange, self.__instrument_id)
+        if result is None:
+            result = float(self.__platform.get_ticker()['last'])
         return result
 
     def open(self, param, kline=None):
@@ -32,9 +47,11 @@ class MARKET:
         if kline:    # 回测模式
             return float(kline[param][1])
         else:   # 实盘模式
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-            result = float((records)[param][1])
+            result = self.__live_candle(param, 1)
+            if result is not None:
+                return result
+            records = kline_cache.get_ohlcv(self.__platform, self.__instrument_id, self.__time_frame)
+            result = float(records.open[param])
             return result
 
     def high(self, param, kline=None):
@@ -47,9 +64,11 @@ class MARKET:
         if kline:
             return float(kline[param][2])
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-            result = float((records)[param][2])
+            result = self.__live_candle(param, 2)
+            if result is not None:
+                return result
+            records = kline_cache.get_ohlcv(self.__platform, self.__instrument_id, self.__time_frame)
+            result = float(records.high[param])
             return result
 
     def low(self, param, kline=None):
@@ -62,9 +81,11 @@ class MARKET:
         if kline:
             return float(kline[param][3])
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-            result = float((records)[param][3])
+            result = self.__live_candle(param, 3)
+            if result is not None:
+                return result
+            records = kline_cache.get_ohlcv(self.__platform, self.__instrument_id, self.__time_frame)
+            result = float(records.low[param])
             return result
 
     def close(self, param, kline=None):
@@ -77,9 +98,11 @@ class MARKET:
         if kline:
             return float(kline[param][4])
         else:
-            records = self.__platform.get_kline(self.__time_frame)
-            records.reverse()
-            result = float((records)[param][4])
+            result = self.__live_candle(param, 4)
+            if result is not None:
+                return result
+            records = kline_cache.get_ohlcv(self.__platform, self.__instrument_id, self.__time_frame)
+            result = float(records.close[param])
             return result
 
     def contract_value(self):
@@ -88,11 +111,64 @@ class MARKET:
         return contract_value
 
     def asks(self):
-        """获取卖盘订单簿"""
-        result = self.__platform.get_depth("asks")
+        """获取卖盘订单簿，有实时行情推送时直接读取推送的档位"""
+        result = live_data.asks(self.__exchange, self.__instrument_id)
+        if result is None:
+            result = self.__platform.get_depth("asks")
         return result
     
     def bids(self):
-        """获取买盘订单簿"""
-        result = self.__platform.get_depth("bids")
-        return result
\ No newline at end of file
+        """获取买盘订单簿，有实时行情推送时直接读取推送的档位"""
+        result = live_data.bids(self.__exchange, self.__instrument_id)
+        if result is None:
+            result = self.__platform.get_depth("bids")
+        return result
+
+    @staticmethod
+    def snapshot(targets, fields=("ticker", "depth", "kline"), max_workers=None):
+        """
+        并发获取多个交易对的行情快照，请求在有界线程池中执行，并按交易所的频率预算（config.rate_limits）限速
+        :param targets: 列表，每个元素为(platform, instrument_id, time_frame)
+        :param fields: 要获取的数据，可选"ticker"、"depth"、"kline"
+        :param max_workers: 最大并发请求数，默认为config.async_workers
+        :return: 返回一个字典 {"results": 与targets顺序相同的行情列表, "timings": 每个请求的耗时, "elapsed": 总耗时}，
+                 行情中请求失败的数据为None，错误信息在其"errors"中；耗时均为毫秒，"waited"为因频率限制等待的时间
+        """
+        jobs = []
+        for index, (platform, instrument_id, time_frame) in enumerate(targets):
+            for field in fields:
+                if field == "ticker":
+                    jobs.append((index, field, platform, instrument_id, platform.get_ticker))
+                elif field == "depth":
+                    jobs.append((index, field, platform, instrument_id, platform.get_depth))
+                elif field == "kline":
+                    jobs.append((index, field, platform, instrument_id,
+                                 lambda platform=platform, instrument_id=instrument_id, time_frame=time_frame:
+                                 kline_cache.get(platform, instrument_id, time_frame)))
+                else:
+                    raise ValueError("不支持的行情数据：{}".format(field))
+
+        def run(job):
+            index, field, platform, instrument_id, request = job
+            waited = rate_limits.acquire(platform)
+            start = time.perf_counter()
+            try:
+                result, error = request(), None
+            except Exception as e:
+                result, error = None, "{}".format(e)
+            elapsed = (time.perf_counter() - start) * 1000
+            return index, field, result, error, {"exchange": exchange_name(platform), "instrument_id": instrument_id,
+                                                 "request": field, "elapsed": elapsed, "waited": waited * 1000}
+
+        results = [{"platform": platform, "instrument_id": instrument_id, "time_frame": time_frame, "errors": {}}
+                   for platform, instrument_id, time_frame in targets]
+        timings = []
+        start = time.perf_counter()
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(max_workers or config.async_workers, len(jobs))) as executor:
+                for index, field, result, error, timing in executor.map(run, jobs):
+                    results[index][field] = result
+                    if error is not None:
+                        results[index]["errors"][field] = error
+                    timings.append(timing)
+        return {"results": results, "timings": timings, "elapsed": (time.perf_counter() - start) * 1000}
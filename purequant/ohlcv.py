@@ -0,0 +1,106 @@
+# -*- coding:utf-8 -*-
+
+"""
+列式k线数据容器
+
+开、高、低、收、成交量各自保存为一个float64的numpy数组，时间戳保存为int64毫秒时间戳，
+按时间升序排列。行访问的方式与交易所返回的k线列表一致，kline[-1][4]即为最新一根k线的收盘价，
+因此可以直接传入指标模块与行情模块中的kline参数。
+"""
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume", "currency_volume")
+
+
+def to_timestamp_ms(values):
+    """
+    将k线中的时间戳转换为int64毫秒时间戳数组
+    :param values: 时间戳，可以是毫秒或秒时间戳，也可以是"2020-07-25T03:05:00.000z"格式的UTC时间字符串
+    :return: 返回一个int64数组
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "iuf":
+        values = np.char.rstrip(values.astype(str), "Zz")
+        try:
+            values = values.astype(np.float64)
+        except ValueError:  # UTC时间字符串
+            try:
+                return values.astype("datetime64[ms]").astype(np.int64)
+            except ValueError:  # numpy无法识别的时间格式交由pandas解析
+                return pd.to_datetime(values, utc=True).tz_convert(None).values.astype("datetime64[ms]").astype(np.int64)
+    values = values.astype(np.int64)
+    if len(values) and values.max() < 10 ** 11:     # 秒时间戳
+        values = values * 1000
+    return values
+
+
+def from_kline(kline):
+    """
+    将k线列表一次性转换为OHLCV，整列转换而不是逐行逐个赋值
+    :param kline: 按时间升序排列的k线列表，每一行为[时间戳, 开, 高, 低, 收, 成交量(, 成交额)]，价格可以是字符串
+    :return: 返回OHLCV
+    """
+    if isinstance(kline, OHLCV):
+        return kline
+    if not len(kline):
+        return OHLCV(*[np.zeros(0, dtype=np.int64)] + [np.zeros(0) for _ in range(5)])
+    array = np.array([row[:7] for row in kline], dtype=object)
+    values = array[:, 1:].astype(np.float64)
+    return OHLCV(to_timestamp_ms(array[:, 0]), *[np.ascontiguousarray(values[:, i]) for i in range(values.shape[1])])
+
+
+class OHLCV:
+
+    def __init__(self, timestamp, open, high, low, close, volume, currency_volume=None):
+        """
+        :param timestamp: int64毫秒时间戳数组
+        :param open: 开盘价数组
+        :param high: 最高价数组
+        :param low: 最低价数组
+        :param close: 收盘价数组
+        :param volume: 成交量数组
+        :param currency_volume: 成交额数组，可不传
+        """
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.currency_volume = currency_volume
+
+    def columns(self):
+        """按k线列表中的顺序返回所有列数组"""
+        columns = [self.timestamp, self.open, self.high, self.low, self.close, self.volume]
+        if self.currency_volume is not None:
+            columns.append(self.currency_volume)
+        return columns
+
+    def column(self, index):
+        """按k线列表中的列序号返回列数组，如4为收盘价"""
+        return getattr(self, FIELDS[index])
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        """整数下标返回一根k线的列表，切片返回新的OHLCV（共享内存，不复制数据）"""
+        if isinstance(index, slice):
+            return OHLCV(*[column[index] for column in self.columns()])
+        return [column[index].item() for column in self.columns()]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def freeze(self):
+        """将所有数组设为只读，用于在多个调用方之间共享同一份数据"""
+        for column in self.columns():
+            column.flags.writeable = False
+        return self
+
+    def to_kline(self):
+        """转换为k线列表"""
+        return [list(row) for row in zip(*[column.tolist() for column in self.columns()])]
@@ -0,0 +1,236 @@
+# -*- coding:utf-8 -*-
+
+"""
+订单管理
+
+订阅交易所的私有订单频道（OKEX的futures/order、swap/order、spot/order，火币合约的orders，BITMEX的order表），
+按订单号保存推送的最新订单状态。交易助手下单、撤单与时间撤单时通过wait等待推送，订单状态变化时立即返回，
+不再固定sleep之后再用REST查询；推送连接断开或未启动时，自动退回到轮询get_order_info。
+
+使用方法：
+    order_manager.start_okex(access_key, secret_key, passphrase, ["futures/order:BTC-USD-201225"])
+    order_manager.start_huobi("wss://api.hbdm.com/swap-notification", access_key, secret_key, ["orders.BTC-USD"])
+    order_manager.start_bitmex(access_key, secret_key, "XBTUSD")
+启动之后，OKEXFUTURES、HUOBISWAP、BITMEX等交易接口的buy、sell等方法会自动使用推送的订单状态。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from purequant.config import config
+
+FINAL_STATES = ("完全成交", "撤单成功", "部分成交撤销", "部分撤单", "订单被交易引擎取消", "失败")   # 不会再变化的订单状态
+MAX_ORDERS = 10000  # 最多保存的订单数量，超出时丢弃最早的订单
+
+OKEX_STATES = {"-2": "失败", "-1": "撤单成功", "0": "等待成交", "1": "部分成交", "2": "完全成交", "3": "下单中", "4": "撤单中"}
+OKEX_ACTIONS = {"1": "买入开多", "2": "卖出开空", "3": "卖出平多", "4": "买入平空", "buy": "买入开多", "sell": "卖出平多"}
+OKEX_NAMES = {"futures/order": "Okex交割合约", "swap/order": "Okex永续合约", "spot/order": "Okex现货"}
+HUOBI_STATES = {1: "准备提交", 2: "准备提交", 3: "已提交", 4: "部分成交", 5: "部分成交撤销", 6: "完全成交", 7: "撤单成功",
+                11: "撤单中"}
+HUOBI_ACTIONS = {("buy", "open"): "买入开多", ("buy", "close"): "买入平空", ("sell", "open"): "卖出开空",
+                 ("sell", "close"): "卖出平多"}
+BITMEX_STATES = {"New": "等待成交", "PartiallyFilled": "部分成交", "Filled": "完全成交", "Canceled": "撤单成功",
+                 "Rejected": "失败"}
+
+
+def okex_order(table, data):
+    """
+    将OKEX订单频道推送的一条数据转换为与get_order_info相同格式的字典
+    :param table: 频道名称，如"futures/order"
+    :param data: 推送数据中data列表里的一条
+    """
+    instrument_id = data['instrument_id']
+    info = {"交易所": OKEX_NAMES.get(table, "Okex"), "合约ID": instrument_id,
+            "方向": OKEX_ACTIONS.get(data.get('type') or data.get('side')),
+            "订单状态": OKEX_STATES.get(str(data['state'])), "order_id": data['order_id']}
+    if info["订单状态"] in ("等待成交", "失败", "下单中", "撤单中"):
+        return info
+    price = float(data.get('price_avg') or 0)
+    if table == "spot/order":
+        info.update({"成交均价": price, "已成交数量": float(data['filled_size']),
+                     "成交金额": float(data['filled_notional'])})
+        return info
+    amount = int(data['filled_qty'])
+    quote = instrument_id.split("-")[1].lower()
+    if quote == "usd":
+        turnover = float(data['contract_val']) * amount
+    elif quote == "usdt":
+        turnover = round(float(data['contract_val']) * amount * price, 2)
+    else:
+        turnover = None
+    info.update({"成交均价": price, "已成交数量": amount, "成交金额": turnover})
+    return info
+
+
+def huobi_order(data):
+    """将火币合约orders频道推送的一条数据转换为与get_order_info相同格式的字典"""
+    instrument_id = data['contract_code']
+    info = {"交易所": "Huobi永续合约" if "-" in instrument_id else "Huobi交割合约", "合约ID": instrument_id,
+            "方向": HUOBI_ACTIONS.get((data['direction'], data['offset']), "交易方向错误！"),
+            "订单状态": HUOBI_STATES.get(int(data['status'])), "order_id": data['order_id_str']}
+    if info["订单状态"] in ("部分成交", "部分成交撤销", "完全成交", "撤单成功"):
+        info.update({"成交均价": data['trade_avg_price'], "已成交数量": data['trade_volume'],
+                     "成交金额": data['trade_turnover']})
+    return info
+
+
+def bitmex_order(data):
+    """将BITMEX的order表中的一行转换为与get_order_info相同格式的字典"""
+    info = {"交易所": "BITMEX", "合约ID": data['symbol'], "方向": "买入" if data['side'] == "Buy" else "卖出",
+            "订单状态": BITMEX_STATES.get(data['ordStatus'])}
+    if info["订单状态"] in ("部分成交", "完全成交", "撤单成功"):
+        info.update({"成交均价": data['avgPx'], "已成交数量": data['cumQty']})
+    return info
+
+
+class __OrderManager:
+    """推送驱动的订单状态"""
+
+    def __init__(self):
+        self.__orders = OrderedDict()   # 订单号 -> 订单信息
+        self.__streams = {}     # 交易所名称 -> 返回推送连接是否可用的函数
+        self.__condition = threading.Condition()
+        self.__pushed = 0
+        self.__polled = 0
+
+    def register(self, exchange, alive):
+        """
+        登记一个交易所的订单推送
+        :param exchange: 交易所名称，如"okex"
+        :param alive: 无参数的函数，返回推送连接当前是否可用
+        """
+        with self.__condition:
+            self.__streams[exchange] = alive
+            self.__condition.notify_all()
+
+    def alive(self, exchange):
+        """某个交易所的订单推送当前是否可用"""
+        stream = self.__streams.get(exchange)
+        try:
+            return bool(stream and stream())
+        except Exception:
+            return False
+
+    def update(self, order_id, info):
+        """
+        保存一条推送的订单状态，并唤醒等待该订单的线程
+        :param order_id: 订单号
+        :param info: 与get_order_info相同格式的字典
+        """
+        key = str(order_id)
+        with self.__condition:
+            previous = self.__orders.get(key)
+            # 推送乱序时，终结状态不会被之前的中间状态覆盖
+            if previous is not None and previous["订单状态"] in FINAL_STATES and info["订单状态"] not in FINAL_STATES:
+                return
+            self.__orders[key] = info
+            self.__orders.move_to_end(key)
+            while len(self.__orders) > MAX_ORDERS:
+                self.__orders.popitem(last=False)
+            self.__condition.notify_all()
+
+    def get(self, order_id):
+        """返回推送的最新订单状态，没有收到过该订单的推送时返回None"""
+        with self.__condition:
+            return self.__orders.get(str(order_id))
+
+    def wait(self, exchange, order_id, poll, timeout=None, final=True):
+        """
+        等待订单状态。推送可用时在超时之前等待推送，订单进入终结状态时立即返回；推送不可用，或超时仍未收到该订单的
+        推送时，每隔config.order_poll_interval秒调用一次poll查询订单。
+        :param exchange: 交易所名称，如"okex"
+        :param order_id: 订单号
+        :param poll: 查询订单状态的函数，调用方式为poll(order_id)，如trade.get_order_info
+        :param timeout: 最长等待秒数，默认为config.order_push_timeout
+        :param final: 为True时等待订单完全成交、撤单成功或失败，为False时收到任意状态即返回
+        :return: 与get_order_info相同格式的字典，超时时返回最新的订单状态
+        """
+        timeout = config.order_push_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        key = str(order_id)
+        with self.__condition:
+            while self.alive(exchange):
+                info = self.__orders.get(key)
+                remaining = deadline - time.monotonic()
+                if info is not None and (not final or remaining <= 0 or info["订单状态"] in FINAL_STATES):
+                    self.__pushed += 1
+                    return info
+                if remaining <= 0:
+                    break
+                self.__condition.wait(remaining)
+        while True:
+            info = poll(order_id)
+            with self.__condition:
+                self.__polled += 1
+            remaining = deadline - time.monotonic()
+            if not final or remaining <= 0 or (info and info["订单状态"] in FINAL_STATES):
+                return info
+            time.sleep(min(config.order_poll_interval, remaining))
+
+    def on_okex(self, result):
+        """OKEX私有频道的回调函数，传给okex websocket的subscribe(on_message=...)"""
+        table = result.get('table')
+        if table in OKEX_NAMES:
+            for data in result.get('data', []):
+                self.update(data['order_id'], okex_order(table, data))
+
+    def on_huobi(self, data):
+        """火币合约订单推送的回调函数"""
+        if data.get('op') == "notify" and str(data.get('topic', "")).startswith("orders") and 'order_id_str' in data:
+            self.update(data['order_id_str'], huobi_order(data))
+
+    def on_bitmex(self, row):
+        """BITMEX的order表的回调函数，传给BitMEXWebsocket(on_order=...)"""
+        if row.get('orderID') and row.get('ordStatus'):
+            self.update(row['orderID'], bitmex_order(row))
+
+    def start_okex(self, access_key, secret_key, passphrase, channels, url=None):
+        """
+        在同一账户共用的websocket连接上订阅OKEX的私有订单频道，断线自动重连
+        :param channels: 频道列表，如["futures/order:BTC-USD-201225"]、["swap/order:BTC-USD-SWAP"]、["spot/order:ETH-USDT"]
+        :param url: 默认为"wss://real.okex.com:8443/ws/v3"
+        """
+        from purequant.wsmanager import ws_manager
+        connection = ws_manager.okex(url, access_key, passphrase, secret_key)
+        self.register("okex", lambda: connection.connected)
+        for channel in channels:
+            connection.subscribe(channel, self.on_okex)
+
+    def start_huobi(self, url, access_key, secret_key, topics):
+        """
+        在同一账户共用的websocket连接上订阅火币合约的订单推送，断线按指数退避重连并重新订阅
+        :param url: 交割合约为"wss://api.hbdm.com/notification"，永续合约为"wss://api.hbdm.com/swap-notification"
+        :param topics: 主题列表，如交割合约["orders.BTC"]，永续合约["orders.BTC-USD"]
+        """
+        from purequant.wsmanager import ws_manager
+        connection = ws_manager.huobi(url, access_key, secret_key)
+        self.register("huobi", lambda: connection.connected)
+        for topic in topics:
+            connection.subscribe(topic, self.on_huobi)
+
+    def start_bitmex(self, access_key, secret_key, symbol, testing=False):
+        """
+        订阅BITMEX的order表
+        :param symbol: 合约id，例如："XBTUSD"
+        :param testing: 是否是测试账户
+        :return: 返回BitMEXWebsocket
+        """
+        from purequant.exchange.bitmex.bitmex_websocket import BitMEXWebsocket
+        endpoint = "https://testnet.bitmex.com/api/v1" if testing else "https://www.bitmex.com/api/v1"
+        ws = BitMEXWebsocket(endpoint, symbol, access_key, secret_key, on_order=self.on_bitmex)
+        self.register("bitmex", lambda: not ws.exited and ws.ws.sock is not None and ws.ws.sock.connected)
+        return ws
+
+    def metrics(self):
+        """
+        订单推送的使用情况
+        :return: 返回一个字典，streams为各交易所推送连接是否可用，pushed为直接使用推送状态的次数，polled为轮询的次数
+        """
+        with self.__condition:
+            exchanges = list(self.__streams)
+            result = {"orders": len(self.__orders), "pushed": self.__pushed, "polled": self.__polled}
+        result["streams"] = {exchange: self.alive(exchange) for exchange in exchanges}
+        return result
+
+
+order_manager = __OrderManager()
@@ -19,13 +19,18 @@ class POSITION:
         self.__time_frame = time_frame
         self.__market = MARKET(self.__platform, self.__instrument_id, self.__time_frame)
 
+    def __backtest_position(self, field):
+        """回测模式下从数据库中读取最后一条策略运行信息中的持仓字段，只读取这一行这一个字段"""
+        data_sheet = self.__instrument_id.split("-")[0].lower() + "_" + self.__time_frame
+        return storage.read_last_inserted("回测", data_sheet, [field], [("总资金", ">", 0)])[0]
+
     def direction(self, backtest=False):
         """获取当前持仓方向"""
         if backtest is False:    # 实盘模式下实时获取账户实际持仓方向，仅支持单向持仓模式下的查询
             result = self.__platform.get_position()['direction']
             return result
         else:   # 回测模式下从数据库中读取持仓方向
-            result = storage.read_mysql_datas(0, "回测", self.__instrument_id.split("-")[0].lower() + "_" + self.__time_frame, "总资金", ">")[-1][6]
+            result = self.__backtest_position("当前持仓方向")
             return result
 
     def amount(self, mode=None, side=None, backtest=False):
@@ -43,7 +48,7 @@ class POSITION:
                 result = self.__platform.get_position()['amount']
                 return result
         else:   # 回测模式下从数据库中读取持仓数量
-            result = storage.read_mysql_datas(0, "回测", self.__instrument_id.split("-")[0].lower() + "_" + self.__time_frame, "总资金", ">")[-1][7]
+            result = self.__backtest_position("当前持仓数量")
             return result
 
     def price(self, mode=None, side=None, backtest=False):
@@ -61,7 +66,7 @@ class POSITION:
                 result = self.__platform.get_position()['price']
                 return result
         else:   # 回测模式下从数据库中读取持仓价格
-            result = storage.read_mysql_datas(0, "回测", self.__instrument_id.split("-")[0].lower() + "_" + self.__time_frame, "总资金", ">")[-1][5]
+            result = self.__backtest_position("当前持仓价格")
             return result
 
 
@@ -3,86 +3,274 @@
 """
 智能渠道推送工具包
 
+push只把消息放入各推送渠道的队列后立即返回，由每个渠道自己的后台线程发送，邮件服务器或短信接口很慢时也不会阻塞
+交易线程。每个渠道保持一个长期的客户端（SMTP连接、twilio的Client、钉钉的HTTP连接池），按每分钟的频率预算发送，
+发送受限期间积压的消息合并为一条发送，发送失败时重新连接并重试。队列已满时丢弃最早的消息。
+
 Author: Gary-Hertel
 Date:   2020/07/09
 email: interstella.ranger2020@gmail.com
 """
-from purequant.config import config
-import requests, json, smtplib
+
+import abc
+import atexit
+import json
+import queue
+import smtplib
+import threading
+import time
 from email.header import Header
 from email.mime.text import MIMEText
 from email.utils import parseaddr, formataddr
-from twilio.rest import Client
+from purequant.config import config
+from purequant.logger import logger
+from purequant.ratelimit import RateLimiter
 from purequant.storage import storage
 from purequant.time import get_localtime
+from purequant.transport import transport
+
+EXIT_FLUSH_TIMEOUT = 5  # 程序退出时等待队列中的消息发送完毕的最长秒数
+
 
-def __dingtalk(text):
+def coalesce(messages):
     """
-    推送钉钉消息。
-    :param data: 要推送的数据内容，字符串格式
-    :return:
+    将积压的多条消息合并为一条，连续重复的消息只保留一条并注明重复次数
+    :param messages: 消息列表
+    :return: 合并后的字符串
     """
-    json_text = {
-        "msgtype": "text",
-        "at": {
-            "atMobiles": [
-                ""
-            ],
-            "isAtAll": True
-        },
-        "text": {
-            "content": text
+    merged = []
+    for message in messages:
+        if merged and merged[-1][0] == message:
+            merged[-1][1] += 1
+        else:
+            merged.append([message, 1])
+    return "\n\n".join(message if count == 1 else "{}（重复{}次）".format(message, count) for message, count in merged)
+
+
+class Channel(abc.ABC):
+    """一个推送渠道，子类实现send与reset"""
+
+    name = None
+
+    def __init__(self):
+        rate = config.push_rate_limits.get(self.name, 10) / 60.0
+        self.__limiter = RateLimiter(rate, burst=1)
+        self.__queue = queue.Queue(config.push_queue_size)
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, message):
+        """消息放入队列后立即返回，队列已满时丢弃最早的一条"""
+        while True:
+            try:
+                self.__queue.put_nowait(str(message))
+                break
+            except queue.Full:
+                try:
+                    self.__queue.get_nowait()
+                    self.__queue.task_done()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self.__start()
+
+    def flush(self, timeout=None):
+        """
+        等待队列中的消息发送完毕
+        :param timeout: 最长等待秒数，为None时一直等待
+        :return: 全部发送完毕返回True，超时返回False
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__queue.all_tasks_done:
+            while self.__queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.__queue.all_tasks_done.wait(remaining)
+        return True
+
+    @abc.abstractmethod
+    def send(self, text):
+        """发送一条消息，失败时抛出异常"""
+
+    def reset(self):
+        """发送失败后丢弃客户端，下次发送时重新连接"""
+
+    def metrics(self):
+        return {"queued": self.__queue.qsize(), "sent": self.sent, "failed": self.failed, "dropped": self.dropped,
+                "coalesced": self.coalesced}
+
+    def __start(self):
+        if self.__thread is None:
+            with self.__lock:
+                if self.__thread is None:
+                    self.__thread = threading.Thread(target=self.__run, daemon=True,
+                                                     name="purequant-push-{}".format(self.name))
+                    self.__thread.start()
+
+    def __run(self):
+        while True:
+            messages = [self.__queue.get()]
+            self.__limiter.acquire()
+            while True:     # 等待频率预算期间积压的消息一起发送
+                try:
+                    messages.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.coalesced += len(messages) - 1
+            try:
+                self.__deliver(coalesce(messages))
+            finally:
+                for _ in messages:
+                    self.__queue.task_done()
+
+    def __deliver(self, text):
+        for attempt in range(config.push_retries + 1):
+            try:
+                self.send(text)
+                self.sent += 1
+                return
+            except Exception as e:
+                error = e
+                self.reset()
+                if attempt < config.push_retries:
+                    time.sleep(config.push_retry_interval * 2 ** attempt)
+        self.failed += 1
+        logger.error("{}推送失败！错误：{}".format(self.name, str(error)))
+
+
+class DingTalkChannel(Channel):
+    """钉钉推送，使用共享的HTTP连接池"""
+
+    name = "dingtalk"
+
+    def send(self, text):
+        json_text = {
+            "msgtype": "text",
+            "at": {
+                "atMobiles": [
+                    ""
+                ],
+                "isAtAll": True
+            },
+            "text": {
+                "content": text
+            }
         }
-    }
+        headers = {'Content-Type': 'application/json;charset=utf-8'}
+        dingtalk_result = transport.post(config.ding_talk_api, json.dumps(json_text), headers=headers).content  # 发送钉钉消息并返回发送结果
+        storage.text_save("时间：" + str(get_localtime()) + "  发送状态：" + str(dingtalk_result) + "发送内容：" + str(text),
+                          './dingtalk.txt')  # 将发送时间、结果和具体发送内容保存至当前目录下text文件中
+        if json.loads(dingtalk_result).get("errcode", 0) != 0:
+            raise Exception(dingtalk_result)
 
-    headers = {'Content-Type': 'application/json;charset=utf-8'}
-    api_url = config.ding_talk_api
-    dingtalk_result = requests.post(api_url, json.dumps(json_text), headers=headers).content    # 发送钉钉消息并返回发送结果
-    storage.text_save("时间：" + str(get_localtime()) + "  发送状态：" + str(dingtalk_result) + "发送内容：" + str(text),
-                      './dingtalk.txt')  # 将发送时间、结果和具体发送内容保存至当前目录下text文件中
 
-def __sendmail(data):
-    """
-    推送邮件信息。
-    :param data: 要推送的信息内容，字符串格式
-    :return:
-    """
-    from_addr = config.from_addr
-    password = config.password
-    to_addr = config.to_addr
-    smtp_server = config.smtp_server
-    port = config.mail_port
-
-    msg = MIMEText(data, 'plain', 'utf-8')
-    name, addr = parseaddr('Alert <%s>' % from_addr)
-    msg['From'] = formataddr((Header(name, 'utf-8').encode(), addr))
-    name, addr = parseaddr('交易者 <%s>' % to_addr)
-    msg['To'] = formataddr((Header(name, 'utf-8').encode(), addr))
-    msg['Subject'] = Header('交易提醒', 'utf-8').encode()
-
-    server = smtplib.SMTP(smtp_server, port)
-    server.login(from_addr, password)
-    server.sendmail(from_addr, [to_addr], msg.as_string())
-    server.quit()
-
-def __twilio(message):
-    """
-    使用twilio推送信息到短信。
-    :param message: 要推送的信息，字符串格式。
-    :return:
-    """
-    accountSID = config.accountSID
-    authToken = config.authToken
-    myNumber = config.myNumber
-    twilio_Number = config.twilio_Number
-    twilioCli = Client(accountSID, authToken)
-    twilioCli.messages.create(body=message, from_=twilio_Number, to=myNumber)
+class MailChannel(Channel):
+    """邮件推送，SMTP连接在发送之间保持"""
+
+    name = "sendmail"
+
+    def __init__(self):
+        super().__init__()
+        self.__server = None
+
+    def send(self, text):
+        from_addr = config.from_addr
+        to_addr = config.to_addr
+        msg = MIMEText(text, 'plain', 'utf-8')
+        name, addr = parseaddr('Alert <%s>' % from_addr)
+        msg['From'] = formataddr((Header(name, 'utf-8').encode(), addr))
+        name, addr = parseaddr('交易者 <%s>' % to_addr)
+        msg['To'] = formataddr((Header(name, 'utf-8').encode(), addr))
+        msg['Subject'] = Header('交易提醒', 'utf-8').encode()
+        if self.__server is None:
+            server = smtplib.SMTP(config.smtp_server, config.mail_port, timeout=config.http_timeout)
+            server.login(from_addr, config.password)
+            self.__server = server
+        self.__server.sendmail(from_addr, [to_addr], msg.as_string())
+
+    def reset(self):
+        server, self.__server = self.__server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+
+class TwilioChannel(Channel):
+    """twilio短信推送，Client只创建一次"""
+
+    name = "twilio"
+
+    def __init__(self):
+        super().__init__()
+        self.__client = None
+
+    def send(self, text):
+        if self.__client is None:
+            from twilio.rest import Client
+            self.__client = Client(config.accountSID, config.authToken)
+        self.__client.messages.create(body=text, from_=config.twilio_Number, to=config.myNumber)
+
+    def reset(self):
+        self.__client = None
+
+
+class __Pusher:
+    """推送渠道的集合"""
+
+    CHANNELS = (MailChannel, DingTalkChannel, TwilioChannel)
+
+    def __init__(self):
+        self.__channels = {}
+        self.__lock = threading.Lock()
+
+    def push(self, message):
+        """按配置文件中启用的推送渠道推送消息，立即返回"""
+        for channel in self.CHANNELS:
+            if getattr(config, channel.name, False):
+                self.channel(channel).put(message)
+
+    def channel(self, channel):
+        """获取某个渠道的实例，首次使用时创建"""
+        with self.__lock:
+            if channel.name not in self.__channels:
+                self.__channels[channel.name] = channel()
+            return self.__channels[channel.name]
+
+    def flush(self, timeout=None):
+        """
+        等待所有渠道队列中的消息发送完毕
+        :param timeout: 最长等待秒数，为None时一直等待
+        :return: 全部发送完毕返回True，超时返回False
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__lock:
+            channels = list(self.__channels.values())
+        for channel in channels:
+            if not channel.flush(None if deadline is None else max(0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def metrics(self):
+        """
+        各推送渠道的发送情况
+        :return: 返回一个字典，queued为队列中的消息数，sent为发送次数，failed为重试后仍失败的次数，dropped为队列已满时
+                 丢弃的消息数，coalesced为合并发送的消息数
+        """
+        with self.__lock:
+            return {name: channel.metrics() for name, channel in self.__channels.items()}
+
+
+pusher = __Pusher()
+atexit.register(pusher.flush, EXIT_FLUSH_TIMEOUT)
+
 
 def push(message):
     """集成推送工具，配置模块中选择具体的推送渠道"""
-    if config.sendmail:
-        __sendmail(message)
-    if config.dingtalk:
-        __dingtalk(message)
-    if config.twilio:
-        __twilio(message)
+    pusher.push(message)
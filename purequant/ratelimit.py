@@ -0,0 +1,87 @@
+# -*- coding:utf-8 -*-
+
+"""
+请求频率限制
+
+每个交易所一个令牌桶，多个线程并发请求同一个交易所时，超出频率预算的请求会等待，而不是被交易所拒绝。
+各交易所每秒的请求数可在配置文件的RATE_LIMIT中设置。
+"""
+
+import threading
+import time
+from purequant.config import config
+
+EXCHANGES = ("okex", "huobi", "binance", "bitmex", "bybit", "bitcoke", "mxc", "ccxt")
+
+
+def exchange_name(platform):
+    """
+    根据交易接口实例判断所属的交易所
+    :param platform: 交易接口实例，如OKEXFUTURES(...)
+    :return: 交易所名称，如"okex"，无法判断时返回类名的小写
+    """
+    name = type(platform).__name__.lower()
+    for exchange in EXCHANGES:
+        if name.startswith(exchange):
+            return exchange
+    return name
+
+
+class RateLimiter:
+
+    def __init__(self, rate, burst=None):
+        """
+        令牌桶
+        :param rate: 每秒允许的请求数
+        :param burst: 允许的突发请求数，默认与rate相同
+        """
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.__tokens = self.burst
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """
+        取得一个令牌，频率超出预算时阻塞等待
+        :return: 等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.burst, self.__tokens + (now - self.__updated) * self.rate)
+                self.__updated = now
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return waited
+                delay = (1 - self.__tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class __RateLimits:
+    """所有交易所的频率限制"""
+
+    def __init__(self):
+        self.__limiters = {}
+        self.__lock = threading.Lock()
+
+    def get(self, exchange):
+        """
+        获取某个交易所的令牌桶
+        :param exchange: 交易所名称，如"okex"
+        :return: 返回RateLimiter
+        """
+        with self.__lock:
+            if exchange not in self.__limiters:
+                rate = config.rate_limits.get(exchange, config.rate_limits.get("default", 10))
+                self.__limiters[exchange] = RateLimiter(rate)
+            return self.__limiters[exchange]
+
+    def acquire(self, platform):
+        """按交易接口实例所属的交易所取得一个令牌，返回等待的秒数"""
+        return self.get(exchange_name(platform)).acquire()
+
+
+rate_limits = __RateLimits()
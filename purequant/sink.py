@@ -0,0 +1,126 @@
+# -*- coding:utf-8 -*-
+
+"""
+异步批量写入
+
+调用方（如websocket的接收循环）只把数据放入内存队列，由后台线程攒够一批或等待一段时间后一次性写入数据库，
+接收循环不会因为数据库写入而阻塞。
+"""
+
+import queue
+import threading
+import time
+from purequant.logger import logger
+
+
+class BatchSink:
+
+    def __init__(self, write, batch_size=500, flush_interval=1, maxsize=100000, block=False):
+        """
+        异步批量写入
+        :param write: 写入函数，参数为一个数据列表，如lambda datas: collection.insert_many(datas)
+        :param batch_size: 每批最多写入的条数
+        :param flush_interval: 最长等待秒数，未攒够一批时到时间也会写入
+        :param maxsize: 队列最大长度，避免数据库不可用时内存无限增长
+        :param block: 队列已满时put是否阻塞等待后台线程写入（背压），为False时丢弃新数据并计数
+        """
+        self.__write = write
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__queue = queue.Queue(maxsize=maxsize)
+        self.__block = block
+        self.__written = 0
+        self.__dropped = 0
+        self.__batches = 0
+        self.__errors = 0
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, name="purequant-sink", daemon=True)
+        self.__thread.start()
+
+    def put(self, data, block=None):
+        """
+        放入一条数据
+        :param data: 数据
+        :param block: 队列已满时是否阻塞等待，不传则使用创建时的设置
+        :return: 成功放入队列返回True，队列已满被丢弃时返回False
+        """
+        if self.__closed:
+            raise RuntimeError("BatchSink已关闭！")
+        try:
+            self.__queue.put(data, block=self.__block if block is None else block)
+            return True
+        except queue.Full:
+            self.__dropped += 1
+            return False
+
+    def flush(self, timeout=None):
+        """
+        等待队列中已有的数据全部写入
+        :param timeout: 最长等待秒数，为None时一直等待
+        :return: 全部写入返回True，超时返回False
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__queue.all_tasks_done:
+            while self.__queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.__queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """
+        写入剩余数据并停止后台线程，可重复调用
+        :param timeout: 最长等待秒数，为None时一直等待；超时后队列中未写入的数据被丢弃并计入dropped
+        :return: 全部写入返回True，超时返回False
+        """
+        if self.__closed:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        flushed = self.flush(timeout)
+        self.__closed = True
+        self.__thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        if not flushed:
+            pending = self.__queue.qsize()
+            self.__dropped += pending
+            logger.warning("批量写入在{}秒内未完成，丢弃队列中剩余的{}条数据".format(timeout, pending))
+        return flushed
+
+    def metrics(self):
+        """
+        写入情况
+        :return: 返回一个字典
+        """
+        return {
+            "pending": self.__queue.qsize(),
+            "written": self.__written,
+            "dropped": self.__dropped,
+            "batches": self.__batches,
+            "errors": self.__errors
+        }
+
+    def __run(self):
+        while not self.__closed:
+            try:
+                batch = [self.__queue.get(timeout=self.__flush_interval)]
+            except queue.Empty:
+                continue
+            deadline = time.time() + self.__flush_interval
+            while len(batch) < self.__batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.__queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self.__write(batch)
+                self.__written += len(batch)
+                self.__batches += 1
+            except Exception as e:
+                self.__errors += 1
+                logger.error("批量写入失败，丢弃{}条数据：{}".format(len(batch), e))
+            finally:
+                for _ in batch:
+                    self.__queue.task_done()
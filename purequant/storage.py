@@ -7,182 +7,82 @@ Author: Gary-Hertel
 Date:   2020/07/09
 email: interstella.ranger2020@gmail.com
 """
-import logging, mysql.connector, pymongo
+import logging, mysql.connector
 from purequant.indicators import INDICATORS
 import pandas as pd
 from purequant.config import config
+from purequant.database import mysql_engine, mongo_engine
+from purequant.klinecache import kline_cache
 from purequant.time import *
 import datetime
 
+KLINE_FIELDS = ["timestamp", "open", "high", "low", "close", "volume", "currency_volume"]
+OPERATORS = ("=", "!=", "<>", ">", ">=", "<", "<=", "LIKE", "NOT LIKE", "IN", "NOT IN")   # 查询条件允许的运算符
+ROW_ID = "id"   # 策略运行信息表的自增字段，按插入顺序读取最后一行时使用
+
+
+def quote(identifier):
+    """为数据库、数据表或字段名称加上反引号"""
+    return "`{}`".format(str(identifier).replace("`", "``"))
+
+
+def build_select(database, datasheet, columns=None, conditions=None, order_by=None, descending=False, limit=None):
+    """
+    生成参数化的查询语句，查询条件的值不会拼接进语句中
+    :param database: 数据库名称
+    :param datasheet: 数据表名称
+    :param columns: 要读取的字段列表，不传则读取全部字段
+    :param conditions: 查询条件，字典{字段: 值}表示相等，或列表[(字段, 运算符, 值)]，运算符为"IN"时值为列表
+    :param order_by: 排序字段
+    :param descending: 是否降序排列
+    :param limit: 最多返回的行数
+    :return: 返回(sql, params)
+    """
+    sql = "SELECT {} FROM {}.{}".format(", ".join(quote(column) for column in columns) if columns else "*",
+                                        quote(database), quote(datasheet))
+    if isinstance(conditions, dict):
+        conditions = [(field, "=", value) for field, value in conditions.items()]
+    clauses, params = [], []
+    for field, operator, value in conditions or []:
+        operator = operator.strip().upper()
+        if operator not in OPERATORS:
+            raise ValueError("不支持的运算符：{}".format(operator))
+        if operator in ("IN", "NOT IN"):
+            value = list(value)
+            clauses.append("{} {} ({})".format(quote(field), operator, ", ".join(["%s"] * len(value))))
+            params.extend(value)
+        else:
+            clauses.append("{} {} %s".format(quote(field), operator))
+            params.append(value)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    if order_by is not None:
+        sql += " ORDER BY {}{}".format(quote(order_by), " DESC" if descending else "")
+    if limit is not None:
+        sql += " LIMIT {}".format(int(limit))
+    return sql, tuple(params)
+
+
 class __Storage:
     """K线等各种数据的存储与读取"""
 
     def __init__(self):
         self.__old_kline = 0
+        self.__no_row_id = set()    # 没有自增字段的数据表，元素为(database, datasheet)
 
     def save_asset_and_profit(self, database, data_sheet, profit, asset):
         """存储单笔交易盈亏与总资金信息至mysql数据库"""
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:
-            cursor2.execute("CREATE TABLE {} (timestamp TEXT, profit FLOAT, asset FLOAT)".format(data_sheet))
-        # 插入数据
-        cursor2.execute(
-            'insert into {} (timestamp, profit, asset) values (%s, %s, %s)'.format(
-                data_sheet),
-            [get_localtime(), profit, asset])
-        conn2.commit()
-        cursor2.close()
-        conn2.close()
+        mysql_engine.insert(database, data_sheet,
+                            "timestamp TEXT, profit FLOAT, asset FLOAT",
+                            ["timestamp", "profit", "asset"],
+                            [get_localtime(), profit, asset])
 
     def mysql_save_strategy_position(self, database, data_sheet, direction, amount):
         """存储持仓方向与持仓数量信息至mysql数据库"""
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:
-            cursor2.execute("CREATE TABLE {} (timestamp TEXT, direction TEXT, amount FLOAT)".format(data_sheet))
-        # 插入数据
-        cursor2.execute(
-            'insert into {} (timestamp, direction, amount) values (%s, %s, %s)'.format(
-                data_sheet),
-            [get_localtime(), direction, amount])
-        conn2.commit()
-        cursor2.close()
-        conn2.close()
-
-    def __save_kline_func(self, database, data_sheet, timestamp, open, high, low, close, volume, currency_volume):
-        """此函数专为存储7列k线数据的函数使用"""
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:
-            cursor2.execute("CREATE TABLE {} (timestamp TEXT, open FLOAT, high FLOAT, low FLOAT, close FLOAT, volume FLOAT, currency_volume FLOAT)".format(data_sheet))
-        # 插入数据
-        cursor2.execute(
-            'insert into {} (timestamp, open, high, low, close, volume, currency_volume) values (%s, %s, %s, %s, %s, %s, %s)'.format(
-                data_sheet),
-            [timestamp, open, high, low, close, volume, currency_volume])
-        # 提交事务
-        conn2.commit()
-        # 关闭游标和连接
-        cursor2.close()
-        conn2.close()
-
-    def __six_save_kline_func(self, database, data_sheet, timestamp, open, high, low, close, volume):
-        """此函数专为存储6列k线数据的函数使用"""
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:
-            cursor2.execute("CREATE TABLE {} (timestamp TEXT, open FLOAT, high FLOAT, low FLOAT, close FLOAT, volume FLOAT)".format(data_sheet))
-        # 插入数据
-        cursor2.execute(
-            'insert into {} (timestamp, open, high, low, close, volume) values (%s, %s, %s, %s, %s, %s)'.format(
-                data_sheet),
-            [timestamp, open, high, low, close, volume])
-        # 提交事务
-        conn2.commit()
-        # 关闭游标和连接
-        cursor2.close()
-        conn2.close()
+        mysql_engine.insert(database, data_sheet,
+                            "timestamp TEXT, direction TEXT, amount FLOAT",
+                            ["timestamp", "direction", "amount"],
+                            [get_localtime(), direction, amount])
 
     def kline_save(self, database, data_sheet, platform, instrument_id, time_frame):
         """
@@ -196,14 +96,32 @@ class __Storage:
         """
         result = platform.get_kline(time_frame)
         result.reverse()
-        try:
-            for data in result:
-                self.__save_kline_func(database, data_sheet, data[0], data[1], data[2], data[3], data[4], data[5], data[6])
-        except:
-            for data in result:
-                self.__six_save_kline_func(database, data_sheet, data[0], data[1], data[2], data[3], data[4], data[5])
+        self.kline_bulk_save(database, data_sheet, result)
         print("获取的历史数据已存储至mysql数据库！")
 
+    def kline_bulk_save(self, database, data_sheet, kline, chunk_size=1000):
+        """
+        批量存储k线数据至mysql数据库，所有数据在同一个事务中分块写入，并按时间戳去重，
+        重复存储同一段历史数据时已存在的k线会被更新而不会重复插入
+        :param database: 数据库名称
+        :param data_sheet: 数据表名称
+        :param kline: k线数据，可以是列表、numpy二维数组或pandas的DataFrame，列依次为时间戳、开、高、低、收、成交量(、成交额)
+        :param chunk_size: 每条insert语句包含的k线数量
+        :return: 写入的k线数量
+        """
+        if isinstance(kline, pd.DataFrame):
+            if "timestamp" not in kline.columns:    # 时间戳作为索引时，将其还原为一列
+                kline = kline.reset_index()
+            kline = kline[[field for field in KLINE_FIELDS if field in kline.columns]].values
+        rows = [[str(item[0])] + [float(x) for x in item[1:7]] for item in kline]
+        if not rows:
+            return 0
+        fields = KLINE_FIELDS[:len(rows[0])]
+        columns = ", ".join(["timestamp VARCHAR(64) NOT NULL"] + ["{} FLOAT".format(field) for field in fields[1:]] +
+                            ["UNIQUE KEY `uk_timestamp` (`timestamp`)"])
+        return mysql_engine.insert_many(database, data_sheet, columns, fields, rows, chunk_size=chunk_size,
+                                        unique_key="timestamp", existing_only=True)   # 旧的6列表不写入成交额
+
     def kline_storage(self, database, data_sheet, platform, instrument_id, time_frame):
         """
         实时获取上一根k线存储至数据库中。
@@ -215,20 +133,84 @@ class __Storage:
         """
         indicators = INDICATORS(platform, instrument_id, time_frame)
         if indicators.BarUpdate():
-            last_kline = platform.get_kline(time_frame)[1]
+            last_kline = kline_cache.get(platform, instrument_id, time_frame)[1]
             if last_kline != self.__old_kline:    # 若获取得k线不同于已保存的上一个k线
-                timestamp = last_kline[0]
-                open = last_kline[1]
-                high = last_kline[2]
-                low = last_kline[3]
-                close = last_kline[4]
-                volume = last_kline[5]
-                self.__six_save_kline_func(database, data_sheet, timestamp, open, high, low, close, volume)
+                # 与历史数据使用同一张表，回填时已存储的k线会被更新而不会因唯一键冲突报错
+                self.kline_bulk_save(database, data_sheet, [last_kline[:6]])
                 print("时间：{} 实时k线数据已保存至MySQL数据库中！".format(get_localtime()))
                 self.__old_kline = last_kline  # 将刚保存的k线设为旧k线
             else:
                 return
 
+    def query(self, database, datasheet, columns=None, conditions=None, order_by=None, descending=False, limit=None):
+        """
+        参数化查询数据库中满足条件的数据
+        :param database: 数据库名称
+        :param datasheet: 数据表名称
+        :param columns: 要读取的字段列表，不传则读取全部字段
+        :param conditions: 查询条件，字典{字段: 值}表示相等，或列表[(字段, 运算符, 值)]，如[("总资金", ">", 0)]
+        :param order_by: 排序字段
+        :param descending: 是否降序排列
+        :param limit: 最多返回的行数
+        :return: 返回查询到的数据列表，每行为一个元组
+        """
+        sql, params = build_select(database, datasheet, columns, conditions, order_by, descending, limit)
+        with mysql_engine.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows
+
+    def read_latest(self, database, datasheet, columns=None, conditions=None, order_by="timestamp"):
+        """
+        按order_by字段读取最新的一行，只从服务器取回一行数据，适合按时间戳读取最新的k线等
+        :param order_by: 排序字段，默认为"timestamp"
+        :return: 返回一个元组，未查询到时返回None
+        """
+        rows = self.query(database, datasheet, columns, conditions, order_by, descending=True, limit=1)
+        return rows[0] if rows else None
+
+    def read_last_inserted(self, database, datasheet, columns=None, conditions=None):
+        """
+        按插入顺序读取满足条件的最后一行。数据表有自增字段id时只取回一行，旧的数据表没有id时逐行扫描，不会一次性读入内存
+        :return: 返回一个元组，未查询到时返回None
+        """
+        if (database, datasheet) not in self.__no_row_id:
+            try:
+                return self.read_latest(database, datasheet, columns, conditions, order_by=ROW_ID)
+            except mysql.connector.errors.ProgrammingError as e:
+                if e.errno != 1054:     # 1054为字段不存在
+                    raise
+                self.__no_row_id.add((database, datasheet))
+        row = None
+        for row in self.iterate(database, datasheet, columns, conditions):
+            pass
+        return row
+
+    def iterate(self, database, datasheet, columns=None, conditions=None, order_by=None, descending=False,
+                batch_size=1000):
+        """
+        使用不缓冲的游标逐行读取满足条件的数据，每次从服务器取回batch_size行，适合扫描大表。
+        遍历期间一直占用连接池中的一个连接。
+        :return: 生成器，每次返回一行（元组）
+        """
+        sql, params = build_select(database, datasheet, columns, conditions, order_by, descending)
+        with mysql_engine.connection() as conn:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(sql, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+            finally:
+                if conn.unread_result:  # 提前停止遍历时，读完剩余的结果才能归还连接
+                    conn.consume_results()
+                cursor.close()
+
     def read_mysql_datas(self, data, database, datasheet, field, operator):  # 获取数据库满足条件的数据
         """
         查询数据库中满足条件的数据
@@ -236,20 +218,10 @@ class __Storage:
         :param database: 数据库名称
         :param datasheet: 数据表名称
         :param field: 字段
-        :return: 返回值查询到的数据，如未查询到则返回None
+        :param operator: 运算符，如">"
+        :return: 返回值查询到的数据，如未查询到则返回空列表
         """
-        # 连接数据库
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn = mysql.connector.connect(user=user, password=password, database=database, buffered=True)
-        # 打开游标
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM {} WHERE {} {} '{}'".format(datasheet, field, operator, data))
-        LogData = cursor.fetchall()  # 取出了数据库数据
-        # 关闭游标和连接
-        cursor.close()
-        conn.close()
-        return LogData
+        return self.query(database, datasheet, conditions=[(field, operator, data)])
 
     def read_mysql_specific_data(self, data, database, datasheet, field):  # 获取数据库满足条件的数据
         """
@@ -260,18 +232,8 @@ class __Storage:
         :param field: 字段
         :return: 返回值查询到的数据，如未查询到则返回None
         """
-        # 连接数据库
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn = mysql.connector.connect(user=user, password=password, database=database, buffered=True)
-        # 打开游标
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM {} WHERE {} = '{}'".format(datasheet, field, data))
-        LogData = cursor.fetchone()  # 取出了数据库数据
-        # 关闭游标和连接
-        cursor.close()
-        conn.close()
-        return LogData
+        rows = self.query(database, datasheet, conditions={field: data}, limit=1)
+        return rows[0] if rows else None
 
     def text_save(self, content, filename, mode='a'):
         """
@@ -300,76 +262,69 @@ class __Storage:
 
     def mongodb_save(self, database, collection, data):
         """保存数据至mongodb"""
-        client = pymongo.MongoClient(host='localhost', port=27017)
-        if config.mongodb_authorization:   # 如果启用了授权验证
-            client.admin.authenticate(config.mongodb_user_name, config.mongodb_password, mechanism='SCRAM-SHA-1')
-        db = client[database]
-        col = db[collection]
-        col.insert_one(data)
+        mongo_engine.collection(database, collection).insert_one(data)
+
+    def mongodb_save_many(self, database, collection, datas):
+        """批量保存数据至mongodb"""
+        if not datas:
+            return
+        mongo_engine.collection(database, collection).insert_many(datas, ordered=False)
+
+    def mongodb_save_buffered(self, database, collection, data, block=True):
+        """
+        缓冲保存数据至mongodb，数据先放入内存缓冲，由后台线程批量写入，适用于websocket等高频写入
+        :param database: 数据库名称
+        :param collection: 集合名称
+        :param data: 一条数据（字典）
+        :param block: 缓冲已满时是否阻塞等待，为False时丢弃该条数据
+        :return: 放入缓冲返回True，被丢弃返回False
+        """
+        return mongo_engine.writer(database, collection).put(data, block=block)
+
+    def mongodb_find(self, database, collection, query=None, batch_size=1000):
+        """
+        逐条读取mongodb数据库中某集合中的数据，不会一次性将整个集合读入内存
+        :param database: 数据库名称
+        :param collection: 集合名称
+        :param query: 查询条件，不传则读取全部数据
+        :param batch_size: 每次从服务器取回的条数
+        :return: 生成器，每次返回一条数据（字典）
+        """
+        cursor = mongo_engine.collection(database, collection).find(query or {}, batch_size=batch_size)
+        try:
+            for item in cursor:
+                yield item
+        finally:
+            cursor.close()
 
     def mongodb_read_data(self, database, collection):
-        """读取mongodb数据库中某集合中的所有数据，并保存至一个列表中"""
-        client = pymongo.MongoClient(host='localhost', port=27017)
-        if config.mongodb_authorization:  # 如果启用了授权验证
-            client.admin.authenticate(config.mongodb_user_name, config.mongodb_password, mechanism='SCRAM-SHA-1')
-        db = client[database]
-        col = db[collection]
+        """读取mongodb数据库中某集合中的所有数据，并保存至一个列表中，数据量较大时请使用mongodb_find"""
         datalist = []
-        for item in col.find():
+        for item in self.mongodb_find(database, collection):
             datalist.append([item])
         return datalist
 
-    def export_mongodb_to_csv(self, database, collection, csv_file_path):
-        """导出mongodb集合中的数据至csv文件"""
-        client = pymongo.MongoClient(host='localhost', port=27017)
-        if config.mongodb_authorization:  # 如果启用了授权验证
-            client.admin.authenticate(config.mongodb_user_name, config.mongodb_password, mechanism='SCRAM-SHA-1')
-        db = client[database]
-        sheet_table = db[collection]
-        df1 = pd.DataFrame(list(sheet_table.find()))
-        df1.to_csv(csv_file_path)
+    def export_mongodb_to_csv(self, database, collection, csv_file_path, chunk_size=10000):
+        """导出mongodb集合中的数据至csv文件，每次只读取chunk_size条写入文件"""
+        chunk = []
+        count = 0
+        for item in self.mongodb_find(database, collection, batch_size=chunk_size):
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                pd.DataFrame(chunk, index=range(count, count + len(chunk))).to_csv(csv_file_path, mode="w" if not count else "a", header=not count)
+                count += len(chunk)
+                chunk = []
+        if chunk or not count:
+            pd.DataFrame(chunk, index=range(count, count + len(chunk))).to_csv(csv_file_path, mode="w" if not count else "a", header=not count)
         print("MongoDB【{}】数据库中【{}】集合的数据已导出至【{}】文件！".format(database, collection, csv_file_path))
 
     def mysql_save_okex_spot_accounts(self, database, data_sheet, currency, balance, frozen, available, timestamp=None):
         """存储okex现货账户信息至mysql数据库"""
         timestamp = timestamp if timestamp is not None else get_localtime()   # 默认是自动填充本地时间，也可以传入*****来做数据分割
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:  # 如果数据表不存在就创建
-            cursor2.execute("CREATE TABLE {} (时间 TEXT, 币种 TEXT, 余额 TEXT, 冻结 TEXT, 可用 TEXT)".format(data_sheet))
-        # 插入新数据
-        cursor2.execute(
-            'insert into {} (时间, 币种, 余额, 冻结, 可用) values (%s, %s, %s, %s, %s)'.format(
-                data_sheet),
-            [timestamp, currency, balance, frozen, available])
-        conn2.commit()
-        cursor2.close()
-        conn2.close()
+        mysql_engine.insert(database, data_sheet,
+                            "时间 TEXT, 币种 TEXT, 余额 TEXT, 冻结 TEXT, 可用 TEXT",
+                            ["时间", "币种", "余额", "冻结", "可用"],
+                            [timestamp, currency, balance, frozen, available])
 
     def mysql_save_okex_fixedfutures_accounts(self, database, data_sheet, symbol, currency, margin_mode,
                                                                 equity, fixed_balance, available_qty, margin_frozen,
@@ -378,152 +333,43 @@ class __Storage:
                                                                 can_withdraw, timestamp=None):
         """存储okex逐仓模式交割合约账户信息至mysql数据库"""
         timestamp = timestamp if timestamp is not None else get_localtime()   # 默认是自动填充本地时间，也可以传入*****来做数据分割
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:  # 如果数据表不存在就创建
-            cursor2.execute("CREATE TABLE {} (时间 TEXT, 币对 TEXT, 余额币种 TEXT, 账户类型 TEXT, 账户权益 TEXT, 逐仓账户余额 TEXT, 逐仓可用余额 TEXT, 持仓已用保证金 TEXT, 挂单冻结保证金 TEXT, 已实现盈亏 TEXT, 未实现盈亏 TEXT, 账户静态权益 TEXT, 是否自动追加保证金 TEXT, 强平模式 TEXT, 可划转数量 TEXT)".format(data_sheet))
-        # 插入新数据
-        cursor2.execute(
-            'insert into {} (时间, 币对, 余额币种, 账户类型, 账户权益, 逐仓账户余额, 逐仓可用余额, 持仓已用保证金, 挂单冻结保证金, 已实现盈亏, 未实现盈亏, 账户静态权益, 是否自动追加保证金, 强平模式, 可划转数量) values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'.format(
-                data_sheet),
-            [timestamp, symbol, currency, margin_mode, equity, fixed_balance, available_qty, margin_frozen,
-             margin_for_unfilled, realized_pnl, unrealized_pnl, total_avail_balance, auto_margin, liqui_mode, can_withdraw])
-        conn2.commit()
-        cursor2.close()
-        conn2.close()
+        mysql_engine.insert(database, data_sheet,
+                            "时间 TEXT, 币对 TEXT, 余额币种 TEXT, 账户类型 TEXT, 账户权益 TEXT, 逐仓账户余额 TEXT, 逐仓可用余额 TEXT, 持仓已用保证金 TEXT, 挂单冻结保证金 TEXT, 已实现盈亏 TEXT, 未实现盈亏 TEXT, 账户静态权益 TEXT, 是否自动追加保证金 TEXT, 强平模式 TEXT, 可划转数量 TEXT",
+                            ["时间", "币对", "余额币种", "账户类型", "账户权益", "逐仓账户余额", "逐仓可用余额", "持仓已用保证金", "挂单冻结保证金", "已实现盈亏", "未实现盈亏", "账户静态权益", "是否自动追加保证金", "强平模式", "可划转数量"],
+                            [timestamp, symbol, currency, margin_mode, equity, fixed_balance, available_qty, margin_frozen, margin_for_unfilled, realized_pnl, unrealized_pnl, total_avail_balance, auto_margin, liqui_mode, can_withdraw])
 
     def mysql_save_okex_crossedfutures_accounts(self, database, data_sheet, symbol, currency, margin_mode, equity, total_avail_balance, margin,
                                                 margin_frozen, margin_for_unfilled, realized_pnl, unrealized_pnl, margin_ratio, maint_margin_ratio,
                                                 liqui_mode, can_withdraw, liqui_fee_rate, timestamp=None):
         """存储okex全仓模式交割合约账户信息至mysql数据库"""
         timestamp = timestamp if timestamp is not None else get_localtime()   # 默认是自动填充本地时间，也可以传入*****来做数据分割
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:  # 如果数据表不存在就创建
-            cursor2.execute("CREATE TABLE {} (时间 TEXT, 币对 TEXT, 余额币种 TEXT, 账户类型 TEXT, 账户权益 TEXT, 账户余额 TEXT, 保证金 TEXT, 持仓已用保证金 TEXT, 挂单冻结保证金 TEXT, 已实现盈亏 TEXT, 未实现盈亏 TEXT, 保证金率 TEXT, 维持保证金率 TEXT, 强平模式 TEXT, 可划转数量 TEXT, 强平手续费 TEXT)".format(data_sheet))
-        # 插入新数据
-        cursor2.execute(
-            'insert into {} (时间, 币对, 余额币种, 账户类型, 账户权益, 账户余额, 保证金, 持仓已用保证金, 挂单冻结保证金, 已实现盈亏, 未实现盈亏, 保证金率, 维持保证金率, 强平模式, 可划转数量, 强平手续费) values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'.format(
-                data_sheet),
-            [timestamp, symbol, currency, margin_mode, equity, total_avail_balance, margin,
-                                                margin_frozen, margin_for_unfilled, realized_pnl, unrealized_pnl, margin_ratio, maint_margin_ratio,
-                                                liqui_mode, can_withdraw, liqui_fee_rate])
-        conn2.commit()
-        cursor2.close()
-        conn2.close()
+        mysql_engine.insert(database, data_sheet,
+                            "时间 TEXT, 币对 TEXT, 余额币种 TEXT, 账户类型 TEXT, 账户权益 TEXT, 账户余额 TEXT, 保证金 TEXT, 持仓已用保证金 TEXT, 挂单冻结保证金 TEXT, 已实现盈亏 TEXT, 未实现盈亏 TEXT, 保证金率 TEXT, 维持保证金率 TEXT, 强平模式 TEXT, 可划转数量 TEXT, 强平手续费 TEXT",
+                            ["时间", "币对", "余额币种", "账户类型", "账户权益", "账户余额", "保证金", "持仓已用保证金", "挂单冻结保证金", "已实现盈亏", "未实现盈亏", "保证金率", "维持保证金率", "强平模式", "可划转数量", "强平手续费"],
+                            [timestamp, symbol, currency, margin_mode, equity, total_avail_balance, margin, margin_frozen, margin_for_unfilled, realized_pnl, unrealized_pnl, margin_ratio, maint_margin_ratio, liqui_mode, can_withdraw, liqui_fee_rate])
 
     def mysql_save_okex_swap_accounts(self, database, data_sheet, timestamp, symbol, currency, margin_mode, equity, total_avail_balance, fixed_balance, margin, margin_frozen, realized_pnl, unrealized_pnl, margin_ratio, maint_margin_ratio, max_withdraw):
         """存储okex全仓模式交割合约账户信息至mysql数据库"""
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:  # 如果数据表不存在就创建
-            cursor2.execute("CREATE TABLE {} (时间 TEXT, 币对 TEXT, 余额币种 TEXT, 账户类型 TEXT, 账户权益 TEXT, 账户余额 TEXT, 逐仓账户余额 TEXT, 持仓已用保证金 TEXT, 挂单冻结保证金 TEXT, 已实现盈亏 TEXT, 未实现盈亏 TEXT, 保证金率 TEXT, 维持保证金率 TEXT, 可划转数量 TEXT)".format(data_sheet))
-        # 插入新数据
-        cursor2.execute(
-            'insert into {} (时间, 币对, 余额币种, 账户类型, 账户权益, 账户余额, 逐仓账户余额, 持仓已用保证金, 挂单冻结保证金, 已实现盈亏, 未实现盈亏, 保证金率, 维持保证金率, 可划转数量) values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'.format(
-                data_sheet),
-            [timestamp, symbol, currency, margin_mode, equity, total_avail_balance, fixed_balance, margin, margin_frozen, realized_pnl, unrealized_pnl, margin_ratio, maint_margin_ratio, max_withdraw])
-        conn2.commit()
-        cursor2.close()
-        conn2.close()
+        mysql_engine.insert(database, data_sheet,
+                            "时间 TEXT, 币对 TEXT, 余额币种 TEXT, 账户类型 TEXT, 账户权益 TEXT, 账户余额 TEXT, 逐仓账户余额 TEXT, 持仓已用保证金 TEXT, 挂单冻结保证金 TEXT, 已实现盈亏 TEXT, 未实现盈亏 TEXT, 保证金率 TEXT, 维持保证金率 TEXT, 可划转数量 TEXT",
+                            ["时间", "币对", "余额币种", "账户类型", "账户权益", "账户余额", "逐仓账户余额", "持仓已用保证金", "挂单冻结保证金", "已实现盈亏", "未实现盈亏", "保证金率", "维持保证金率", "可划转数量"],
+                            [timestamp, symbol, currency, margin_mode, equity, total_avail_balance, fixed_balance, margin, margin_frozen, realized_pnl, unrealized_pnl, margin_ratio, maint_margin_ratio, max_withdraw])
 
     def delete_mysql_database(self, database):
         """删除mysql中的数据库"""
-        # 连接数据库
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn = mysql.connector.connect(user=user, password=password)
-        cursor = conn.cursor()
-        # 删除数据库
-        sql = "DROP DATABASE IF EXISTS {}".format(database)
-        cursor.execute(sql)
-        # 保存更改并关闭连接
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with mysql_engine.connection() as conn:
+            cursor = conn.cursor()
+            # 删除数据库
+            sql = "DROP DATABASE IF EXISTS {}".format(database)
+            cursor.execute(sql)
+            # 保存更改并归还连接
+            conn.commit()
+            cursor.close()
+        mysql_engine.forget_database(database)  # 清除已删除数据库的建表缓存
 
     def delete_mongodb_database(self, database):
         """删除mongodb的数据库"""
-        client = pymongo.MongoClient(host='localhost', port=27017)
-        if config.mongodb_authorization:  # 如果启用了授权验证
-            client.admin.authenticate(config.mongodb_user_name, config.mongodb_password, mechanism='SCRAM-SHA-1')
-        db = client[database]
-        db.command("dropDatabase")
+        mongo_engine.client().drop_database(database)
 
     def mysql_save_strategy_run_info(self, database, data_sheet, timestamp, action, price, amount, turnover, hold_price, hold_direction, hold_amount, profit, total_profit, total_asset):
         """
@@ -543,43 +389,11 @@ class __Storage:
         :param total_asset: 当前总资金
         :return:
         """
-        # 检查数据库是否存在，如不存在则创建
-        user = config.mysql_user_name if config.mysql_authorization else 'root'
-        password = config.mysql_password if config.mysql_authorization else 'root'
-        conn1 = mysql.connector.connect(user=user, password=password)
-        cursor1 = conn1.cursor()
-        cursor1.execute("SHOW DATABASES")
-        list1 = []
-        for item in cursor1:
-            for x in item:
-                list1.append(x)
-        if database in list1:
-            pass
-        else:
-            cursor1.execute("CREATE DATABASE {}".format(database))
-        conn1.commit()
-        cursor1.close()
-        conn1.close()
-        # 检查数据表是否存在，如不存在则创建
-        conn2 = mysql.connector.connect(user=user, password=password, database=database)
-        cursor2 = conn2.cursor()
-        cursor2.execute("SHOW TABLES")
-        list2 = []
-        for item in cursor2:
-            for x in item:
-                list2.append(x)
-        if data_sheet in list2:
-            pass
-        else:  # 如果数据表不存在就创建
-            cursor2.execute(
-                "CREATE TABLE {} (时间 TEXT, 类型 TEXT, 价格 FLOAT, 数量 FLOAT, 成交金额 FLOAT, 当前持仓价格 FLOAT, 当前持仓方向 TEXT, 当前持仓数量 FLOAT, 此次盈亏 FLOAT, 总盈亏 FLOAT, 总资金 FLOAT)".format(data_sheet))
-        # 插入新数据
-        cursor2.execute(
-            'insert into {} (时间, 类型, 价格, 数量, 成交金额, 当前持仓价格, 当前持仓方向, 当前持仓数量, 此次盈亏, 总盈亏, 总资金) values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'.format(data_sheet),
-            [timestamp, action, price, amount, turnover, hold_price, hold_direction, hold_amount, profit, total_profit, total_asset])
-        conn2.commit()
-        cursor2.close()
-        conn2.close()
+        mysql_engine.insert(database, data_sheet,
+                            "时间 TEXT, 类型 TEXT, 价格 FLOAT, 数量 FLOAT, 成交金额 FLOAT, 当前持仓价格 FLOAT, 当前持仓方向 TEXT, 当前持仓数量 FLOAT, 此次盈亏 FLOAT, 总盈亏 FLOAT, 总资金 FLOAT, "
+                            "id BIGINT NOT NULL AUTO_INCREMENT, PRIMARY KEY (id)",   # 自增字段放在最后，原有字段的位置不变
+                            ["时间", "类型", "价格", "数量", "成交金额", "当前持仓价格", "当前持仓方向", "当前持仓数量", "此次盈亏", "总盈亏", "总资金"],
+                            [timestamp, action, price, amount, turnover, hold_price, hold_direction, hold_amount, profit, total_profit, total_asset])
 
 
     def read_purequant_server_datas(self, datasheet):  # 获取数据库满足条件的数据
@@ -589,7 +403,7 @@ class __Storage:
         conn = mysql.connector.connect(host="118.193.32.198", user=user, password=password, database="kline", buffered=True)
         cursor = conn.cursor()
         # 打开游标
-        cursor.execute("SELECT * FROM {} WHERE {} {} '{}'".format(datasheet, "open", ">", 0))
+        cursor.execute(*build_select("kline", datasheet, conditions=[("open", ">", 0)]))
         LogData = cursor.fetchall()  # 取出了数据库数据
         # 关闭游标和连接
         cursor.close()
@@ -4,6 +4,7 @@
 时间工具包
 """
 
+import re
 import time
 import decimal
 import datetime
@@ -156,6 +157,17 @@ def utctime_str_to_mts(utctime_str, fmt="%Y-%m-%dT%H:%M:%S.%fZ"):
     timestamp = int(dt.replace(tzinfo=datetime.timezone.utc).astimezone(tz=None).timestamp() * 1000)
     return timestamp
 
+def time_frame_to_seconds(time_frame):
+    """ 将k线周期转换为秒数，如'1m'、'1M'、'1min'为60，'4h'为14400，'1d'为86400
+    @param time_frame k线周期
+    @return 秒数，无法识别时返回0
+    """
+    match = re.match(r"^(\d+)\s*([a-zA-Z]+)$", str(time_frame).strip())
+    if not match:
+        return 0
+    units = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+    return int(match.group(1)) * units.get(match.group(2)[0].lower(), 0)
+
 def float_to_str(f, p=20):
     """ 将给定的float转换为字符串，而无需借助科学计数法。
     @param f 浮点数参数
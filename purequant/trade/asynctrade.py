@@ -0,0 +1,94 @@
+"""
+异步交易接口
+
+将任意一个同步的交易接口（OKEXFUTURES、HUOBISWAP、BINANCEFUTURES、BYBITSWAP等）包装为协程，在一个事件循环中
+同时驱动多个交易对，例如同时查询十个合约的行情、持仓与深度。同步的请求在共享的线程池中执行，HTTP连接由
+transport模块的连接池复用，原有的同步接口保持不变，仍可通过ASYNCTRADE.platform直接调用。
+
+使用方法：
+    okex = ASYNCTRADE(OKEXFUTURES(access_key, secret_key, passphrase, "BTC-USD-201225"))
+    huobi = ASYNCTRADE(HUOBISWAP(access_key, secret_key, "BTC-USD"))
+    tickers = await gather(okex.get_ticker(), huobi.get_ticker())
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from purequant.config import config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """所有异步交易接口共用的线程池，大小为config.async_workers"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config.async_workers, thread_name_prefix="purequant-trade")
+    return _executor
+
+
+async def gather(*aws):
+    """并发等待多个请求，按传入顺序返回结果"""
+    return await asyncio.gather(*aws)
+
+
+class ASYNCTRADE:
+
+    def __init__(self, platform):
+        """
+        异步交易接口
+        :param platform: 同步的交易接口实例，如OKEXFUTURES(...)
+        """
+        self.platform = platform
+
+    async def call(self, name, *args, **kwargs):
+        """
+        在线程池中调用同步交易接口的方法
+        :param name: 方法名称，如"get_ticker"
+        :return: 与同步方法的返回值相同
+        """
+        method = functools.partial(getattr(self.platform, name), *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(executor(), method)
+
+    def __getattr__(self, name):
+        """未单独列出的方法同样以协程的方式调用，如await trade.get_order_list(...)"""
+        if name.startswith("_") or not callable(getattr(self.platform, name, None)):
+            raise AttributeError(name)
+        return functools.partial(self.call, name)
+
+    async def get_kline(self, time_frame):
+        return await self.call("get_kline", time_frame)
+
+    async def get_ticker(self):
+        return await self.call("get_ticker")
+
+    async def get_position(self, *args, **kwargs):
+        return await self.call("get_position", *args, **kwargs)
+
+    async def get_depth(self, *args, **kwargs):
+        return await self.call("get_depth", *args, **kwargs)
+
+    async def get_contract_value(self):
+        return await self.call("get_contract_value")
+
+    async def get_order_info(self, order_id):
+        return await self.call("get_order_info", order_id)
+
+    async def revoke_order(self, order_id):
+        return await self.call("revoke_order", order_id)
+
+    async def buy(self, price, size, *args, **kwargs):
+        return await self.call("buy", price, size, *args, **kwargs)
+
+    async def sell(self, price, size, *args, **kwargs):
+        return await self.call("sell", price, size, *args, **kwargs)
+
+    async def sellshort(self, price, size, *args, **kwargs):
+        return await self.call("sellshort", price, size, *args, **kwargs)
+
+    async def buytocover(self, price, size, *args, **kwargs):
+        return await self.call("buytocover", price, size, *args, **kwargs)
@@ -6,10 +6,10 @@ email: purequant@foxmail.com
 """
 
 
-import time
 from purequant.exchange.binance import binance_spot
 from purequant.time import ts_to_utc_str
-from purequant.config import config
+from purequant.chaser import chaser
+from purequant import batch
 from purequant.exceptions import *
 
 
@@ -69,70 +69,7 @@ class BINANCESPOT:
                                            timeInForce=timeInForce)
         if "msg" in str(result):   # 如果下单失败就抛出异常，提示错误信息。
             raise SendOrderError(result["msg"])
-        order_info = self.get_order_info(order_id=result['orderId'])   # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['orderId'])
-                        state = self.get_order_info(order_id=result['orderId'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['orderId'])
-                        state = self.get_order_info(order_id=result['orderId'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                            size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['orderId'])
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id=result['orderId'])
-                    state = self.get_order_info(order_id=result['orderId'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['orderId'])
-                    state = self.get_order_info(order_id=result['orderId'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                        size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['orderId'])
-                state = self.get_order_info(order_id=result['orderId'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "buy", result['orderId'], price, size, order_type=order_type, timeInForce=timeInForce)
 
     def sell(self, price, size, order_type=None, timeInForce=None):
         order_type = "LIMIT" if order_type is None else order_type  # 默认限价单
@@ -145,70 +82,15 @@ class BINANCESPOT:
                                            timeInForce=timeInForce)
         if "msg" in str(result):   # 如果下单失败就抛出异常，提示错误信息。
             raise SendOrderError(result["msg"])
-        order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['orderId'])
-                        state = self.get_order_info(order_id=result['orderId'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['orderId'])
-                        state = self.get_order_info(order_id=result['orderId'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                            size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['orderId'])
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id=result['orderId'])
-                    state = self.get_order_info(order_id=result['orderId'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.sell(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['orderId'])
-                    state = self.get_order_info(order_id=result['orderId'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.sell(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                        size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['orderId'])
-                state = self.get_order_info(order_id=result['orderId'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['orderId'])  # 下单后查询一次订单状态
-                if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "sell", result['orderId'], price, size, order_type=order_type, timeInForce=timeInForce)
+
+    def place_orders(self, orders):
+        """批量下单，参数与返回值见batch.place_orders"""
+        return batch.place_orders(self, orders)
+
+    def cancel_orders(self, order_ids):
+        """批量撤单，参数与返回值见batch.cancel_orders"""
+        return batch.cancel_orders(self, order_ids)
 
     def get_order_info(self, order_id):
         """币安现货查询订单信息"""
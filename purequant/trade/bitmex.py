@@ -5,9 +5,10 @@ Date:   2020/10/27
 email: purequant@foxmail.com
 """
 
-import time
+import json
 from purequant.exchange.bitmex.bitmex import Bitmex
-from purequant.config import config
+from purequant.chaser import chaser
+from purequant import batch
 from purequant.exceptions import *
 
 class BITMEX:
@@ -107,8 +108,61 @@ class BITMEX:
         receipt = self.__bitmex.cancel_order(order_id)
         return receipt
 
-    def get_order_info(self):
-        result = self.__bitmex.get_orders(symbol=self.__instrument_id, count=1, reverse=True)[0]
+    def amend_order(self, order_id, price, size=None):
+        """
+        修改订单的委托价格或数量
+        :param order_id: 订单号
+        :param price: 新的委托价格
+        :param size: 新的委托数量，不填则不修改
+        :return: 修改成功返回True，否则返回False
+        """
+        params = {"orderID": order_id, "price": price}
+        if size:
+            params["orderQty"] = size
+        receipt = self.__bitmex.amend_order(**params)
+        return "error" not in receipt
+
+    def place_orders(self, orders):
+        """批量下单，每20个订单合并为一次请求，参数与返回值见batch.place_orders"""
+        return batch.split(self, self.__create_orders, orders, batch.BATCH_LIMITS["bitmex"])
+
+    def cancel_orders(self, order_ids):
+        """批量撤单，每20个订单合并为一次请求，参数与返回值见batch.cancel_orders"""
+        return batch.split(self, self.__cancel_orders, order_ids, batch.BATCH_LIMITS["bitmex"])
+
+    def __create_orders(self, orders):
+        data = [{"symbol": self.__instrument_id, "side": "Buy" if order["side"] in ("buy", "buytocover") else "Sell",
+                 "orderQty": order["size"], "price": order["price"], "ordType": order.get("order_type") or "Limit",
+                 "timeInForce": order.get("timeInForce") or "GoodTillCancel"} for order in orders]
+        try:
+            receipt = self.__bitmex.create_multi_orders(orders=json.dumps(data))
+        except Exception as e:
+            return [{"order_id": None, "error": str(e)} for order in orders]
+        if "error" in receipt:
+            return [{"order_id": None, "error": receipt['error']['message']} for order in orders]
+        return [{"order_id": item['orderID'], "error": None} for item in receipt]
+
+    def __cancel_orders(self, order_ids):
+        try:
+            receipt = self.__bitmex.cancel_order(orderID=json.dumps(order_ids))
+        except Exception:
+            return [False for order_id in order_ids]
+        if "error" in receipt:
+            return [False for order_id in order_ids]
+        cancelled = set(item['orderID'] for item in receipt if not item.get('error'))
+        return [order_id in cancelled for order_id in order_ids]
+
+    def get_order_info(self, order_id=None):
+        """
+        查询订单信息
+        :param order_id: 订单号，不填则查询最近的一个订单
+        :return:
+        """
+        if order_id:
+            result = self.__bitmex.get_orders(symbol=self.__instrument_id, filter=json.dumps({"orderID": order_id}),
+                                              count=1, reverse=True)[0]
+        else:
+            result = self.__bitmex.get_orders(symbol=self.__instrument_id, count=1, reverse=True)[0]
         action = "买入" if result['side'] == "Buy" else "卖出"
         symbol = result["symbol"]
         price = result["avgPx"]
@@ -151,72 +205,7 @@ class BITMEX:
             raise SendOrderError(msg=result['error']['message'])
         except:
             order_id = result["orderID"]
-            order_info = self.get_order_info()  # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-            # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:  # 如果撤单失败，则订单可能在此期间已完全成交或部分成交
-                        self.revoke_order(order_id)
-                        state = self.get_order_info()
-                        if state['订单状态'] == "撤单成功":  # 已完全成交时，以原下单数量重发；部分成交时，重发委托数量为原下单数量减去已成交数量
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                            size - state["已成交数量"])
-                    except:  # 撤单失败时，说明订单已完全成交
-                        order_info = self.get_order_info()  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id)
-                        state = self.get_order_info()
-                        if state['订单状态'] == "撤单成功":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                            size - state["已成交数量"])
-                    except:  # 撤单失败时，说明订单已完全成交，再查询一次订单状态，如果已完全成交，返回下单结果
-                        order_info = self.get_order_info()  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info()
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id)
-                    state = self.get_order_info()
-                    if state['订单状态'] == "撤单成功":
-                        return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                        size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info()  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id)
-                    state = self.get_order_info()
-                    if state['订单状态'] == "撤单成功":
-                        return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                        size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info()  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id)
-                state = self.get_order_info()
-                return state
-            except:
-                order_info = self.get_order_info()  # 再查询一次订单状态
-                if order_info["订单状态"] == "完全成交":
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "buy", order_id, price, size, order_type=order_type, timeInForce=timeInForce)
 
     def sell(self, price, size, order_type=None, timeInForce=None):
         order_type = order_type or "Limit"
@@ -227,72 +216,7 @@ class BITMEX:
             raise SendOrderError(msg=result['error']['message'])
         except:
             order_id = result["orderID"]
-            order_info = self.get_order_info()  # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-            # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:  # 如果撤单失败，则订单可能在此期间已完全成交或部分成交
-                        self.revoke_order(order_id)
-                        state = self.get_order_info()
-                        if state['订单状态'] == "撤单成功":  # 已完全成交时，以原下单数量重发；部分成交时，重发委托数量为原下单数量减去已成交数量
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order),
-                                            size + state["已成交数量"])
-                    except:  # 撤单失败时，说明订单已完全成交
-                        order_info = self.get_order_info()  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id)
-                        state = self.get_order_info()
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order),
-                                            size + state["已成交数量"])
-                    except:  # 撤单失败时，说明订单已完全成交，再查询一次订单状态，如果已完全成交，返回下单结果
-                        order_info = self.get_order_info()  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info()
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id)
-                    state = self.get_order_info()
-                    if state['订单状态'] == "撤单成功":
-                        return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order),
-                                        size + state["已成交数量"])
-                except:
-                    order_info = self.get_order_info()  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id)
-                    state = self.get_order_info()
-                    if state['订单状态'] == "撤单成功":
-                        return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order),
-                                        size + state["已成交数量"])
-                except:
-                    order_info = self.get_order_info()  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id)
-                state = self.get_order_info()
-                return state
-            except:
-                order_info = self.get_order_info()  # 再查询一次订单状态
-                if order_info["订单状态"] == "完全成交":
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "sell", order_id, price, size, order_type=order_type, timeInForce=timeInForce)
 
     def sellshort(self, price, size, order_type=None, timeInForce=None):
         order_type = order_type or "Limit"
@@ -303,72 +227,7 @@ class BITMEX:
             raise SendOrderError(msg=result['error']['message'])
         except:
             order_id = result["orderID"]
-            order_info = self.get_order_info()  # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-            # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:  # 如果撤单失败，则订单可能在此期间已完全成交或部分成交
-                        self.revoke_order(order_id)
-                        state = self.get_order_info()
-                        if state['订单状态'] == "撤单成功":  # 已完全成交时，以原下单数量重发；部分成交时，重发委托数量为原下单数量减去已成交数量
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order),
-                                            size + state["已成交数量"])
-                    except:  # 撤单失败时，说明订单已完全成交
-                        order_info = self.get_order_info()  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id)
-                        state = self.get_order_info()
-                        if state['订单状态'] == "撤单成功":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order),
-                                            size + state["已成交数量"])
-                    except:  # 撤单失败时，说明订单已完全成交，再查询一次订单状态，如果已完全成交，返回下单结果
-                        order_info = self.get_order_info()  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info()
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id)
-                    state = self.get_order_info()
-                    if state['订单状态'] == "撤单成功":
-                        return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order),
-                                        size + state["已成交数量"])
-                except:
-                    order_info = self.get_order_info()  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id)
-                    state = self.get_order_info()
-                    if state['订单状态'] == "撤单成功":
-                        return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order),
-                                        size + state["已成交数量"])
-                except:
-                    order_info = self.get_order_info()  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id)
-                state = self.get_order_info()
-                return state
-            except:
-                order_info = self.get_order_info()  # 再查询一次订单状态
-                if order_info["订单状态"] == "完全成交":
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "sellshort", order_id, price, size, order_type=order_type, timeInForce=timeInForce)
 
     def buytocover(self, price, size, order_type=None, timeInForce=None):
         order_type = order_type or "Limit"
@@ -379,72 +238,7 @@ class BITMEX:
             raise SendOrderError(msg=result['error']['message'])
         except:
             order_id = result["orderID"]
-            order_info = self.get_order_info()  # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-            # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:  # 如果撤单失败，则订单可能在此期间已完全成交或部分成交
-                        self.revoke_order(order_id)
-                        state = self.get_order_info()
-                        if state['订单状态'] == "撤单成功":  # 已完全成交时，以原下单数量重发；部分成交时，重发委托数量为原下单数量减去已成交数量
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                            size - state["已成交数量"])
-                    except:  # 撤单失败时，说明订单已完全成交
-                        order_info = self.get_order_info()  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id)
-                        state = self.get_order_info()
-                        if state['订单状态'] == "撤单成功":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                            size - state["已成交数量"])
-                    except:  # 撤单失败时，说明订单已完全成交，再查询一次订单状态，如果已完全成交，返回下单结果
-                        order_info = self.get_order_info()  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info()
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id)
-                    state = self.get_order_info()
-                    if state['订单状态'] == "撤单成功":
-                        return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                        size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info()  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id)
-                    state = self.get_order_info()
-                    if state['订单状态'] == "撤单成功":
-                        return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order),
-                                        size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info()  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id)
-                state = self.get_order_info()
-                return state
-            except:
-                order_info = self.get_order_info()  # 再查询一次订单状态
-                if order_info["订单状态"] == "完全成交":
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "buytocover", order_id, price, size, order_type=order_type, timeInForce=timeInForce)
 
     def BUY(self, cover_short_price, cover_short_size, open_long_price, open_long_size, order_type=None):
         result1 = self.buytocover(cover_short_price, cover_short_size, order_type)
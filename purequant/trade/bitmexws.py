@@ -1,6 +1,7 @@
 from purequant.exchange.bitmex.bitmex_websocket import BitMEXWebsocket
 from purequant.exchange.bitmex.bitmex import Bitmex
 from purequant.exceptions import *
+from purequant import batch
 import uuid
 
 
@@ -29,6 +30,33 @@ class BITMEXWS:
         receipt = self.__bitmex.cancel_order(clOrdID=clOrdID)
         return receipt
 
+    def place_orders(self, orders):
+        """
+        批量下单，参数与返回值见batch.place_orders
+        未指定clOrdID的订单自动生成，返回的order_id为clOrdID，可直接传给cancel_orders
+        """
+        orders = [dict(order, clOrdID=order.get("clOrdID") or self.generate_uuid()) for order in orders]
+        results = batch.place_orders(self, orders)
+        for order, result in zip(orders, results):
+            if result["error"] is None:
+                receipt = result["order_id"]
+                if isinstance(receipt, dict) and 'error' in receipt:
+                    result["order_id"], result["error"] = None, receipt['error'].get('message', str(receipt['error']))
+                else:
+                    result["order_id"] = order["clOrdID"]
+        return results
+
+    def cancel_orders(self, order_ids):
+        """批量撤单，order_ids为clOrdID列表，参数与返回值见batch.cancel_orders"""
+        def cancel(clOrdID):
+            try:
+                receipt = self.revoke_order(clOrdID)
+            except Exception:
+                return False
+            return not (isinstance(receipt, dict) and 'error' in receipt)
+
+        return batch.parallel(self, cancel, order_ids)
+
     def buy(self, price, size, order_type=None, timeInForce=None, clOrdID=None):
         """
         买入开多
@@ -93,38 +121,28 @@ class BITMEXWS:
             return xbt
 
     @property
-    def __depth(self):
+    def asks(self):
+        """卖盘价格列表，从低到高"""
         if self.__ws.ws.sock.connected:
-            asks = []
-            bids = []
-            data = self.__ws.market_depth()
-            for item in data:
-                if item['side'] == 'Sell':
-                    asks.append(item)
-                elif item['side'] == 'Buy':
-                    bids.append(item)
-            ask_price_list = []
-            bid_price_list = []
-            for j in asks:
-                ask_price_list.append(j['price'])
-            for x in bids:
-                bid_price_list.append(x['price'])
-            ask_price_list.sort(reverse=False)
-            bid_price_list.sort(reverse=True)
-            return {
-                "ask_price_list": ask_price_list,
-                "bid_price_list": bid_price_list
-            }
+            return self.__ws.order_book().ask_prices()
 
     @property
-    def asks(self):
+    def bids(self):
+        """买盘价格列表，从高到低"""
         if self.__ws.ws.sock.connected:
-            return self.__depth['ask_price_list']
+            return self.__ws.order_book().bid_prices()
 
     @property
-    def bids(self):
+    def best_ask(self):
+        """卖一价"""
+        if self.__ws.ws.sock.connected:
+            return self.__ws.order_book().best_ask()
+
+    @property
+    def best_bid(self):
+        """买一价"""
         if self.__ws.ws.sock.connected:
-            return self.__depth['bid_price_list']
+            return self.__ws.order_book().best_bid()
 
     @property
     def hold_amount(self):
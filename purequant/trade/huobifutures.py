@@ -6,10 +6,10 @@ Date:   2020/10/27
 email: purequant@foxmail.com
 """
 
-import time
 from purequant.exchange.huobi import huobi_futures as huobifutures
 from purequant.time import ts_to_utc_str
-from purequant.config import config
+from purequant.chaser import chaser
+from purequant import batch
 from purequant.exceptions import *
 
 
@@ -81,70 +81,10 @@ class HUOBIFUTURES:
                         client_order_id='', price=price, volume=size, direction='buy',
                         offset='open', lever_rate=self.__leverage, order_price_type=order_price_type)
         try:
-            order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
+            order_id = result['data']['order_id_str']
         except Exception as e:
             raise SendOrderError(result['err_msg'])
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id = result['data']['order_id_str'])
-                        state = self.get_order_info(order_id = result['data']['order_id_str'])
-                        if state['订单状态'] == "撤单成功" or state['订单状态'] == "部分成交撤销":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id = result['data']['order_id_str'])
-                        state = self.get_order_info(order_id = result['data']['order_id_str'])
-                        if state['订单状态'] == "部分成交撤销":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id = result['data']['order_id_str'])
-            if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
-                try:
-                    self.revoke_order(order_id = result['data']['order_id_str'])
-                    state = self.get_order_info(order_id = result['data']['order_id_str'])
-                    if state['订单状态'] == "撤单成功" or state['订单状态'] == "部分成交撤销":
-                        return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id = result['data']['order_id_str'])
-                    state = self.get_order_info(order_id = result['data']['order_id_str'])
-                    if state['订单状态'] == "部分成交撤销":
-                        return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id = result['data']['order_id_str'])
-                state = self.get_order_info(order_id = result['data']['order_id_str'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "buy", order_id, price, size, order_type=order_type)
 
 
     def sell(self, price, size, order_type=None):
@@ -176,70 +116,10 @@ class HUOBIFUTURES:
                         client_order_id='', price=price, volume=size, direction='sell',
                         offset='close', lever_rate=self.__leverage, order_price_type=order_price_type)
         try:
-            order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
+            order_id = result['data']['order_id_str']
         except Exception as e:
             raise SendOrderError(result['err_msg'])
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['data']['order_id_str'])
-                        state = self.get_order_info(order_id=result['data']['order_id_str'])
-                        if state['订单状态'] == "撤单成功" or state['订单状态'] == "部分成交撤销":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['data']['order_id_str'])
-                        state = self.get_order_info(order_id=result['data']['order_id_str'])
-                        if state['订单状态'] == "部分成交撤销":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['data']['order_id_str'])
-            if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
-                try:
-                    self.revoke_order(order_id=result['data']['order_id_str'])
-                    state = self.get_order_info(order_id=result['data']['order_id_str'])
-                    if state['订单状态'] == "撤单成功" or state['订单状态'] == "部分成交撤销":
-                        return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['data']['order_id_str'])
-                    state = self.get_order_info(order_id=result['data']['order_id_str'])
-                    if state['订单状态'] == "部分成交撤销":
-                        return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['data']['order_id_str'])
-                state = self.get_order_info(order_id=result['data']['order_id_str'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "sell", order_id, price, size, order_type=order_type)
 
     def buytocover(self, price, size, order_type=None):
         """
@@ -270,70 +150,10 @@ class HUOBIFUTURES:
                         client_order_id='', price=price, volume=size, direction='buy',
                         offset='close', lever_rate=self.__leverage, order_price_type=order_price_type)
         try:
-            order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
+            order_id = result['data']['order_id_str']
         except Exception as e:
             raise SendOrderError(result['err_msg'])
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['data']['order_id_str'])
-                        state = self.get_order_info(order_id=result['data']['order_id_str'])
-                        if state['订单状态'] == "撤单成功" or state['订单状态'] == "部分成交撤销":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['data']['order_id_str'])
-                        state = self.get_order_info(order_id=result['data']['order_id_str'])
-                        if state['订单状态'] == "部分成交撤销":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['data']['order_id_str'])
-            if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
-                try:
-                    self.revoke_order(order_id=result['data']['order_id_str'])
-                    state = self.get_order_info(order_id=result['data']['order_id_str'])
-                    if state['订单状态'] == "撤单成功" or state['订单状态'] == "部分成交撤销":
-                        return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state['已成交数量'])
-                except:
-                    order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['data']['order_id_str'])
-                    state = self.get_order_info(order_id=result['data']['order_id_str'])
-                    if state['订单状态'] == "部分成交撤销":
-                        return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['data']['order_id_str'])
-                state = self.get_order_info(order_id=result['data']['order_id_str'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "buytocover", order_id, price, size, order_type=order_type)
 
     def sellshort(self, price, size, order_type=None):
         """
@@ -364,70 +184,10 @@ class HUOBIFUTURES:
                         client_order_id='', price=price, volume=size, direction='sell',
                         offset='open', lever_rate=self.__leverage, order_price_type=order_price_type)
         try:
-            order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
+            order_id = result['data']['order_id_str']
         except Exception as e:
             raise SendOrderError(result['err_msg'])
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['data']['order_id_str'])
-                        state = self.get_order_info(order_id=result['data']['order_id_str'])
-                        if state['订单状态'] == "撤单成功" or state['订单状态'] == "部分成交撤销":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state['已成交数量'])
-                    except:
-                        order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['data']['order_id_str'])
-                        state = self.get_order_info(order_id=result['data']['order_id_str'])
-                        if state['订单状态'] == "部分成交撤销":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['data']['order_id_str'])
-            if order_info["订单状态"] == "准备提交" or order_info["订单状态"] == "已提交":
-                try:
-                    self.revoke_order(order_id=result['data']['order_id_str'])
-                    state = self.get_order_info(order_id=result['data']['order_id_str'])
-                    if state['订单状态'] == "撤单成功" or state['订单状态'] == "部分成交撤销":
-                        return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['data']['order_id_str'])
-                    state = self.get_order_info(order_id=result['data']['order_id_str'])
-                    if state['订单状态'] == "部分成交撤销":
-                        return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                    if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['data']['order_id_str'])
-                state = self.get_order_info(order_id=result['data']['order_id_str'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['data']['order_id_str'])  # 下单后查询一次订单状态
-                if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "sellshort", order_id, price, size, order_type=order_type)
 
     def BUY(self, cover_short_price, cover_short_size, open_long_price, open_long_size, order_type=None):
         """火币交割合约平空开多"""
@@ -454,6 +214,14 @@ class HUOBIFUTURES:
         else:
             return False
 
+    def place_orders(self, orders):
+        """批量下单，参数与返回值见batch.place_orders"""
+        return batch.place_orders(self, orders)
+
+    def cancel_orders(self, order_ids):
+        """批量撤单，参数与返回值见batch.cancel_orders"""
+        return batch.cancel_orders(self, order_ids)
+
     def get_order_info(self, order_id):
         result = self.__huobi_futures.get_contract_order_info(self.__symbol, order_id)
         instrument_id = result['data'][0]['contract_code']
@@ -6,9 +6,9 @@ Date:   2020/10/27
 email: purequant@foxmail..com
 """
 
-import time
 from purequant.exchange.okex import futures_api as okexfutures
-from purequant.config import config
+from purequant.chaser import chaser
+from purequant import batch
 from purequant.exceptions import *
 from purequant.logger import logger
 
@@ -70,266 +70,22 @@ class OKEXFUTURES:
     def buy(self, price, size, order_type=None):
         order_type = order_type or 0    # 如果不填order_type,则默认为普通委托
         result = self.__okex_futures.take_order(self.__instrument_id, 1, price, size, order_type=order_type) # 下订单
-        order_info = self.get_order_info(order_id=result['order_id'])   # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ": # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation: # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:    # 如果撤单失败，则订单可能在此期间已完全成交或部分成交
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功": # 已完全成交时，以原下单数量重发；部分成交时，重发委托数量为原下单数量减去已成交数量
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:     # 撤单失败时，说明订单已完全成交
-                        order_info = self.get_order_info(order_id=result['order_id'])   # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:     # 撤单失败时，说明订单已完全成交，再查询一次订单状态，如果已完全成交，返回下单结果
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-        if config.time_cancellation: # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['order_id'])
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.buy(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['order_id'])
-                state = self.get_order_info(order_id=result['order_id'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                if order_info["订单状态"] == "完全成交":
-                    return order_info
-        else:   # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "buy", result['order_id'], price, size, order_type=order_type)
 
     def sell(self, price, size, order_type=None):
         order_type = order_type or 0
         result = self.__okex_futures.take_order(self.__instrument_id, 3, price, size, order_type=order_type)
-        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['order_id'])
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.sell(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['order_id'])
-                state = self.get_order_info(order_id=result['order_id'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                if order_info["订单状态"] == "完全成交":
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "sell", result['order_id'], price, size, order_type=order_type)
 
     def sellshort(self, price, size, order_type=None):
         order_type = order_type or 0
         result = self.__okex_futures.take_order(self.__instrument_id, 2, price, size, order_type=order_type)
-        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) <= price * (1 - config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['order_id'])
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.sellshort(float(self.get_ticker()['last']) * (1 - config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['order_id'])
-                state = self.get_order_info(order_id=result['order_id'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                if order_info["订单状态"] == "完全成交":
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "sellshort", result['order_id'], price, size, order_type=order_type)
 
     def buytocover(self, price, size, order_type=None):
         order_type = order_type or 0
         result = self.__okex_futures.take_order(self.__instrument_id, 4, price, size, order_type=order_type)
-        order_info = self.get_order_info(order_id=result['order_id'])  # 下单后查询一次订单状态
-        if order_info["订单状态"] == "完全成交" or order_info["订单状态"] == "失败 ":  # 如果订单状态为"完全成交"或者"失败"，返回结果
-            return order_info
-        # 如果订单状态不是"完全成交"或者"失败"
-        if config.price_cancellation:  # 选择了价格撤单时，如果最新价超过委托价一定幅度，撤单重发，返回下单结果
-            if order_info["订单状态"] == "等待成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-            if order_info["订单状态"] == "部分成交":
-                if float(self.get_ticker()['last']) >= price * (1 + config.price_cancellation_amplitude):
-                    try:
-                        self.revoke_order(order_id=result['order_id'])
-                        state = self.get_order_info(order_id=result['order_id'])
-                        if state['订单状态'] == "撤单成功":
-                            return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                    except:
-                        order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                        if order_info["订单状态"] == "完全成交":
-                            return order_info
-        if config.time_cancellation:  # 选择了时间撤单时，如果委托单发出多少秒后不成交，撤单重发，直至完全成交，返回成交结果
-            time.sleep(config.time_cancellation_seconds)
-            order_info = self.get_order_info(order_id=result['order_id'])
-            if order_info["订单状态"] == "等待成交":
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-            if order_info["订单状态"] == "部分成交":
-                try:
-                    self.revoke_order(order_id=result['order_id'])
-                    state = self.get_order_info(order_id=result['order_id'])
-                    if state['订单状态'] == "撤单成功":
-                        return self.buytocover(float(self.get_ticker()['last']) * (1 + config.reissue_order), size - state["已成交数量"])
-                except:
-                    order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                    if order_info["订单状态"] == "完全成交":
-                        return order_info
-        if config.automatic_cancellation:
-            # 如果订单未完全成交，且未设置价格撤单和时间撤单，且设置了自动撤单，就自动撤单并返回下单结果与撤单结果
-            try:
-                self.revoke_order(order_id=result['order_id'])
-                state = self.get_order_info(order_id=result['order_id'])
-                return state
-            except:
-                order_info = self.get_order_info(order_id=result['order_id'])  # 再查询一次订单状态
-                if order_info["订单状态"] == "完全成交":
-                    return order_info
-        else:  # 未启用交易助手时，下单并查询订单状态后直接返回下单结果
-            return order_info
+        return chaser.track(self, "buytocover", result['order_id'], price, size, order_type=order_type)
 
     def BUY(self, cover_short_price, cover_short_size, open_long_price, open_long_size, order_type=None):
         order_type = order_type or 0
@@ -360,6 +116,54 @@ class OKEXFUTURES:
         else:
             return False
 
+    def amend_order(self, order_id, price, size=None):
+        """
+        修改订单的委托价格或数量，修改失败时订单保持不变
+        :param order_id: 订单号
+        :param price: 新的委托价格
+        :param size: 新的委托数量，不填则不修改
+        :return: 修改成功返回True，否则返回False
+        """
+        receipt = self.__okex_futures.amend_order(self.__instrument_id, cancel_on_fail="0", order_id=order_id,
+                                                new_size=size or '', new_price=price)
+        if receipt['error_code'] == "0":
+            return True
+        else:
+            return False
+
+    def place_orders(self, orders):
+        """批量下单，每10个订单合并为一次请求，参数与返回值见batch.place_orders"""
+        return batch.split(self, self.__take_orders, orders, batch.BATCH_LIMITS["okex"])
+
+    def cancel_orders(self, order_ids):
+        """批量撤单，每10个订单合并为一次请求，参数与返回值见batch.cancel_orders"""
+        return batch.split(self, self.__revoke_orders, order_ids, batch.BATCH_LIMITS["okex"])
+
+    def __take_orders(self, orders):
+        data = [{"type": batch.OKEX_TYPES[order["side"]], "price": order["price"], "size": order["size"],
+                 "order_type": str(order.get("order_type") or 0)} for order in orders]
+        try:
+            receipt = self.__okex_futures.take_orders(self.__instrument_id, data)
+        except Exception as e:
+            return [{"order_id": None, "error": str(e)} for order in orders]
+        results = []
+        for info in receipt['order_info']:
+            if str(info.get('error_code') or "0") == "0":
+                results.append({"order_id": info['order_id'], "error": None})
+            else:
+                results.append({"order_id": None, "error": info.get('error_message')})
+        return results
+
+    def __revoke_orders(self, order_ids):
+        try:
+            receipt = self.__okex_futures.revoke_orders(self.__instrument_id, order_ids=order_ids)
+        except Exception:
+            return [False for order_id in order_ids]
+        if str(receipt.get('result')).lower() != "true":
+            return [False for order_id in order_ids]
+        accepted = set(str(order_id) for order_id in receipt.get('order_ids', []))
+        return [str(order_id) in accepted for order_id in order_ids]
+
     def get_order_info(self, order_id):
         result = self.__okex_futures.get_order_info(self.__instrument_id, order_id)
         instrument_id = result['instrument_id']
@@ -0,0 +1,145 @@
+# -*- coding:utf-8 -*-
+
+"""
+HTTP连接池
+
+所有交易所的REST请求共用此模块，每个域名一个requests.Session，连接在请求之间保持，不再每次请求都重新建立
+TCP与TLS连接。连接池大小、超时与重试次数可在配置文件中设置，每个接口的请求耗时记录在直方图中。
+"""
+
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from purequant.config import config
+
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))  # 直方图的区间上限，毫秒
+
+
+class LatencyHistogram:
+    """请求耗时直方图"""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, milliseconds):
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if milliseconds <= bound:
+                self.buckets[index] += 1
+                break
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, percent):
+        """按区间估算的百分位数，返回所在区间的上限，耗时超过最大区间时返回最大耗时"""
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(LATENCY_BUCKETS[index], self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": {("<=%s" % bound if bound != float("inf") else ">%s" % LATENCY_BUCKETS[-2]): count
+                        for bound, count in zip(LATENCY_BUCKETS, self.buckets)}
+        }
+
+
+class __Transport:
+    """共享的HTTP连接池"""
+
+    def __init__(self):
+        self.__sessions = {}    # 域名 -> requests.Session
+        self.__histograms = {}  # 接口 -> LatencyHistogram
+        self.__lock = threading.Lock()
+
+    def session(self, host):
+        """
+        获取某个域名的Session，首次使用时按配置创建连接池
+        :param host: 域名，如"www.okex.com"
+        :return: 返回requests.Session
+        """
+        session = self.__sessions.get(host)
+        if session is None:
+            with self.__lock:
+                session = self.__sessions.get(host)
+                if session is None:
+                    # 只有连接失败或幂等请求才会重试，下单等POST请求不会因为重试而重复提交
+                    retry = Retry(total=config.http_retries, connect=config.http_retries, read=config.http_retries,
+                                  backoff_factor=config.http_backoff, status_forcelist=(502, 503, 504),
+                                  raise_on_status=False)
+                    # 连接池不小于并发请求的线程数，否则并发时多出的连接用完即被丢弃，无法复用
+                    adapter = HTTPAdapter(pool_connections=1, max_retries=retry,
+                                          pool_maxsize=max(config.http_pool_size, config.async_workers))
+                    session = requests.Session()
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self.__sessions[host] = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        """
+        发送请求，参数与requests.request相同，未指定timeout时使用config.http_timeout
+        :return: 返回requests.Response，请求失败时抛出与requests相同的异常
+        """
+        parts = urlsplit(url.decode("utf-8") if isinstance(url, bytes) else url)
+        kwargs.setdefault("timeout", config.http_timeout)
+        histogram = self.__histogram(method, parts.netloc, parts.path)
+        start = time.perf_counter()
+        try:
+            response = self.session(parts.netloc).request(method, url, **kwargs)
+        except Exception:
+            with self.__lock:
+                histogram.errors += 1
+            raise
+        with self.__lock:
+            histogram.observe((time.perf_counter() - start) * 1000)
+        return response
+
+    def get(self, url, params=None, **kwargs):
+        return self.request("GET", url, params=params, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.request("POST", url, data=data, json=json, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def __histogram(self, method, host, path):
+        # 路径中的订单号等长数字合并为同一个接口，避免直方图的数量无限增长
+        endpoint = "{} {}{}".format(method.upper(), host, re.sub(r"\d{5,}", "{id}", path))
+        histogram = self.__histograms.get(endpoint)
+        if histogram is None:
+            with self.__lock:
+                histogram = self.__histograms.setdefault(endpoint, LatencyHistogram())
+        return histogram
+
+    def metrics(self):
+        """
+        每个接口的请求耗时，单位为毫秒
+        :return: 返回一个字典，键为"方法 域名路径"
+        """
+        with self.__lock:
+            return {endpoint: histogram.summary() for endpoint, histogram in self.__histograms.items()}
+
+
+transport = __Transport()
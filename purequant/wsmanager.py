@@ -0,0 +1,595 @@
+# -*- coding:utf-8 -*-
+
+"""
+websocket连接管理
+
+同一个交易所的同一个地址只建立一个websocket连接，所有频道在这一个连接上订阅，收到的数据按频道分发给各自的
+回调函数。断线后自动重连并重新订阅全部频道；深度频道的checksum校验失败时，只对这一个频道取消订阅后重新订阅，
+不影响同一连接上的其他频道。逐笔深度频道（depth_l2_tbt）发现缺口时先通过REST快照重建订单簿，重建失败才重新订阅。
+每个频道记录收到的消息数、每秒消息数与推送延迟。
+
+火币的连接断线后按指数退避重连，超过HEARTBEAT_TIMEOUT秒没有收到任何数据（包括服务器的ping）时视为连接已失效
+并主动重连，重连后重新鉴权并订阅全部主题。连接记录累计断线时长，带序号的主题（如高频深度的version、seqNum）
+记录序号缺口与漏掉的消息数。
+
+使用方法：
+    connection = ws_manager.okex()
+    connection.subscribe("futures/ticker:BTC-USD-201225", on_message)
+    connection.subscribe("futures/depth:BTC-USD-201225", on_message, on_book=on_book)
+    connection.subscribe("futures/depth_l2_tbt:BTC-USD-201225", on_message, on_book=on_book)   # book为TbtBook
+    connection = ws_manager.okex(api_key=api_key, passphrase=passphrase, secret_key=secret_key)   # 私有频道
+    connection = ws_manager.huobi("wss://api.hbdm.com/ws")
+    connection.subscribe("market.BTC_CQ.depth.size_20.high_freq", on_message)
+    connection = ws_manager.huobi("wss://api.hbdm.com/notification", access_key, secret_key)   # 订单等私有主题
+    ws_manager.metrics()
+"""
+
+import asyncio
+import datetime
+import json
+import threading
+import time
+import urllib.parse
+import uuid
+from purequant.decoder import DecodePipeline, decode_huobi, decode_okex, executors
+from purequant.logger import logger
+
+OKEX_URL = "wss://real.okex.com:8443/ws/v3"
+PING_INTERVAL = 25  # 超过该秒数没有收到数据时发送ping
+RECONNECT_INTERVAL = 1  # 断线后重连的等待秒数
+SUBSCRIBE_BATCH = 50    # 每条订阅请求包含的最大频道数量
+RATE_WINDOW = 1     # 统计每秒消息数的时间窗口（秒）
+PRIVATE_TABLES = ("position", "account", "order", "order_algo", "margin_account")   # 私有频道中的时间是订单等的时间，不统计延迟
+HUOBI_URL = "wss://api.hbdm.com/ws"
+HEARTBEAT_TIMEOUT = 30  # 火币每5秒发送一次ping，超过该秒数没有收到任何数据时重连
+MAX_RECONNECT_INTERVAL = 60     # 火币重连的等待秒数从RECONNECT_INTERVAL开始逐次加倍，最长等待的秒数
+
+
+def server_milliseconds(timestamp):
+    """将OKEX推送中的ISO格式时间（如2020-07-09T08:00:00.123Z）转换为毫秒时间戳"""
+    return datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp() * 1000
+
+
+class ChannelStats:
+    """一个频道的消息统计"""
+
+    def __init__(self):
+        self.messages = 0
+        self.rate = 0.0     # 最近一个统计窗口内的每秒消息数
+        self.lag = 0.0      # 最近一条消息的推送延迟，毫秒，即本地接收时间减去数据中的服务器时间
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.lag_samples = 0
+        self.resubscribes = 0
+        self.gaps = 0   # 序号不连续的次数
+        self.missed = 0     # 按序号推算漏掉的消息数，序号本身不连续的主题不统计
+        self.seq = None
+        self.received = None
+        self.__window_start = time.monotonic()
+        self.__window_count = 0
+
+    def observe(self, timestamp=None):
+        now = time.monotonic()
+        self.messages += 1
+        self.received = now
+        self.__window_count += 1
+        elapsed = now - self.__window_start
+        if elapsed >= RATE_WINDOW:
+            self.rate = self.__window_count / elapsed
+            self.__window_start = now
+            self.__window_count = 0
+        if timestamp:
+            try:
+                lag = time.time() * 1000 - (server_milliseconds(timestamp) if isinstance(timestamp, str) else timestamp)
+            except ValueError:
+                return
+            self.lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.total_lag += lag
+            self.lag_samples += 1
+
+    def sequence(self, seq, prev=None):
+        """
+        记录消息序号，断线重连后仍与之前的序号比较，因此断线期间漏掉的消息也会被统计
+        :param seq: 本条消息的序号
+        :param prev: 推送中携带的上一条消息的序号，没有时认为序号逐条加1
+        """
+        last, self.seq = self.seq, seq
+        if last is None or seq <= last:     # 首条消息，或服务器重置了序号
+            return
+        if prev is not None:
+            if prev != last:
+                self.gaps += 1
+        elif seq != last + 1:
+            self.gaps += 1
+            self.missed += seq - last - 1
+
+    def summary(self):
+        return {"messages": self.messages, "rate": self.rate, "lag": self.lag, "max_lag": self.max_lag,
+                "avg_lag": self.total_lag / self.lag_samples if self.lag_samples else 0.0,
+                "resubscribes": self.resubscribes, "gaps": self.gaps, "missed": self.missed,
+                "age": time.monotonic() - self.received if self.received is not None else None}
+
+
+class OkexConnection:
+    """在一个websocket连接上订阅多个OKEX频道"""
+
+    def __init__(self, url=OKEX_URL, api_key=None, passphrase=None, secret_key=None):
+        """
+        :param url: websocket地址
+        :param api_key: 订阅私有频道时传入，连接建立后先登录
+        """
+        self.url = url
+        self.__api_key = api_key
+        self.__passphrase = passphrase
+        self.__secret_key = secret_key
+        self.__channels = {}    # 频道 -> [回调函数列表, 订单簿回调函数列表]
+        self.__stats = {}   # 频道 -> ChannelStats
+        self.__books = {}   # 深度频道 -> OrderBook，逐笔深度频道 -> TbtBook
+        self.__lock = threading.Lock()
+        self.__loop = None
+        self.__ws = None
+        self.__thread = None
+        self.connected = False  # 连接已建立，需要登录时已登录成功
+        self.reconnects = 0
+        self.downtime = 0.0     # 累计断线秒数
+        self.__disconnected_at = None
+
+    def subscribe(self, channel, on_message, on_book=None):
+        """
+        订阅一个频道，连接未启动时自动在后台线程中启动
+        :param channel: 频道，如"futures/ticker:BTC-USD-201225"
+        :param on_message: 回调函数，收到该频道的数据时调用on_message(res)，res为{"table", "action", "data"}，
+                           data只包含该频道的数据
+        :param on_book: 深度频道的回调函数，订单簿校验通过后调用on_book(instrument_id, book)
+        """
+        with self.__lock:
+            new = channel not in self.__channels
+            handlers = self.__channels.setdefault(channel, [[], []])
+            handlers[0].append(on_message)
+            if on_book is not None:
+                handlers[1].append(on_book)
+            self.__stats.setdefault(channel, ChannelStats())
+        if new:
+            self.__send_threadsafe({"op": "subscribe", "args": [channel]})
+        self.start()
+
+    def unsubscribe(self, channel):
+        """取消订阅一个频道，同时移除它的全部回调函数"""
+        with self.__lock:
+            if self.__channels.pop(channel, None) is None:
+                return
+            self.__books.pop(channel, None)
+        self.__send_threadsafe({"op": "unsubscribe", "args": [channel]})
+
+    def channels(self):
+        with self.__lock:
+            return list(self.__channels)
+
+    def start(self):
+        """在后台线程中运行连接，重复调用不会建立新的连接"""
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.__thread = threading.Thread(target=self.__run_forever, daemon=True, name="purequant-okex-ws")
+        self.__thread.start()
+
+    def metrics(self):
+        """
+        各频道的消息统计
+        :return: 返回一个字典，键为频道，值包括messages收到的消息数、rate每秒消息数、lag/avg_lag/max_lag推送延迟
+                 （毫秒，包含本地与服务器的时钟偏差）、resubscribes校验失败重新订阅的次数、age距上一条消息的秒数
+        """
+        with self.__lock:
+            return {channel: stats.summary() for channel, stats in self.__stats.items()}
+
+    def __send_threadsafe(self, message):
+        """连接已建立时从任意线程发送一条消息，未建立时由连接建立后的订阅统一发送"""
+        loop, ws = self.__loop, self.__ws
+        if loop is not None and ws is not None and self.connected:
+            asyncio.run_coroutine_threadsafe(ws.send(json.dumps(message)), loop)
+
+    def __run_forever(self):
+        self.__loop = asyncio.new_event_loop()
+        while True:
+            try:
+                self.__loop.run_until_complete(self.__run())
+            except Exception as e:
+                logger.error("OKEX websocket连接断开，正在重连！错误：{}".format(str(e)))
+            if self.connected:
+                self.__disconnected_at = time.monotonic()
+            self.connected = False
+            self.__ws = None
+            self.reconnects += 1
+            time.sleep(RECONNECT_INTERVAL)
+
+    async def __run(self):
+        import websockets
+        from purequant.exchange.okex.websocket import login_params, server_timestamp
+        async with websockets.connect(self.url) as ws:
+            self.__ws = ws
+            if self.__api_key:
+                timestamp = str(server_timestamp())
+                await ws.send(login_params(timestamp, self.__api_key, self.__passphrase, self.__secret_key))
+                result = decode_okex(await ws.recv())
+                if not result.get("success"):
+                    raise Exception("登录失败：{}".format(result))
+            with self.__lock:   # 此后新订阅的频道直接发送订阅请求
+                self.__books.clear()
+                channels = list(self.__channels)
+                self.connected = True
+            if self.__disconnected_at is not None:
+                self.downtime += time.monotonic() - self.__disconnected_at
+                self.__disconnected_at = None
+            for start in range(0, len(channels), SUBSCRIBE_BATCH):
+                await ws.send(json.dumps({"op": "subscribe", "args": channels[start:start + SUBSCRIBE_BATCH]}))
+            # 启用解码流水线时，解压与解析在线程池或进程池中进行，回调函数仍在事件循环中按顺序执行
+            pipeline = DecodePipeline(decode_okex, lambda res: self.__dispatch(ws, res)) if executors.get() else None
+            pinged = False
+            try:
+                while True:
+                    try:
+                        message = await asyncio.wait_for(ws.recv(), timeout=PING_INTERVAL)
+                    except asyncio.TimeoutError:
+                        if pinged:
+                            raise Exception("发送ping之后仍未收到数据")
+                        await ws.send('ping')
+                        pinged = True
+                        continue
+                    pinged = False
+                    if pipeline is not None:
+                        await pipeline.put(message)
+                    else:
+                        await self.__dispatch(ws, decode_okex(message))
+            finally:
+                if pipeline is not None:
+                    pipeline.close()
+
+    async def __dispatch(self, ws, res):
+        if res == "pong":
+            return
+        if 'event' in res:
+            if res['event'] == "error":
+                logger.error("OKEX websocket订阅错误：{}".format(res))
+            return
+        table = res.get('table')
+        if table is None:
+            return
+        private = table.split("/")[-1] in PRIVATE_TABLES
+        for data in res.get('data', []):
+            with self.__lock:
+                channel = self.__route(table, data)
+                handlers = self.__channels.get(channel)
+                stats = self.__stats.get(channel)
+            if handlers is None:
+                continue
+            stats.observe(None if private else data.get('timestamp'))
+            message = {"table": table, "action": res.get('action'), "data": [data]}
+            if table.endswith("depth_l2_tbt"):
+                book = self.__tbt_book(channel, data['instrument_id'])
+                if not book.apply(res.get('action'), data):
+                    if book.stale and book.suspend():
+                        stats.resubscribes += 1
+                        logger.warning("OKEX频道{}的逐笔深度出现缺口，正在通过REST快照重建".format(channel))
+                        asyncio.ensure_future(self.__resync(ws, channel, book))
+                    continue
+                for on_book in handlers[1]:
+                    self.__call(on_book, data['instrument_id'], book)
+            elif 'checksum' in data:
+                if not self.__update_book(channel, res.get('action'), data):
+                    stats.resubscribes += 1
+                    logger.warning("OKEX频道{}的checksum校验失败，正在重新订阅该频道".format(channel))
+                    await ws.send(json.dumps({"op": "unsubscribe", "args": [channel]}))
+                    await ws.send(json.dumps({"op": "subscribe", "args": [channel]}))
+                    continue
+                book = self.__books.get(channel)
+                if book is None:    # 重新订阅或重连后尚未收到全量数据，增量数据无法使用
+                    continue
+                for on_book in handlers[1]:
+                    self.__call(on_book, data['instrument_id'], book)
+            for on_message in handlers[0]:
+                self.__call(on_message, message)
+
+    def __route(self, table, data):
+        """按数据中的合约ID或币种找到对应的频道，找不到时返回该表的第一个频道，调用时需持有锁"""
+        for key in ("instrument_id", "currency", "underlying"):
+            if key in data:
+                channel = "{}:{}".format(table, data[key])
+                if channel in self.__channels:
+                    return channel
+        if table in self.__channels:
+            return table
+        prefix = table + ":"
+        for channel in self.__channels:
+            if channel.startswith(prefix):
+                return channel
+        return None
+
+    def __update_book(self, channel, action, data):
+        """
+        合并深度数据并校验checksum
+        :return: 校验通过返回True
+        """
+        from purequant.exchange.okex.orderbook import OrderBook
+        if action == "partial":
+            book = OrderBook(data['instrument_id'])
+            book.partial(data['bids'], data['asks'])
+            self.__books[channel] = book
+        else:
+            book = self.__books.get(channel)
+            if book is None:    # 重新订阅后尚未收到全量数据
+                return True
+            book.update(data['bids'], data['asks'])
+        if book.checksum() == data['checksum']:
+            return True
+        self.__books.pop(channel, None)
+        return False
+
+    def __tbt_book(self, channel, instrument_id):
+        from purequant.exchange.okex.tbtbook import TbtBook, rest_snapshot
+        with self.__lock:
+            book = self.__books.get(channel)
+            if book is None:
+                book = self.__books[channel] = TbtBook(instrument_id, snapshot=rest_snapshot(instrument_id))
+            return book
+
+    async def __resync(self, ws, channel, book):
+        """在线程池中请求REST快照重建逐笔深度订单簿，失败时重新订阅该频道"""
+        if await asyncio.get_event_loop().run_in_executor(None, book.resync):
+            return
+        logger.warning("OKEX频道{}的订单簿重建失败，正在重新订阅该频道".format(channel))
+        with self.__lock:
+            self.__books.pop(channel, None)
+        await ws.send(json.dumps({"op": "unsubscribe", "args": [channel]}))
+        await ws.send(json.dumps({"op": "subscribe", "args": [channel]}))
+
+    @staticmethod
+    def __call(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error("websocket回调函数错误：{}".format(str(e)))
+
+
+class HuobiConnection:
+    """在一个websocket连接上订阅多个火币主题，断线后按指数退避重连并重新订阅"""
+
+    def __init__(self, url=HUOBI_URL, access_key=None, secret_key=None):
+        """
+        :param url: websocket地址，行情如"wss://api.hbdm.com/ws"，订单推送如"wss://api.hbdm.com/notification"
+        :param access_key: 订阅私有主题时传入，连接建立后先鉴权
+        """
+        self.url = url
+        self.__access_key = access_key
+        self.__secret_key = secret_key
+        self.__topics = {}  # 主题 -> 回调函数列表
+        self.__stats = {}   # 主题 -> ChannelStats
+        self.__lock = threading.Lock()
+        self.__loop = None
+        self.__ws = None
+        self.__thread = None
+        self.connected = False  # 连接已建立，需要鉴权时已鉴权成功
+        self.reconnects = 0
+        self.downtime = 0.0     # 累计断线秒数
+        self.last_downtime = 0.0    # 最近一次断线的秒数
+        self.__disconnected_at = None
+
+    def subscribe(self, topic, on_message):
+        """
+        订阅一个主题，连接未启动时自动在后台线程中启动
+        :param topic: 行情主题如"market.BTC_CQ.kline.1min"，私有主题如"orders.BTC-USD"，私有主题可使用通配符"orders.*"
+        :param on_message: 回调函数，收到该主题的数据时调用on_message(data)，可以是协程函数
+        """
+        with self.__lock:
+            new = topic not in self.__topics
+            self.__topics.setdefault(topic, []).append(on_message)
+            self.__stats.setdefault(topic, ChannelStats())
+        if new:
+            self.__send_threadsafe(self.__request("sub", topic))
+        self.start()
+
+    def unsubscribe(self, topic):
+        """取消订阅一个主题，同时移除它的全部回调函数"""
+        with self.__lock:
+            if self.__topics.pop(topic, None) is None:
+                return
+        self.__send_threadsafe(self.__request("unsub", topic))
+
+    def topics(self):
+        with self.__lock:
+            return list(self.__topics)
+
+    def start(self):
+        """在后台线程中运行连接，重复调用不会建立新的连接"""
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.__thread = threading.Thread(target=self.__run_forever, daemon=True, name="purequant-huobi-ws")
+        self.__thread.start()
+
+    def metrics(self):
+        """
+        各主题的消息统计
+        :return: 返回一个字典，键为主题，值与OkexConnection.metrics()相同，另有gaps序号缺口次数与missed漏掉的消息数
+        """
+        with self.__lock:
+            return {topic: stats.summary() for topic, stats in self.__stats.items()}
+
+    def __request(self, op, topic):
+        if self.__access_key:
+            return {"op": op, "cid": str(uuid.uuid1()), "topic": topic}
+        return {op: topic, "id": str(uuid.uuid1())}
+
+    def __send_threadsafe(self, message):
+        """连接已建立时从任意线程发送一条消息，未建立时由连接建立后的订阅统一发送"""
+        loop, ws = self.__loop, self.__ws
+        if loop is not None and ws is not None and self.connected:
+            asyncio.run_coroutine_threadsafe(ws.send(json.dumps(message)), loop)
+
+    def __run_forever(self):
+        self.__loop = asyncio.new_event_loop()
+        interval = RECONNECT_INTERVAL
+        while True:
+            try:
+                self.__loop.run_until_complete(self.__run())
+                error = "连接已关闭"
+            except Exception as e:
+                error = str(e)
+            if self.connected:
+                self.__disconnected_at = time.monotonic()
+                interval = RECONNECT_INTERVAL   # 连接成功过，重新从最短的等待时间开始
+            self.connected = False
+            self.__ws = None
+            self.reconnects += 1
+            logger.error("火币websocket连接断开，{}秒后重连！错误：{}".format(interval, error))
+            time.sleep(interval)
+            interval = min(interval * 2, MAX_RECONNECT_INTERVAL)
+
+    async def __run(self):
+        import websockets
+        async with websockets.connect(self.url) as ws:
+            self.__ws = ws
+            if self.__access_key:
+                await ws.send(json.dumps(self.__auth_params()))
+                while True:     # 鉴权结果之前可能先收到ping
+                    result = decode_huobi(await asyncio.wait_for(ws.recv(), timeout=HEARTBEAT_TIMEOUT))
+                    if not await self.__heartbeat(ws, result):
+                        break
+                if result.get("op") != "auth" or result.get("err-code") != 0:
+                    raise Exception("鉴权失败：{}".format(result))
+            with self.__lock:   # 此后新订阅的主题直接发送订阅请求
+                topics = list(self.__topics)
+                self.connected = True
+            if self.__disconnected_at is not None:
+                self.last_downtime = time.monotonic() - self.__disconnected_at
+                self.downtime += self.last_downtime
+                self.__disconnected_at = None
+            for topic in topics:
+                await ws.send(json.dumps(self.__request("sub", topic)))
+            pipeline = DecodePipeline(decode_huobi, lambda data: self.__dispatch(ws, data)) if executors.get() else None
+            try:
+                while True:
+                    try:
+                        message = await asyncio.wait_for(ws.recv(), timeout=HEARTBEAT_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        raise Exception("{}秒内没有收到任何数据".format(HEARTBEAT_TIMEOUT))
+                    if pipeline is not None:
+                        await pipeline.put(message)
+                    else:
+                        await self.__dispatch(ws, decode_huobi(message))
+            finally:
+                if pipeline is not None:
+                    pipeline.close()
+
+    def __auth_params(self):
+        from purequant.exchange.huobi.websocket import generate_signature
+        data = {"AccessKeyId": self.__access_key, "SignatureMethod": "HmacSHA256", "SignatureVersion": "2",
+                "Timestamp": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")}
+        data["Signature"] = generate_signature(self.url, "GET", data, urllib.parse.urlparse(self.url).path,
+                                               self.__secret_key)
+        data["op"] = "auth"
+        data["type"] = "api"
+        return data
+
+    @staticmethod
+    async def __heartbeat(ws, data):
+        """回复服务器的ping，是ping时返回True"""
+        if data.get("op") == "ping":
+            await ws.send(json.dumps({"op": "pong", "ts": data.get("ts")}))
+            return True
+        if "ping" in data:
+            await ws.send(json.dumps({"pong": data["ping"]}))
+            return True
+        return False
+
+    async def __dispatch(self, ws, data):
+        if await self.__heartbeat(ws, data):
+            return
+        if data.get("status") == "error" or data.get("err-code") not in (None, 0):
+            logger.error("火币websocket订阅错误：{}".format(data))
+            return
+        topic = data.get("ch") or (data.get("topic") if data.get("op") == "notify" else None)
+        if topic is None:
+            return
+        with self.__lock:
+            key = self.__route(topic)
+            handlers = list(self.__topics.get(key, []))
+            stats = self.__stats.get(key)
+        if not handlers:
+            return
+        stats.observe(data.get("ts"))
+        tick = data.get("tick")
+        if isinstance(tick, dict):
+            if "prevSeqNum" in tick:
+                stats.sequence(tick["seqNum"], tick["prevSeqNum"])
+            elif "version" in tick and tick.get("event") in ("snapshot", "update"):
+                if tick["event"] == "snapshot":
+                    stats.seq = None
+                stats.sequence(tick["version"])
+        for on_message in handlers:
+            try:
+                result = on_message(data)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error("websocket回调函数错误：{}".format(str(e)))
+
+    def __route(self, topic):
+        """找到推送对应的订阅主题，私有主题推送中为小写，并支持通配符，调用时需持有锁"""
+        if topic in self.__topics:
+            return topic
+        lowered = topic.lower()
+        for key in self.__topics:
+            pattern = key.lower()
+            if pattern == lowered or (pattern.endswith(".*") and lowered.startswith(pattern[:-1])):
+                return key
+        return None
+
+
+class __WebsocketManager:
+    """所有websocket连接"""
+
+    def __init__(self):
+        self.__connections = {}
+        self.__lock = threading.Lock()
+
+    def okex(self, url=None, api_key=None, passphrase=None, secret_key=None):
+        """
+        获取OKEX的websocket连接，同一个地址、同一个账户共用一个连接
+        :param url: 默认为"wss://real.okex.com:8443/ws/v3"
+        :param api_key: 订阅私有频道时传入
+        :return: 返回OkexConnection
+        """
+        key = ("okex", url or OKEX_URL, api_key)
+        with self.__lock:
+            if key not in self.__connections:
+                self.__connections[key] = OkexConnection(url or OKEX_URL, api_key, passphrase, secret_key)
+            return self.__connections[key]
+
+    def huobi(self, url=None, access_key=None, secret_key=None):
+        """
+        获取火币的websocket连接，同一个地址、同一个账户共用一个连接
+        :param url: 默认为"wss://api.hbdm.com/ws"
+        :param access_key: 订阅私有主题时传入
+        :return: 返回HuobiConnection
+        """
+        key = ("huobi", url or HUOBI_URL, access_key)
+        with self.__lock:
+            if key not in self.__connections:
+                self.__connections[key] = HuobiConnection(url or HUOBI_URL, access_key, secret_key)
+            return self.__connections[key]
+
+    def metrics(self):
+        """
+        所有连接的频道统计
+        :return: 返回一个字典，键为"交易所 地址"，值包括connected、reconnects、downtime累计断线秒数与各频道的统计channels
+        """
+        with self.__lock:
+            connections = dict(self.__connections)
+        return {"{} {}".format(key[0], key[1]) + (" (private)" if key[2] else ""):
+                {"connected": connection.connected, "reconnects": connection.reconnects,
+                 "downtime": connection.downtime, "channels": connection.metrics()}
+                for key, connection in connections.items()}
+
+
+ws_manager = __WebsocketManager()